@@ -0,0 +1,447 @@
+"""Process-wide metrics for the agents, served in the Prometheus text format.
+
+Every agent process records into `REGISTRY`. The worker process serves
+`/metrics` on METRICS_PORT (127.0.0.1:9464 by default); job processes
+write a snapshot of their registry to a shared directory every few
+seconds, and the endpoint adds those up, so one scrape covers every job
+on the worker.
+"""
+import atexit
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterable
+
+logger = logging.getLogger("agent-metrics")
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+METRICS_EXPORT_INTERVAL = float(os.getenv("METRICS_EXPORT_INTERVAL", "5"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TOKEN_RATE_BUCKETS = (5.0, 10.0, 20.0, 40.0, 60.0, 80.0, 100.0, 150.0, 200.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+# Recording is a plain attribute update with no lock: all of a session's
+# events are handled on its event loop's thread, and the GIL keeps the
+# snapshot taken by the exporter or the endpoint from seeing a torn value.
+class _CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _GaugeValue(_CounterValue):
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+
+class _HistogramValue:
+    __slots__ = ("_buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self._buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self._buckets, value)] += 1
+        self.sum += value
+
+
+class Metric:
+    """A metric family: one value per combination of label values.
+
+    `labels(*values)` returns the value to record into; look it up once and
+    keep it when recording on a hot path. A metric without labels records
+    directly (`counter.inc()`, `histogram.observe(x)`).
+    """
+
+    def __init__(self, kind: str, name: str, help: str, labelnames: tuple[str, ...], buckets: tuple[float, ...] = ()):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._children: dict[tuple[str, ...], Any] = {}
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            child = _HistogramValue(self.buckets) if self.kind == "histogram" else (
+                _GaugeValue() if self.kind == "gauge" else _CounterValue()
+            )
+            self._children[values] = child
+        return child
+
+    def __getattr__(self, attr: str):
+        # inc / dec / set / observe on a metric without labels
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self.labels(), attr)
+
+    def snapshot(self) -> dict:
+        samples = []
+        for values, child in list(self._children.items()):
+            if self.kind == "histogram":
+                samples.append([list(values), {"counts": list(child.counts), "sum": child.sum}])
+            else:
+                samples.append([list(values), child.value])
+        return {"type": self.kind, "help": self.help, "labelnames": list(self.labelnames),
+                "buckets": list(self.buckets), "samples": samples}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Metric:
+        return self._register(Metric("counter", name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Metric:
+        return self._register(Metric("gauge", name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: tuple[str, ...] = (), *, buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> Metric:
+        return self._register(Metric("histogram", name, help, labelnames, tuple(sorted(buckets))))
+
+    def snapshot(self) -> dict[str, dict]:
+        return {name: metric.snapshot() for name, metric in list(self._metrics.items())}
+
+    def render(self, others: Iterable[dict[str, dict]] = ()) -> str:
+        """Prometheus text format (0.0.4) for this registry plus other processes' snapshots."""
+        return render_snapshots([self.snapshot(), *others])
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+
+def merge_snapshots(snapshots: Iterable[dict[str, dict]]) -> dict[str, dict]:
+    """Add snapshots up into one, in the same format."""
+    merged: dict[str, dict] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            for values, value in metric["samples"]:
+                key = tuple(values)
+                current = target["samples"].get(key)
+                if metric["type"] != "histogram":
+                    target["samples"][key] = (current or 0.0) + value
+                elif current is None:
+                    target["samples"][key] = {"counts": list(value["counts"]), "sum": value["sum"]}
+                else:
+                    current["counts"] = [a + b for a, b in zip(current["counts"], value["counts"])]
+                    current["sum"] += value["sum"]
+    for metric in merged.values():
+        metric["samples"] = [[list(key), value] for key, value in metric["samples"].items()]
+    return merged
+
+
+def render_snapshots(snapshots: Iterable[dict[str, dict]]) -> str:
+    lines = []
+    for name, metric in merge_snapshots(snapshots).items():
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labelnames = metric["labelnames"]
+        for values, value in metric["samples"]:
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(labelnames, values)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*metric["buckets"], math.inf], value["counts"]):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else _number(bound)
+                lines.append(f"{name}_bucket{_labels([*labelnames, 'le'], [*values, le])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labelnames, values)} {_number(value['sum'])}")
+            lines.append(f"{name}_count{_labels(labelnames, values)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def _labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+REGISTRY = MetricsRegistry()
+
+SESSIONS_ACTIVE = REGISTRY.gauge("agent_sessions_active", "Sessions currently running.", ("agent",))
+SESSIONS = REGISTRY.counter("agent_sessions_total", "Sessions started.", ("agent",))
+LLM_REQUESTS = REGISTRY.counter("agent_llm_requests_total", "LLM requests by outcome.", ("agent", "outcome"))
+LLM_TTFT = REGISTRY.histogram("agent_llm_ttft_seconds", "LLM time to first token.", ("agent",))
+LLM_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "agent_llm_tokens_per_second", "LLM completion tokens per second.", ("agent",), buckets=TOKEN_RATE_BUCKETS
+)
+LLM_TOKENS = REGISTRY.counter("agent_llm_tokens_total", "LLM tokens used.", ("agent", "kind"))
+TTS_TTFB = REGISTRY.histogram("agent_tts_ttfb_seconds", "TTS time to first audio byte.", ("agent",))
+TTS_CHARACTERS = REGISTRY.counter("agent_tts_characters_total", "Characters sent to TTS.", ("agent",))
+STT_LATENCY = REGISTRY.histogram(
+    "agent_stt_latency_seconds", "End of user speech to the final transcript.", ("agent",)
+)
+STT_AUDIO = REGISTRY.counter("agent_stt_audio_seconds_total", "Audio sent to STT.", ("agent",))
+EOU_DELAY = REGISTRY.histogram(
+    "agent_eou_delay_seconds", "End of user speech to the reply being committed.", ("agent",)
+)
+TOOL_DURATION = REGISTRY.histogram("agent_tool_duration_seconds", "Tool call duration.", ("agent", "tool"))
+TOOL_CALLS = REGISTRY.counter("agent_tool_calls_total", "Tool calls by outcome.", ("agent", "tool", "outcome"))
+TURNS_QUEUED = REGISTRY.gauge("agent_turns_queued", "Typed chat and tool follow-up turns waiting to be answered.")
+LOOP_LAG = REGISTRY.histogram(
+    "agent_event_loop_lag_seconds", "Delay of event loop callbacks past their scheduled time.", buckets=LAG_BUCKETS
+)
+LOOP_STALLS = REGISTRY.counter("agent_event_loop_stalls_total", "Callbacks that blocked the event loop past the threshold.")
+
+
+def instrument_session(ctx, assistant, *, agent: str, llm, tts, stt) -> None:
+    """Count the session, and subscribe to the LLM, TTS, STT and assistant metrics and the assistant's tool calls."""
+    from livekit.agents import metrics
+
+    SESSIONS.labels(agent).inc()
+    active = SESSIONS_ACTIVE.labels(agent)
+    active.inc()
+
+    async def _session_ended():
+        active.dec()
+
+    ctx.add_shutdown_callback(_session_ended)
+
+    ttft, tokens_per_second, ttfb = LLM_TTFT.labels(agent), LLM_TOKENS_PER_SECOND.labels(agent), TTS_TTFB.labels(agent)
+    prompt_tokens, completion_tokens = LLM_TOKENS.labels(agent, "prompt"), LLM_TOKENS.labels(agent, "completion")
+    characters, stt_latency, stt_audio = TTS_CHARACTERS.labels(agent), STT_LATENCY.labels(agent), STT_AUDIO.labels(agent)
+    eou_delay = EOU_DELAY.labels(agent)
+    tool_started: dict[str, float] = {}
+
+    @llm.on("metrics_collected")
+    def _on_llm_metrics(m: metrics.LLMMetrics):
+        outcome = "cancelled" if m.cancelled else "error" if m.error else "ok"
+        LLM_REQUESTS.labels(agent, outcome).inc()
+        if m.ttft >= 0:
+            ttft.observe(m.ttft)
+        if m.completion_tokens:
+            tokens_per_second.observe(m.tokens_per_second)
+        prompt_tokens.inc(m.prompt_tokens)
+        completion_tokens.inc(m.completion_tokens)
+
+    @tts.on("metrics_collected")
+    def _on_tts_metrics(m: metrics.TTSMetrics):
+        if m.ttfb >= 0:
+            ttfb.observe(m.ttfb)
+        characters.inc(m.characters_count)
+
+    @stt.on("metrics_collected")
+    def _on_stt_metrics(m: metrics.STTMetrics):
+        stt_audio.inc(m.audio_duration)
+
+    @assistant.on("metrics_collected")
+    def _on_pipeline_metrics(m):
+        if isinstance(m, metrics.PipelineEOUMetrics):
+            stt_latency.observe(m.transcription_delay)
+            eou_delay.observe(m.end_of_utterance_delay)
+
+    @assistant.on("function_calls_collected")
+    def _on_function_calls_collected(function_calls):
+        now = time.perf_counter()
+        for fnc in function_calls:
+            tool_started[fnc.tool_call_id] = now
+
+    @assistant.on("function_calls_finished")
+    def _on_function_calls_finished(called_functions):
+        now = time.perf_counter()
+        for called in called_functions:
+            name = called.call_info.function_info.name
+            start = tool_started.pop(called.call_info.tool_call_id, None)
+            if start is not None:
+                TOOL_DURATION.labels(agent, name).observe(now - start)
+            TOOL_CALLS.labels(agent, name, "error" if called.exception is not None else "ok").inc()
+
+
+# -- exposition across processes ---------------------------------------------
+
+_serving = False
+
+
+def serve(port: int = METRICS_PORT, host: str = METRICS_HOST) -> ThreadingHTTPServer | None:
+    """Serve /metrics from this (the worker) process, including its job processes' snapshots.
+
+    Job processes inherit METRICS_DIR, the directory they write their
+    snapshots to. The counters and histograms of job processes that have
+    exited are folded into a persisted total there, so they keep counting
+    after the processes' snapshot files are deleted. Returns None when
+    METRICS_PORT is 0.
+    """
+    global _serving
+    if not port:
+        return None
+    directory = os.environ.setdefault("METRICS_DIR", tempfile.mkdtemp(prefix="agent-metrics-"))
+    os.makedirs(directory, exist_ok=True)
+    snapshots = _SnapshotDirectory(directory)
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = REGISTRY.render(snapshots.read()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    _serving = True
+    logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def start_exporter(interval: float = METRICS_EXPORT_INTERVAL) -> None:
+    """Write this job process's snapshot to METRICS_DIR every `interval` seconds, from a thread.
+
+    Does nothing in the process that serves the endpoint (jobs running as
+    threads of the worker) or when no worker is serving.
+    """
+    directory = os.getenv("METRICS_DIR")
+    if _serving or not directory:
+        return
+    # the start time keeps a later process that reuses this pid from overwriting our totals
+    path = os.path.join(directory, f"{os.getpid()}-{time.time_ns()}.json")
+    stop = threading.Event()
+
+    def _write(exited: bool = False):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"pid": os.getpid(), "interval": interval, "exited": exited, "metrics": REGISTRY.snapshot()}, f)
+        os.replace(tmp, path)
+
+    def _run():
+        while not stop.wait(interval):
+            try:
+                _write()
+            except OSError as e:
+                logger.warning(f"Failed to write metrics snapshot: {str(e)}")
+
+    threading.Thread(target=_run, name="metrics-exporter", daemon=True).start()
+
+    def _final():
+        stop.set()
+        try:
+            _write(exited=True)
+        except OSError:
+            pass
+
+    atexit.register(_final)
+
+
+RETIRED_NAME = "retired.json"
+
+
+class _SnapshotDirectory:
+    """Job process snapshots in METRICS_DIR, as read by the endpoint.
+
+    A snapshot whose process has exited (its final write says so, or it has
+    not been written for three intervals and the pid is gone) is added to
+    the persisted total in retired.json and deleted, so a scrape only reads
+    the live processes' files plus that one. The total is written before
+    the file is deleted: a crash in between counts one process twice, it
+    never makes a counter go backwards.
+    """
+
+    def __init__(self, directory: str):
+        self._directory = directory
+        self._retired_path = os.path.join(directory, RETIRED_NAME)
+        self._lock = threading.Lock()  # scrapes run on threads of their own
+        try:
+            with open(self._retired_path) as f:
+                self._retired = json.load(f)
+        except (OSError, ValueError):
+            self._retired = {}
+
+    def read(self) -> list[dict[str, dict]]:
+        with self._lock:
+            live, exited = [], []
+            now = time.time()
+            for entry in os.scandir(self._directory):
+                if not entry.name.endswith(".json") or entry.name == RETIRED_NAME:
+                    continue
+                try:
+                    with open(entry.path) as f:
+                        data = json.load(f)
+                    modified = entry.stat().st_mtime
+                except (OSError, ValueError):
+                    continue
+                stale = now - modified > 3 * data["interval"]
+                if data.get("exited") or (stale and not _alive(data.get("pid"))):
+                    exited.append((entry.path, data["metrics"]))
+                elif stale:
+                    # not exporting any more but still around: its counters count, its gauges don't
+                    live.append({name: m for name, m in data["metrics"].items() if m["type"] != "gauge"})
+                else:
+                    live.append(data["metrics"])
+            if exited:
+                self._retire(exited)
+            return [self._retired, *live]
+
+    def _retire(self, exited: list[tuple[str, dict]]) -> None:
+        counted = [{name: m for name, m in metrics.items() if m["type"] != "gauge"} for _, metrics in exited]
+        retired = merge_snapshots([self._retired, *counted])
+        tmp = f"{self._retired_path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(retired, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self._retired_path)
+        except OSError as e:
+            logger.warning(f"Failed to write retired metrics: {str(e)}")
+            return
+        self._retired = retired
+        for path, _ in exited:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _alive(pid: int | None) -> bool:
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
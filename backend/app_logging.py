@@ -0,0 +1,125 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import reprlib
+import time
+from datetime import datetime
+from functools import lru_cache, wraps
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+_sample_rates: dict[str, float] = {}
+_default_sample_rate = float(os.getenv("LOG_CALL_SAMPLE_RATE", "1"))
+
+
+def setup_logging(log_directory: str = "logs") -> None:
+    """Worker process logging: a log file and the console, written by a background thread."""
+    os.makedirs(log_directory, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.FileHandler(f"{log_directory}/assistant_{timestamp}.log"), logging.StreamHandler()]
+    root = logging.getLogger()
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    _offload_root_handlers()
+
+
+def setup_job_logging() -> None:
+    """Job process logging: drop disabled records early and forward the rest off the event loop.
+
+    livekit sends job process records to the worker through a handler that
+    formats and pickles every record, at every level, on the calling thread.
+    """
+    logging.getLogger().setLevel(LOG_LEVEL)
+    _offload_root_handlers()
+
+
+def _offload_root_handlers() -> None:
+    # the root logger keeps a QueueHandler, which only formats the message;
+    # the real handlers (file, console, IPC) run on the listener's thread
+    root = logging.getLogger()
+    handlers = [h for h in root.handlers if not isinstance(h, logging.handlers.QueueHandler)]
+    if not handlers:
+        return
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    listener.start()
+    atexit.register(listener.stop)
+
+
+def set_sample_rate(logger_name: str, rate: float) -> None:
+    """Log only `rate` of the calls wrapped by log_function_call in this module's logger."""
+    _sample_rates[logger_name] = rate
+
+
+@lru_cache(maxsize=None)
+def _truncating_repr(max_chars: int) -> reprlib.Repr:
+    r = reprlib.Repr()
+    r.maxstring = r.maxother = max_chars
+    r.maxlevel = 3
+    return r
+
+
+class _Short:
+    """Truncated repr of a payload, computed only if the record is formatted."""
+
+    __slots__ = ("_value", "_max_chars")
+
+    def __init__(self, value, max_chars: int):
+        self._value = value
+        self._max_chars = max_chars
+
+    def __str__(self) -> str:
+        return _truncating_repr(self._max_chars).repr(self._value)
+
+
+def log_function_call(func=None, *, max_chars: int = 120):
+    """Log entry and exit of an async function, with truncated arguments and result.
+
+    Two INFO records per call, in the logger of the function's module, unless
+    that logger has INFO disabled or the call is not sampled (see
+    set_sample_rate), in which case nothing is formatted at all. Errors are
+    always logged. The first positional argument (self, or the job context)
+    is left out.
+    """
+    if func is None:
+        return lambda f: log_function_call(f, max_chars=max_chars)
+
+    logger = logging.getLogger(func.__module__)
+    name = func.__name__
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not logger.isEnabledFor(logging.INFO) or random.random() >= _sample_rates.get(logger.name, _default_sample_rate):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                logger.error("ERROR in function %s: %s", name, e, exc_info=True)
+                raise
+
+        logger.info(
+            "ENTERING FUNCTION: %s args=%s kwargs=%s",
+            name, _Short(args[1:], max_chars), _Short(kwargs, max_chars),
+        )
+        start = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            logger.error("ERROR in function %s: %s", name, e, exc_info=True)
+            raise
+        logger.info(
+            "FUNCTION %s completed in %.1f ms, returned %s",
+            name, (time.perf_counter() - start) * 1000, _Short(result, max_chars),
+        )
+        return result
+
+    return wrapper
@@ -0,0 +1,143 @@
+"""Job assignment to first greeting audio, sequential setup + sleep(1) vs SessionBootstrap.
+
+A fake room connects after --connect seconds. The participant's microphone
+track is subscribed a random 0 to --max-audio-delay seconds after that
+(the patient is still granting mic permission, or joins a bit late).
+Building the session costs --setup seconds. The greeting is in the TTS
+phrase cache, as it is once the process is prewarmed, and a fake assistant
+reports first audio when the first greeting frame comes out of
+SentenceStreamingTTS.
+
+"sequential" is the old entrypoint: connect, set up, sleep(1), greet.
+"bootstrap" connects while the session is set up and greets once the
+participant's audio is subscribed. "early" counts greetings that started
+before the participant's audio was subscribed, which the patient may not
+hear.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_bootstrap
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+from livekit import rtc
+
+from benchmarks.bench_speech_stream import FakeTTS
+from bootstrap import SessionBootstrap
+from speech_stream import SentenceStreamingTTS
+from tts_cache import TTSCache
+
+GREETING = "Hi Patient, i am Philip. What's bring you today here?"
+
+
+class FakeRoom(rtc.EventEmitter):
+    def __init__(self):
+        super().__init__()
+        self.name = "bench"
+        self.remote_participants = {}
+        self.audio_at: float | None = None
+
+    def subscribe_audio(self) -> None:
+        track = SimpleNamespace(kind=rtc.TrackKind.KIND_AUDIO)
+        publication = SimpleNamespace(kind=rtc.TrackKind.KIND_AUDIO, track=track)
+        participant = SimpleNamespace(track_publications={"mic": publication})
+        self.remote_participants["patient"] = participant
+        self.audio_at = time.perf_counter()
+        self.emit("track_subscribed", track, publication, participant)
+
+
+class FakeJobContext:
+    def __init__(self, connect: float, audio_delay: float):
+        self.room = FakeRoom()
+        self._connect = connect
+        self._audio_delay = audio_delay
+
+    async def connect(self, *, auto_subscribe=None) -> None:
+        await asyncio.sleep(self._connect)
+        asyncio.get_running_loop().call_later(self._audio_delay, self.room.subscribe_audio)
+
+
+class FakeAssistant(rtc.EventEmitter):
+    def __init__(self, engine: SentenceStreamingTTS):
+        super().__init__()
+        self._engine = engine
+        self.first_audio_at: float | None = None
+
+    async def say(self, text: str) -> None:
+        stream = self._engine.stream()
+        stream.push_text(text)
+        stream.end_input()
+        async for _ in stream:
+            if self.first_audio_at is None:
+                self.first_audio_at = time.perf_counter()
+                self.emit("agent_started_speaking")
+        await stream.aclose()
+
+
+async def sequential(ctx: FakeJobContext, engine: SentenceStreamingTTS, args) -> FakeAssistant:
+    await ctx.connect()
+    await asyncio.sleep(args.setup)
+    assistant = FakeAssistant(engine)
+    await asyncio.sleep(1)
+    await assistant.say(GREETING)
+    return assistant
+
+
+async def bootstrapped(ctx: FakeJobContext, engine: SentenceStreamingTTS, args) -> FakeAssistant:
+    bootstrap = SessionBootstrap(ctx)
+    bootstrap.start(auto_subscribe=None, tts=engine, greeting=GREETING)
+    await asyncio.sleep(args.setup)
+    assistant = FakeAssistant(engine)
+    await bootstrap.ready()
+    bootstrap.watch_first_audio(assistant)
+    await bootstrap.wait_for_participant_audio(timeout=10)
+    await assistant.say(GREETING)
+    return assistant
+
+
+async def main_async(args):
+    engine_tts = FakeTTS(0.25, 0.0)
+    cache = TTSCache(tempfile.mkdtemp(), model="aura-stella-en")
+    engine = SentenceStreamingTTS(engine_tts, cache=cache)
+    chunks = engine.segmenter().split(GREETING)
+    cache.register(chunks)
+    for chunk in chunks:
+        cache.put(chunk, [rtc.AudioFrame.create(24000, 1, 2400) for _ in range(20)])
+
+    rng = random.Random(args.seed)
+    delays = [rng.uniform(0, args.max_audio_delay) for _ in range(args.trials)]
+    print(f"{args.trials} jobs, connect {args.connect * 1000:.0f} ms, setup {args.setup * 1000:.0f} ms, "
+          f"mic subscribed 0-{args.max_audio_delay * 1000:.0f} ms after connect")
+    print(f"{'':<12}{'p50':>10}{'p95':>10}{'early':>8}   (job assignment to first greeting audio)")
+    for name, flow in (("sequential", sequential), ("bootstrap", bootstrapped)):
+        latencies, early = [], 0
+        for delay in delays:
+            ctx = FakeJobContext(args.connect, delay)
+            start = time.perf_counter()
+            assistant = await flow(ctx, engine, args)
+            latencies.append(assistant.first_audio_at - start)
+            early += ctx.room.audio_at is None or assistant.first_audio_at < ctx.room.audio_at
+            await asyncio.sleep(max(0.0, args.max_audio_delay - delay))
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{name:<12}{statistics.median(latencies) * 1000:>7.0f} ms{p95 * 1000:>7.0f} ms{early:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--connect", type=float, default=0.3)
+    parser.add_argument("--setup", type=float, default=0.05)
+    parser.add_argument("--max-audio-delay", type=float, default=1.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Many sessions logging into one process: the streaming ConversationLogger vs the old list.
+
+--sessions sessions on one event loop each log --messages messages of
+about 200 characters as fast as they can, yielding to the loop between
+messages like event handlers do, then close. "before" is the
+ConversationLogger that save_convo.py had: every message kept in a list
+and the whole conversation written at disconnect, synchronously on the
+loop. "no logging" is the floor: the sessions alone, logging nothing.
+Reported: messages per second through the loop, the longest the loop went
+without running a tick (a synchronous write shows up here), and dropped
+messages, from one pass; the peak memory held for the logs from a second
+pass under tracemalloc, which slows every allocation enough to swamp the
+stalls if both are measured at once.
+
+The streaming logger is not a straight win on stalls. Nothing it does on
+the loop takes more than a fraction of a millisecond, but its writer
+threads compete with the loop for the GIL, and on a single core for the
+CPU too. On one core it stalls 14-20 ms, against a floor of 4-8 ms. The
+"before" loggers all close within a few loop iterations, because the
+sessions run in lockstep, and their writes add up. How many land in one
+iteration changes from run to run, so "before" measured anywhere from
+13 ms to 125 ms here. In its best run it stalled 7 ms less than the
+streaming logger. Throughput is about the same for both.
+The streaming logger holds a third of the memory.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_conversation_log
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from testing.conversation_log import ConversationLogger
+
+CONTENT = "The patient describes a dull ache behind the left knee, worse after stairs, since last week. " * 2
+
+
+class LegacyConversationLogger:
+    def __init__(self, path: str):
+        self.path = path
+        self.conversation = []
+        self.start_time = datetime.now()
+
+    def add_message(self, role: str, content: str):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.conversation.append({"timestamp": timestamp, "role": role, "content": content})
+
+    async def aclose(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(f"\n{'='*50}\n")
+            f.write(f"Conversation Start: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"Conversation End: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"{'='*50}\n\n")
+            for msg in self.conversation:
+                f.write(f"[{msg['timestamp']}] {msg['role'].upper()}: {msg['content']}\n")
+            f.write(f"\n{'='*50}\n\n")
+
+
+async def session(make_logger, index: int, messages: int):
+    conversation_logger = make_logger(index)
+    for i in range(messages):
+        conversation_logger.add_message("user" if i % 2 == 0 else "assistant", CONTENT)
+        await asyncio.sleep(0)
+    await conversation_logger.aclose()
+    return getattr(conversation_logger, "dropped", 0)
+
+
+class NullLogger:
+    def add_message(self, role: str, content: str):
+        pass
+
+    async def aclose(self):
+        pass
+
+
+async def run(make_logger, args) -> tuple[float, float, int]:
+    stalls = []
+
+    async def ticker():
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stalls.append(now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    dropped = await asyncio.gather(*(session(make_logger, i, args.messages) for i in range(args.sessions)))
+    elapsed = time.perf_counter() - start
+    tick.cancel()
+    return args.sessions * args.messages / elapsed, max(stalls, default=0.0), sum(dropped)
+
+
+async def peak_memory(make_logger, args) -> int:
+    tracemalloc.start()
+    await asyncio.gather(*(session(make_logger, i, args.messages) for i in range(args.sessions)))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "convo.txt")
+        loggers = [
+            ("no logging", lambda i: NullLogger()),
+            ("before (list, write at end)", lambda i: LegacyConversationLogger(path)),
+            ("streaming ConversationLogger", lambda i: ConversationLogger(path, session_id=f"room-{i}")),
+        ]
+        rows = [
+            (name, asyncio.run(run(make_logger, args)), asyncio.run(peak_memory(make_logger, args)))
+            for name, make_logger in loggers
+        ]
+
+    print(f"{args.sessions} sessions x {args.messages} messages")
+    print(f"{'':<30}{'msgs/s':>10}{'peak mem':>12}{'max stall':>12}{'dropped':>9}")
+    for name, (rate, stall, dropped), peak in rows:
+        print(f"{name:<30}{rate:>10.0f}{peak / 2**20:>9.1f} MB{stall * 1000:>9.1f} ms{dropped:>9}")
+
+
+if __name__ == "__main__":
+    main()
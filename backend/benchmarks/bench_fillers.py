@@ -0,0 +1,116 @@
+"""Dead air and answer delay around tool calls of varying latency, with different filler policies.
+
+A fake agent models `say()`: the filler's first audio arrives after a fixed
+TTS latency and then plays for a fixed duration. The answer to the tool
+call can only start once the tool has returned and any filler that is
+playing has finished. "always" is what the testing/ tools did before (await
+the filler, then run the tool); "never" skips fillers; "scheduled" is
+run_with_filler, which starts the tool right away and only says a filler
+when the tool is slower than the threshold; "cached" is run_with_filler
+with the filler pre-synthesized at prewarm and played from the TTS cache,
+so its first audio takes a cache read instead of a TTS round trip.
+
+Dead air is the silence between the tool call and the first sound, whether
+filler or answer. Answer delay is when the answer can start playing.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_fillers
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from testing.fillers import run_with_filler
+
+FILLERS = ["Let me check that for you."]
+
+
+class FakeSpeech:
+    def __init__(self, tts_latency: float, duration: float):
+        self.allow_interruptions = True
+        self.synthesis_handle = SimpleNamespace(tts_forwarder=SimpleNamespace(played_text=""))
+        self.interrupted = False
+        self.started_at: float | None = None
+        self.ends_at: float | None = None
+        self._task = asyncio.create_task(self._play(tts_latency, duration))
+
+    async def _play(self, tts_latency: float, duration: float) -> None:
+        await asyncio.sleep(tts_latency)
+        self.started_at = time.perf_counter()
+        self.ends_at = self.started_at + duration
+        self.synthesis_handle.tts_forwarder.played_text = FILLERS[0]
+
+    def interrupt(self) -> None:
+        self.interrupted = True
+        self._task.cancel()
+
+
+class FakeAgent:
+    def __init__(self, args, filler_latency: float):
+        self._args = args
+        self._filler_latency = filler_latency
+        self.speeches: list[FakeSpeech] = []
+
+    async def say(self, message: str, add_to_chat_ctx: bool = False) -> FakeSpeech:
+        speech = FakeSpeech(self._filler_latency, self._args.filler_duration)
+        self.speeches.append(speech)
+        return speech
+
+
+async def tool(latency: float) -> str:
+    await asyncio.sleep(latency)
+    return "done"
+
+
+async def run_call(policy: str, latency: float, args) -> tuple[float, float, int]:
+    agent = FakeAgent(args, args.cache_latency if policy == "cached" else args.tts_latency)
+    start = time.perf_counter()
+    if policy == "always":
+        await agent.say(FILLERS[0], add_to_chat_ctx=True)
+        await tool(latency)
+    elif policy == "never":
+        await tool(latency)
+    else:
+        await run_with_filler(agent, tool(latency), FILLERS, threshold=args.threshold)
+    returned = time.perf_counter()
+    # let a filler that is still synthesizing either start or be cancelled
+    await asyncio.sleep(args.tts_latency + 0.01)
+
+    answer_at = returned + args.tts_latency
+    played = [s for s in agent.speeches if s.started_at is not None and not s.interrupted]
+    for speech in played:
+        answer_at = max(answer_at, speech.ends_at)
+    first_sound = min([answer_at] + [s.started_at for s in played])
+    return first_sound - start, answer_at - start, len(played)
+
+
+async def main_async(args):
+    latencies = [float(x) for x in args.latencies.split(",")]
+    policies = ["never", "always", "scheduled", "cached"]
+    print(f"threshold {args.threshold * 1000:.0f} ms, filler TTS {args.tts_latency * 1000:.0f} ms, "
+          f"cached filler {args.cache_latency * 1000:.0f} ms, filler audio {args.filler_duration * 1000:.0f} ms")
+    print(f"{'tool':>8}  " + "".join(f"{p:>28}" for p in policies))
+    print(f"{'':>8}  " + "".join(f"{'dead air / answer / fillers':>28}" for _ in policies))
+    for latency in latencies:
+        row = f"{latency * 1000:>5.0f} ms  "
+        for policy in policies:
+            dead_air, answer, fillers = await run_call(policy, latency, args)
+            row += f"{dead_air * 1000:>9.0f} /{answer * 1000:>7.0f} /{fillers:>8}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latencies", default="0.05,0.2,0.5,0.8,1.5,4")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--tts-latency", type=float, default=0.25)
+    parser.add_argument("--cache-latency", type=float, default=0.005)
+    parser.add_argument("--filler-duration", type=float, default=1.6)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Per-frame cost of FrameRing scoring (Laplacian variance + motion) and best-frame lookup.
+
+Scoring runs on the event loop for every sampled frame, so the figure that
+matters is how many concurrent sessions one core can score at the sampler
+rate.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_frame_ring
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+from livekit import rtc
+
+from frame_ring import FrameRing
+
+
+def noisy_frames(width: int, height: int, count: int) -> list[rtc.VideoFrame]:
+    rng = np.random.default_rng(0)
+    size = width * height * 3 // 2
+    return [
+        rtc.VideoFrame(width, height, rtc.VideoBufferType.I420, rng.integers(0, 256, size, dtype=np.uint8).tobytes())
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--sample-fps", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'resolution':<12}{'push us':>10}{'p95 us':>10}{'best us':>10}{'sessions/core':>16}")
+    for width, height in ((512, 288), (640, 360), (1280, 720)):
+        frames = noisy_frames(width, height, 8)
+        ring = FrameRing()
+        push_timings, best_timings = [], []
+        for i in range(args.iterations):
+            now = i / args.sample_fps
+            start = time.perf_counter()
+            ring.push(frames[i % len(frames)], now=now)
+            push_timings.append((time.perf_counter() - start) * 1e6)
+            start = time.perf_counter()
+            ring.best(2.0, now=now)
+            best_timings.append((time.perf_counter() - start) * 1e6)
+
+        mean_push = statistics.mean(push_timings)
+        sessions = 1e6 / (mean_push * args.sample_fps)
+        print(
+            f"{f'{width}x{height}':<12}{mean_push:>10.0f}{statistics.quantiles(push_timings, n=20)[-1]:>10.0f}"
+            f"{statistics.mean(best_timings):>10.1f}{sessions:>16.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
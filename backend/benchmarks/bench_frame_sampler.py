@@ -0,0 +1,91 @@
+"""CPU per session of the video loop: bare `latest_image = event.frame` vs FrameSampler.
+
+A synthetic 30 fps 1280x720 I420 feed is replayed on virtual time, copying
+each frame out of a shared buffer the way rtc.VideoStream copies it out of
+the FFI buffer, so the numbers reflect what one session costs on a worker
+without needing a live room.
+
+"sampler" feeds a plain VideoStream into FrameSampler: every frame is
+still copied, and the sampled ones are also downscaled, so it costs
+slightly more CPU than the bare loop (it retains and encodes much less).
+"sampled stream" is SampledVideoStream, which asks the sampler before
+copying and releases frames that are not due uncopied.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_frame_sampler
+"""
+import argparse
+import asyncio
+import time
+
+from livekit import rtc
+from livekit.agents.utils import images
+
+from frame_sampler import FrameSampler
+
+WIDTH, HEIGHT, SOURCE_FPS = 1280, 720, 30
+
+
+async def synthetic_feed(seconds: float, sampler: FrameSampler | None = None):
+    """Yield (timestamp, frame) pairs, copying a fresh buffer per frame.
+
+    With `sampler`, frames it does not want are skipped before the copy, as
+    SampledVideoStream does.
+    """
+    template = bytes(range(256)) * (WIDTH * HEIGHT * 3 // 2 // 256 + 1)
+    template = template[:WIDTH * HEIGHT * 3 // 2]
+    for i in range(int(seconds * SOURCE_FPS)):
+        ts = i / SOURCE_FPS
+        if sampler is not None and not sampler.due(ts):
+            continue
+        frame = rtc.VideoFrame(WIDTH, HEIGHT, rtc.VideoBufferType.I420, bytearray(template))
+        yield ts, frame
+
+
+def encode_ms(frame: rtc.VideoFrame) -> float:
+    """Time to JPEG-encode the frame a vision turn would pick up."""
+    start = time.perf_counter()
+    images.encode(frame, images.EncodeOptions(format="JPEG"))
+    return (time.perf_counter() - start) * 1000
+
+
+async def run_current_loop(seconds: float) -> tuple[float, int, float]:
+    latest_image = None
+    start = time.process_time()
+    async for _, frame in synthetic_feed(seconds):
+        latest_image = frame
+    cpu = time.process_time() - start
+    return cpu, len(latest_image.data), encode_ms(latest_image)
+
+
+async def run_sampler(seconds: float, fps: float, skip_copy: bool) -> tuple[float, int, float]:
+    sampler = FrameSampler(target_fps=fps)
+    start = time.process_time()
+    async for ts, frame in synthetic_feed(seconds, sampler if skip_copy else None):
+        sampler.push(frame, now=ts)
+    cpu = time.process_time() - start
+    retained = sum(len(f.data) for f in sampler._queue)
+    return cpu, retained, encode_ms(sampler.latest)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=60.0, help="simulated session length")
+    args = parser.parse_args()
+
+    print(f"{WIDTH}x{HEIGHT} @ {SOURCE_FPS} fps, {args.seconds:.0f}s per session")
+    print(f"{'mode':<24}{'cpu s/session':>16}{'cpu %':>10}{'retained KiB':>16}{'encode ms':>12}")
+
+    encode_ms(rtc.VideoFrame(16, 16, rtc.VideoBufferType.I420, bytearray(384)))  # warm up Pillow
+    results = [("current loop", await run_current_loop(args.seconds))]
+    for fps in (1, 2, 5):
+        results.append((f"sampler {fps} fps", await run_sampler(args.seconds, fps, skip_copy=False)))
+    for fps in (1, 2, 5):
+        results.append((f"sampled stream {fps} fps", await run_sampler(args.seconds, fps, skip_copy=True)))
+    for name, (cpu, retained, encode) in results:
+        print(f"{name:<24}{cpu:>16.3f}{100 * cpu / args.seconds:>10.2f}{retained / 1024:>16.0f}{encode:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
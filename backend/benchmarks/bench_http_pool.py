@@ -0,0 +1,137 @@
+"""Request latency and handshakes for provider calls, client per call vs the shared HttpPool.
+
+A local HTTPS server (self-signed certificate made with the openssl CLI)
+sits behind a proxy that delays every packet by --rtt / 2 in each
+direction, so a new connection pays a real TCP + TLS handshake at that
+round-trip time. A session makes --requests calls with --gap seconds
+between them, like tool calls and LLM turns spread over a conversation.
+
+"client per call" opens a fresh client for every request. This is what
+SendGridAPIClient and the per-call aiohttp sessions did. "HttpPool" shares
+one pooled client. "HttpPool + keep_warm" also opens the connection at
+session start, so the first request is reused too.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_http_pool
+"""
+import argparse
+import asyncio
+import os
+import ssl
+import statistics
+import subprocess
+import tempfile
+import time
+
+from aiohttp import web
+
+from http_pool import HttpPool
+
+
+def make_certificate(directory: str) -> tuple[str, str]:
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+         "-keyout", key, "-out", cert],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+async def start_server(cert: str, key: str) -> tuple[web.AppRunner, int]:
+    async def mail_send(request: web.Request) -> web.Response:
+        await request.read()
+        return web.Response(status=202)
+
+    app = web.Application()
+    app.router.add_post("/v3/mail/send", mail_send)
+    app.router.add_route("HEAD", "/", lambda request: web.Response())
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=context)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+async def start_delay_proxy(target_port: int, one_way: float) -> asyncio.base_events.Server:
+    async def pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while data := await reader.read(65536):
+                await asyncio.sleep(one_way)
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle(client_reader, client_writer):
+        # the TCP handshake to the proxy is local, so charge its round trip here
+        await asyncio.sleep(2 * one_way)
+        server_reader, server_writer = await asyncio.open_connection("127.0.0.1", target_port)
+        await asyncio.gather(pipe(client_reader, server_writer), pipe(server_reader, client_writer))
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+async def session(url: str, verify: ssl.SSLContext, mode: str, args) -> tuple[list[float], int, int]:
+    pools = [HttpPool(verify=verify)]
+    if mode == "HttpPool + keep_warm":
+        await pools[0].warm(url.rsplit("/v3", 1)[0] + "/")
+    latencies = []
+    for _ in range(args.requests):
+        if mode == "client per call":
+            pools.append(HttpPool(verify=verify))
+        pool = pools[-1]
+        start = time.perf_counter()
+        response = await pool.client(url).post(url, json={"personalizations": []})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 202
+        if mode == "client per call":
+            await pool.aclose()
+        await asyncio.sleep(args.gap)
+    connections = sum(s.connections for p in pools for s in p.stats().values())
+    handshakes = sum(s.tls_handshakes for p in pools for s in p.stats().values())
+    for pool in pools:
+        await pool.aclose()
+    return latencies, connections, handshakes
+
+
+async def main_async(args):
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = make_certificate(directory)
+        runner, port = await start_server(cert, key)
+        proxy = await start_delay_proxy(port, args.rtt / 2)
+        proxy_port = proxy.sockets[0].getsockname()[1]
+        url = f"https://localhost:{proxy_port}/v3/mail/send"
+        verify = ssl.create_default_context(cafile=cert)
+
+        print(f"{args.requests} requests, {args.rtt * 1000:.0f} ms RTT, {args.gap * 1000:.0f} ms between requests")
+        print(f"{'':<24}{'first':>10}{'mean':>10}{'conns':>8}{'TLS':>6}")
+        for mode in ("client per call", "HttpPool", "HttpPool + keep_warm"):
+            latencies, connections, handshakes = await session(url, verify, mode, args)
+            print(
+                f"{mode:<24}{latencies[0] * 1000:>7.0f} ms{statistics.mean(latencies) * 1000:>7.0f} ms"
+                f"{connections:>8}{handshakes:>6}"
+            )
+
+        proxy.close()
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--rtt", type=float, default=0.06)
+    parser.add_argument("--gap", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Prompt tokens, request size and resident memory per turn, with and without image retention.
+
+Simulates a 30-turn consultation where the patient shares 5 camera frames.
+Each turn's request is built with the OpenAI plugin's own message builder, so
+the request size is what goes over the wire to Azure. Prompt tokens are
+estimated as chars/4 for text plus OpenAI's tile formula for images.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_image_retention
+"""
+import argparse
+import json
+import math
+import tracemalloc
+
+from livekit.agents.llm import ChatContext, ChatImage, ChatMessage
+from livekit.plugins.openai.llm import _build_oai_context
+
+from benchmarks.bench_vision_cache import synthetic_frame
+from image_retention import apply_image_retention
+from vision_cache import DEFAULT_PROFILES, encode_frame
+
+SYSTEM_PROMPT = "You are Philip, a professional healthcare assistant at the Clinic. " * 90
+IMAGE_TURNS = {4, 9, 14, 19, 24}
+IMAGE_SIZE = (640, 360)
+
+
+def image_tokens(width: int, height: int) -> int:
+    """OpenAI high-detail image cost: 85 base + 170 per 512px tile."""
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def prompt_tokens(messages: list[dict]) -> int:
+    tokens = 0
+    for msg in messages:
+        content = msg.get("content")
+        if isinstance(content, str):
+            tokens += len(content) // 4
+        elif isinstance(content, list):
+            for part in content:
+                if part["type"] == "text":
+                    tokens += len(part["text"]) // 4
+                else:
+                    tokens += image_tokens(*IMAGE_SIZE)
+    return tokens
+
+
+def run_session(turns: int, keep_last: int | None) -> list[tuple[int, int, int]]:
+    frame = synthetic_frame(*IMAGE_SIZE)
+    profile = next(p for p in DEFAULT_PROFILES if p.name == "standard")
+    encode_frame(frame, profile)  # warm up Pillow outside the traced region
+
+    tracemalloc.start()
+    chat_ctx = ChatContext(messages=[ChatMessage(role="system", content=SYSTEM_PROMPT)])
+    baseline = tracemalloc.get_traced_memory()[0]
+    rows = []
+    for turn in range(turns):
+        content: list = [f"Turn {turn}: here is how the symptoms have changed since yesterday, " * 2]
+        if turn in IMAGE_TURNS:
+            content.append(ChatImage(image=encode_frame(frame, profile)))
+        chat_ctx.messages.append(ChatMessage(role="user", content=content))
+        if keep_last is not None:
+            apply_image_retention(chat_ctx, keep_last=keep_last)
+
+        messages = _build_oai_context(chat_ctx, cache_key=turn)
+        request_bytes = len(json.dumps(messages))
+        resident = tracemalloc.get_traced_memory()[0] - baseline
+        rows.append((prompt_tokens(messages), request_bytes, resident))
+
+        reply = "The area looks mildly inflamed with no sign of infection; keep it clean and dry. " * 3
+        chat_ctx.messages.append(ChatMessage(role="assistant", content=reply))
+    tracemalloc.stop()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--keep-last", type=int, default=1)
+    args = parser.parse_args()
+
+    before = run_session(args.turns, None)
+    after = run_session(args.turns, args.keep_last)
+
+    print(f"{'turn':>4} | {'tokens':>8}{'request KiB':>13}{'ctx KiB':>10} | {'tokens':>8}{'request KiB':>13}{'ctx KiB':>10}")
+    print(f"{'':>4} | {'all images inline':^31} | {f'last {args.keep_last} inline':^31}")
+    for turn, (b, a) in enumerate(zip(before, after), start=1):
+        if turn % 5 and turn != 1:
+            continue
+        print(
+            f"{turn:>4} | {b[0]:>8}{b[1] / 1024:>13.1f}{b[2] / 1024:>10.1f} | "
+            f"{a[0]:>8}{a[1] / 1024:>13.1f}{a[2] / 1024:>10.1f}"
+        )
+    print(
+        f"session totals: {sum(r[0] for r in before)} -> {sum(r[0] for r in after)} prompt tokens, "
+        f"{sum(r[1] for r in before) / 1024:.0f} -> {sum(r[1] for r in after) / 1024:.0f} KiB sent"
+    )
+
+
+if __name__ == "__main__":
+    main()
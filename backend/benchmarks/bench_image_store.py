@@ -0,0 +1,113 @@
+"""Event-loop cost and disk use of storing the frames a session looked at.
+
+A session of --turns vision turns is replayed, where the camera only moves
+every --repeat turns, so consecutive turns send the same vision cache
+payload (a 1024x768 JPEG data URL) the way a patient holding still does:
+
+- "inline": the JPEG and a thumbnail are written and fsynced on the event
+  loop for every turn, with no deduplication;
+- "image store": `ImageStore.put` hashes the payload, and the writer thread
+  writes each distinct frame once.
+
+Loop time is what a turn pays before its request can go out. For review,
+reading a thumbnail is compared with reading and downscaling the full
+image.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_image_store
+"""
+import argparse
+import asyncio
+import base64
+import io
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from livekit.agents.llm import ChatImage
+from PIL import Image
+
+from image_store import ImageStore, _write_atomic
+
+
+def make_payloads(count: int, seed: int = 5) -> list[str]:
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(count):
+        img = Image.effect_noise((1024, 768), rng.randint(20, 60)).convert("RGB")
+        img = Image.blend(img, Image.linear_gradient("L").resize((1024, 768)).convert("RGB"), 0.6)
+        buffer = io.BytesIO()
+        img.save(buffer, "JPEG", quality=80)
+        payloads.append("data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii"))
+    return payloads
+
+
+def inline(directory: str, store: ImageStore, turns: list[str]) -> list[float]:
+    times = []
+    for i, url in enumerate(turns):
+        start = time.perf_counter()
+        data = base64.b64decode(url.split(",", 1)[1])
+        _write_atomic(os.path.join(directory, f"frame_{i}.thumb.jpg"), store._make_thumbnail(data))
+        _write_atomic(os.path.join(directory, f"frame_{i}.jpg"), data)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+async def stored(store: ImageStore, turns: list[str]) -> list[float]:
+    times = []
+    for url in turns:
+        image = ChatImage(image=url)
+        start = time.perf_counter()
+        await store.put(image)
+        times.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+    await store.aflush()
+    return times
+
+
+def disk_usage(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=4, help="turns that send the same frame")
+    args = parser.parse_args()
+
+    payloads = make_payloads(-(-args.turns // args.repeat))
+    turns = [payloads[i // args.repeat] for i in range(args.turns)]
+    with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+        store = ImageStore(b)
+        inline_times = inline(a, store, turns)
+        store_times = asyncio.run(stored(store, turns))
+
+        print(f"{args.turns} vision turns, {len(payloads)} distinct frames")
+        print(f"{'':<14}{'loop mean':>11}{'loop max':>10}{'files':>7}{'on disk':>11}")
+        for name, times, directory in (("inline", inline_times, a), ("image store", store_times, b)):
+            files = sum(len(names) for _, _, names in os.walk(directory))
+            print(
+                f"{name:<14}{statistics.mean(times) * 1000:>8.2f} ms{max(times) * 1000:>7.2f} ms"
+                f"{files:>7}{disk_usage(directory) / 2**20:>8.1f} MB"
+            )
+        print(f"written {store.written}, deduplicated {store.deduplicated}")
+
+        digests = list(store.digests())
+        start = time.perf_counter()
+        for digest in digests:
+            store.thumbnail(digest)
+        thumbs = (time.perf_counter() - start) / len(digests)
+        start = time.perf_counter()
+        for digest in digests:
+            with Image.open(io.BytesIO(store.get(digest))) as img:
+                img.thumbnail((256, 256))
+        full = (time.perf_counter() - start) / len(digests)
+        print(f"\nreview: thumbnail {thumbs * 1000:.2f} ms per image, full image downscaled {full * 1000:.2f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
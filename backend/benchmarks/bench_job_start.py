@@ -0,0 +1,83 @@
+"""Job-start latency with and without the per-process prewarm.
+
+Every run starts a fresh interpreter, the way the worker starts a job
+process, and imports the agent's dependencies. Then it times the job-start
+path: from the job being assigned until the session's VAD, LLM, STT and
+TTS exist. "cold" loads the process resources inside the job, which is
+what the entrypoints did before. "prewarmed" loads them before the job,
+as prewarm_process does, so the job only borrows them. Nothing touches the
+network. The TTS cache has no phrases, so only its directory scan is
+counted. Dummy credentials are set if none are configured.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_job_start
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+
+def _job(prewarmed: bool, cache_dir: str, queue) -> None:
+    os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+    os.environ.setdefault("AZURE_OPENAI_API_KEY", "bench")
+    os.environ.setdefault("DEEPGRAM_API_KEY", "bench")
+    os.environ["TTS_CACHE_DIR"] = cache_dir
+
+    from livekit.plugins import deepgram
+
+    from process_resources import ProcessResources
+    from request_builder import PrefixCachedLLM
+    from speech_stream import SentenceStreamingTTS, SpeechSegmenter
+
+    def load():
+        return ProcessResources.load(tts_model="aura-stella-en", cached_phrases=[], segmenter=SpeechSegmenter())
+
+    resources = load() if prewarmed else None
+    start = time.perf_counter()
+    if resources is None:
+        resources = load()
+    session = (
+        resources.vad,
+        PrefixCachedLLM(model="gpt-4", client=resources.azure_client),
+        deepgram.STT(),
+        SentenceStreamingTTS(deepgram.TTS(model="aura-stella-en"), cache=resources.tts_cache),
+    )
+    queue.put((time.perf_counter() - start, resources.load_times))
+    del session
+
+
+def run(prewarmed: bool, runs: int) -> tuple[list[float], dict[str, float]]:
+    ctx = multiprocessing.get_context("spawn")
+    samples, load_times = [], {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for _ in range(runs):
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_job, args=(prewarmed, cache_dir, queue))
+            proc.start()
+            elapsed, load_times = queue.get()
+            proc.join()
+            samples.append(elapsed)
+    return samples, load_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'':<12}{'median':>10}{'min':>10}{'max':>10}   (job start, {args.runs} fresh processes)")
+    for name, prewarmed in (("cold", False), ("prewarmed", True)):
+        samples, load_times = run(prewarmed, args.runs)
+        print(
+            f"{name:<12}{statistics.median(samples) * 1000:>7.1f} ms"
+            f"{min(samples) * 1000:>7.1f} ms{max(samples) * 1000:>7.1f} ms"
+        )
+    print("moved off the job path: " + ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in load_times.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Write amplification and disk bytes per session: JSON snapshots vs the conversation journal.
+
+A session of --messages messages (the system prompt, then alternating user
+and assistant turns of realistic length) is recorded three ways:
+
+- "snapshots": after every message, the whole chat context is written as a
+  new conversation_YYYYMMDD_HHMMSS.json document (indent=2), which is how
+  the files in conversations/ were produced;
+- "journal": ConversationJournal, one JSONL line per message;
+- "journal, archived": the same journal after `compact` compressed it
+  into the archive.
+
+Write amplification is bytes written to disk over the bytes of the
+conversation itself (the final journal's size). The time per `append`
+is what the event loop pays.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_journal
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from conversation_journal import ARCHIVE_DIR, ConversationJournal, compact, read_journal
+
+SYSTEM_PROMPT = "You are Philip, a professional healthcare assistant at the Clinic. " * 40
+WORDS = "the patient reports itchy rash on forearm since tuesday mild pain no fever took antihistamine".split()
+
+
+def make_messages(count: int) -> list[tuple[str, str]]:
+    rng = random.Random(7)
+    messages = [("system", SYSTEM_PROMPT)]
+    for i in range(count - 1):
+        role = "user" if i % 2 == 0 else "assistant"
+        words = rng.randint(5, 25) if role == "user" else rng.randint(20, 60)
+        messages.append((role, " ".join(rng.choice(WORDS) for _ in range(words))))
+    return messages
+
+
+def snapshots(directory: str, messages: list[tuple[str, str]]) -> tuple[int, int]:
+    written = 0
+    history = []
+    for i, (role, content) in enumerate(messages):
+        history.append({"role": role, "content": content})
+        document = json.dumps({"timestamp": f"20250115_{215454 + i}", "messages": history}, indent=2)
+        path = os.path.join(directory, f"conversation_20250115_{215454 + i}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(document)
+            f.flush()
+            os.fsync(f.fileno())
+        written += len(document.encode("utf-8"))
+    on_disk = sum(entry.stat().st_size for entry in os.scandir(directory))
+    return written, on_disk
+
+
+def journal(directory: str, messages: list[tuple[str, str]], gap: float) -> tuple[int, int, int, float, int]:
+    j = ConversationJournal.create("bench-room", agent="bench", directory=directory)
+    appends = 0.0
+    for role, content in messages:
+        start = time.perf_counter()
+        j.append(role, content)
+        appends += time.perf_counter() - start
+        if gap:
+            time.sleep(gap)
+    j.close()
+    assert sum(1 for r in read_journal(j.path) if r["type"] == "message") == len(messages)
+    size = os.path.getsize(j.path)
+    compact(directory)
+    archived = os.path.getsize(os.path.join(directory, ARCHIVE_DIR, os.path.basename(j.path) + ".gz"))
+    return j.bytes_written, size, archived, appends / len(messages), j.fsyncs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=60)
+    parser.add_argument("--gap", type=float, default=0.01, help="seconds between messages")
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages)
+    with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+        snap_written, snap_disk = snapshots(a, messages)
+        written, size, archived, append, fsyncs = journal(b, messages, args.gap)
+
+    print(f"{args.messages} messages, conversation is {size / 1024:.1f} KB as JSONL")
+    print(f"{'':<20}{'written':>12}{'amplif.':>10}{'on disk':>12}{'fsyncs':>8}")
+    print(f"{'snapshots':<20}{snap_written / 1024:>9.1f} KB{snap_written / size:>9.1f}x{snap_disk / 1024:>9.1f} KB{len(messages):>8}")
+    print(f"{'journal':<20}{written / 1024:>9.1f} KB{written / size:>9.1f}x{size / 1024:>9.1f} KB{fsyncs:>8}")
+    print(f"{'journal, archived':<20}{'':>12}{'':>10}{archived / 1024:>9.1f} KB")
+    print(f"\nappend on the event loop: {append * 1e6:.1f} us per message")
+
+
+if __name__ == "__main__":
+    main()
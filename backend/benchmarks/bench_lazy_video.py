@@ -0,0 +1,122 @@
+"""First-vision-turn latency and decode load: always-on video vs LazyVideoSubscription.
+
+The room is faked: set_subscribed() answers with a `track_subscribed` event
+after --subscribe-rtt seconds and the first frame arrives --keyframe-delay
+seconds later, then frames flow at 30 fps. Those two network terms should be
+set from the "Video ready after ... ms" lines the agent logs in production;
+everything else (sampler, event handling, timers) is the real code path.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_lazy_video
+"""
+import argparse
+import asyncio
+import time
+
+from livekit import rtc
+
+from frame_sampler import FrameSampler
+from video_subscription import LazyVideoSubscription
+
+SOURCE_FPS = 30
+FRAME = rtc.VideoFrame(640, 360, rtc.VideoBufferType.I420, bytearray(640 * 360 * 3 // 2))
+
+
+class FakePublication:
+    kind = rtc.TrackKind.KIND_VIDEO
+    sid = "TR_fake_video"
+
+    def __init__(self, room: "FakeRoom", subscribe_rtt: float):
+        self._room = room
+        self._subscribe_rtt = subscribe_rtt
+        self.track = None
+
+    def set_subscribed(self, subscribed: bool):
+        loop = asyncio.get_running_loop()
+        if subscribed:
+            loop.call_later(self._subscribe_rtt, self._subscribed)
+        else:
+            self.track = None
+
+    def _subscribed(self):
+        self.track = object()
+        self._room.emit("track_subscribed", self.track, self, None)
+
+
+class FakeParticipant:
+    def __init__(self, publication: FakePublication):
+        self.track_publications = {publication.sid: publication}
+
+
+class FakeRoom(rtc.EventEmitter):
+    def __init__(self, subscribe_rtt: float):
+        super().__init__()
+        self.publication = FakePublication(self, subscribe_rtt)
+        self.remote_participants = {"PA_patient": FakeParticipant(self.publication)}
+
+
+def stream_factory(keyframe_delay: float, counter: list[int]):
+    async def frames(_track):
+        await asyncio.sleep(keyframe_delay)
+        while True:
+            counter[0] += 1
+            yield rtc.VideoFrameEvent(frame=FRAME, timestamp_us=0, rotation=0)
+            await asyncio.sleep(1 / SOURCE_FPS)
+
+    return frames
+
+
+async def measure(lazy: bool, args) -> tuple[float, int]:
+    counter = [0]
+    room = FakeRoom(args.subscribe_rtt)
+    sampler = FrameSampler(target_fps=2)
+    subscription = LazyVideoSubscription(
+        room,
+        sampler,
+        warm_window=args.warm_window,
+        stream_factory=stream_factory(args.keyframe_delay, counter),
+    )
+    if not lazy:
+        # always-on: the track was auto-subscribed at join and has been flowing
+        await subscription.acquire()
+        await asyncio.sleep(0.5)
+
+    start = time.perf_counter()
+    await subscription.acquire()
+    first_turn = time.perf_counter() - start
+
+    await asyncio.sleep(args.warm_window + 0.1)
+    subscription.release()
+    return first_turn, counter[0]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribe-rtt", type=float, default=0.15)
+    parser.add_argument("--keyframe-delay", type=float, default=0.10)
+    parser.add_argument("--warm-window", type=float, default=1.0)
+    parser.add_argument("--session-minutes", type=float, default=15.0)
+    parser.add_argument("--vision-turns", type=int, default=2)
+    parser.add_argument("--production-warm-window", type=float, default=30.0)
+    args = parser.parse_args()
+
+    print(f"subscribe rtt {args.subscribe_rtt * 1000:.0f} ms, keyframe delay {args.keyframe_delay * 1000:.0f} ms")
+    print(f"{'mode':<12}{'first vision turn ms':>22}{'frames decoded/session':>24}")
+    _, warm_frames = await measure(True, args)
+    per_warm_second = warm_frames / (args.warm_window + 0.1)
+    estimates = {
+        "always-on": args.session_minutes * 60 * SOURCE_FPS,
+        "lazy": args.vision_turns * args.production_warm_window * per_warm_second,
+    }
+    for name, lazy in (("always-on", False), ("lazy", True)):
+        first_turn, _ = await measure(lazy, args)
+        print(f"{name:<12}{first_turn * 1000:>22.1f}{estimates[name]:>24.0f}")
+    print(
+        f"(decode estimate: {args.session_minutes:.0f} min session, {args.vision_turns} vision turns, "
+        f"{args.production_warm_window:.0f}s warm window)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+"""Per-call overhead of log_function_call on the event loop thread.
+
+Wraps a no-op async tool that takes a 5 KB email body and returns a dict.
+"before" is the decorator the entrypoints had before this change: eight
+INFO records with full f-string reprs, going through a synchronous
+FileHandler, the way setup_logging configured the root logger. The other
+rows use app_logging.log_function_call with the queue-based handlers from
+setup_logging. Time is what the caller spends per call, so file I/O done
+on the listener thread is not counted.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_log_function_call
+"""
+import argparse
+import asyncio
+import contextlib
+import logging
+import logging.handlers
+import os
+import tempfile
+import time
+from functools import wraps
+
+import app_logging
+
+BODY = "Dear Dr. Smith, " + "the patient reports an itchy rash on the forearm. " * 100
+
+
+def legacy_log_function_call(logger: logging.Logger):
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            func_name = func.__name__
+            logger.info(f"{'='*50}")
+            logger.info(f"ENTERING FUNCTION: {func_name}")
+            logger.info(f"Arguments: {args[1:] if len(args) > 1 else 'No positional args'}")
+            logger.info(f"Keyword Arguments: {kwargs if kwargs else 'No keyword args'}")
+            try:
+                result = await func(*args, **kwargs)
+                logger.info(f"FUNCTION {func_name} completed successfully")
+                logger.info(f"Return value: {result}")
+                return result
+            except Exception as e:
+                logger.error(f"ERROR in function {func_name}: {str(e)}", exc_info=True)
+                raise
+            finally:
+                logger.info(f"EXITING FUNCTION: {func_name}")
+                logger.info(f"{'='*50}")
+        return wrapper
+    return decorator
+
+
+async def send_email(self, to_email: str, subject: str, body_content: str) -> dict:
+    return {"status": "success", "message": f"Email sent successfully to {to_email}", "body": body_content}
+
+
+def configure(directory: str, queued: bool) -> None:
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    if queued:
+        # the console handler writes to devnull (left open for the listener
+        # thread) so the output stays readable
+        with contextlib.redirect_stderr(open(os.devnull, "w")):
+            app_logging.setup_logging(directory)
+    else:
+        handler = logging.FileHandler(os.path.join(directory, "legacy.log"))
+        handler.setFormatter(logging.Formatter(app_logging.LOG_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG)
+
+
+async def per_call(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        await fn(None, "patient@example.com", subject="Your appointment", body_content=BODY)
+    return (time.perf_counter() - start) / calls
+
+
+async def main_async(args):
+    logger_name = send_email.__module__
+    logger = logging.getLogger(logger_name)
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        configure(directory, queued=False)
+        rows.append(("before (8 records, sync file)", await per_call(legacy_log_function_call(logger)(send_email), args.calls)))
+
+        configure(directory, queued=True)
+        wrapped = app_logging.log_function_call(send_email)
+        rows.append(("after, INFO enabled", await per_call(wrapped, args.calls)))
+        app_logging.set_sample_rate(logger_name, 0.1)
+        rows.append(("after, 10% sampled", await per_call(wrapped, args.calls)))
+        app_logging.set_sample_rate(logger_name, 1.0)
+        logger.setLevel(logging.WARNING)
+        rows.append(("after, INFO disabled", await per_call(wrapped, args.calls)))
+        rows.append(("no decorator", await per_call(send_email, args.calls)))
+
+    print(f"{'':<32}{'per call':>12}")
+    for name, seconds in rows:
+        print(f"{name:<32}{seconds * 1e6:>9.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Overhead of the loop health monitor, and how fast it catches a blocking call.
+
+Overhead: the loop runs --callbacks short callbacks (call_soon chains,
+like audio frame and VAD handlers) with and without a LoopMonitor, and the
+wall time per callback is compared.
+
+Detection: a coroutine blocks the loop with time.sleep(--block), the way a
+synchronous SDK call (sg.send) does. The report is the time from the start
+of the blocking call to the watchdog's warning, and whether the logged
+stack points at the blocking line.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_loop_health
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+import loop_health
+
+
+async def _callbacks(count: int) -> float:
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    remaining = [count]
+
+    def step():
+        remaining[0] -= 1
+        if remaining[0]:
+            loop.call_soon(step)
+        else:
+            done.set_result(None)
+
+    start = time.perf_counter()
+    loop.call_soon(step)
+    await done
+    return (time.perf_counter() - start) / count
+
+
+def run_callbacks(count: int, monitored: bool) -> float:
+    async def main():
+        # a session's loop always has timers pending, which makes every loop
+        # iteration check the clock; the probe's sleep would add that otherwise
+        asyncio.get_running_loop().call_later(3600, lambda: None)
+        monitor = loop_health.watch_loop("bench") if monitored else None
+        seconds = await _callbacks(count)
+        if monitor is not None:
+            await monitor.aclose()
+        return seconds
+
+    return asyncio.run(main())
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records: list[tuple[float, str]] = []
+
+    def emit(self, record):
+        self.records.append((time.perf_counter(), record.getMessage()))
+
+
+def run_detection(block: float, threshold: float) -> tuple[float | None, bool, int]:
+    capture = _Capture()
+    logging.getLogger("loop-health").addHandler(capture)
+    logging.getLogger("loop-health").propagate = False
+
+    async def main():
+        monitor = loop_health.watch_loop("bench-room", threshold=threshold)
+        await asyncio.sleep(0.3)
+        start = time.perf_counter()
+        time.sleep(block)  # BLOCKING CALL
+        await asyncio.sleep(0.3)
+        await monitor.aclose()
+        return start, monitor.stalls
+
+    start, stalls = asyncio.run(main())
+    reports = [(t, msg) for t, msg in capture.records if "so far" in msg]
+    if not reports:
+        return None, False, stalls
+    t, msg = reports[0]
+    return t - start, "BLOCKING CALL" in msg and "bench-room" in msg, stalls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--callbacks", type=int, default=500_000)
+    parser.add_argument("--block", type=float, default=1.0)
+    parser.add_argument("--threshold", type=float, default=loop_health.SLOW_CALLBACK_THRESHOLD)
+    args = parser.parse_args()
+
+    plain = min(run_callbacks(args.callbacks, monitored=False) for _ in range(5))
+    monitored = min(run_callbacks(args.callbacks, monitored=True) for _ in range(5))
+    print(f"per callback, no monitor:   {plain * 1e9:.0f} ns")
+    print(f"per callback, LoopMonitor:  {monitored * 1e9:.0f} ns ({(monitored / plain - 1) * 100:+.1f}%)")
+
+    detected, stack_ok, stalls = run_detection(args.block, args.threshold)
+    if detected is None:
+        print(f"\n{args.block * 1000:.0f} ms blocking call: not detected")
+    else:
+        print(f"\n{args.block * 1000:.0f} ms blocking call, {args.threshold * 1000:.0f} ms threshold: "
+              f"reported after {detected * 1000:.0f} ms, stack and session in report: {stack_ok}, stalls counted: {stalls}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Cost of recording into the metrics registry, and of a scrape across job processes.
+
+Recording is timed on the paths the session handlers take: a histogram
+value looked up once and kept (TTFB, TTFT), a `labels()` lookup per event
+(tool calls), and a metric without labels (loop lag). For comparison,
+"threading.Lock + observe" is the same observation behind a lock, which
+is what a thread-safe client library pays per event.
+
+A scrape renders the worker's registry plus --jobs live job snapshots
+read from disk, each with every metric populated, after --exited job
+processes have come and gone. The first scrape folds the exited ones into
+the retired total; later scrapes only read the live files and that total.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_metrics
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+import agent_metrics
+from agent_metrics import LLM_TTFT, LOOP_LAG, REGISTRY, TOOL_CALLS, TTS_TTFB
+
+
+def per_call(fn, calls: int) -> float:
+    values = [random.random() for _ in range(calls)]
+    start = time.perf_counter()
+    for value in values:
+        fn(value)
+    return (time.perf_counter() - start) / calls
+
+
+def populate() -> None:
+    for agent in ("superagent", "voice"):
+        for metric in REGISTRY._metrics.values():
+            labels = {"agent": agent, "outcome": "ok", "kind": "prompt", "tool": "image"}
+            child = metric.labels(*(labels[name] for name in metric.labelnames))
+            (child.observe if metric.kind == "histogram" else child.inc)(random.random())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--jobs", type=int, default=16)
+    parser.add_argument("--exited", type=int, default=1000)
+    parser.add_argument("--scrapes", type=int, default=50)
+    args = parser.parse_args()
+
+    ttfb = TTS_TTFB.labels("voice")
+    lock = threading.Lock()
+    ttft = LLM_TTFT.labels("voice")
+
+    def locked(value):
+        with lock:
+            ttft.observe(value)
+
+    rows = [
+        ("histogram, kept value", per_call(ttfb.observe, args.calls)),
+        ("threading.Lock + observe", per_call(locked, args.calls)),
+        ("counter, labels() per event", per_call(lambda v: TOOL_CALLS.labels("voice", "image", "ok").inc(), args.calls)),
+        ("histogram, no labels", per_call(LOOP_LAG.observe, args.calls)),
+    ]
+    print(f"{'record':<32}{'per call':>12}")
+    for name, seconds in rows:
+        print(f"{name:<32}{seconds * 1e9:>9.0f} ns")
+
+    populate()
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = REGISTRY.snapshot()
+        for i in range(args.jobs + args.exited):
+            exited = i >= args.jobs
+            with open(os.path.join(directory, f"{os.getpid()}-{i}.json"), "w") as f:
+                json.dump({"pid": os.getpid(), "interval": 5.0, "exited": exited, "metrics": snapshot}, f)
+        snapshots = agent_metrics._SnapshotDirectory(directory)
+        start = time.perf_counter()
+        REGISTRY.render(snapshots.read())
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(args.scrapes):
+            body = REGISTRY.render(snapshots.read())
+        scrape = (time.perf_counter() - start) / args.scrapes
+        files = len(os.listdir(directory))
+    print(f"\nfirst scrape, folding {args.exited} exited jobs: {first * 1000:.1f} ms")
+    print(f"scrape, worker + {args.jobs} jobs: {scrape * 1000:.1f} ms, {len(body) / 1024:.0f} KB, {files} files left")
+
+
+if __name__ == "__main__":
+    main()
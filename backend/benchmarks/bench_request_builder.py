@@ -0,0 +1,87 @@
+"""Per-turn request serialization time and prompt prefix stability, plugin builder vs IncrementalRequestBuilder.
+
+Replays a consultation the way VoiceAssistant drives it: every turn copies
+the session ChatContext and serializes the copy. One turn carries a raw
+VideoFrame (the fallback path when the vision cache has nothing yet), which
+the plugin re-encodes on every later request because its image cache is
+keyed per stream. The "stable prefix" column is the number of leading bytes
+of the JSON request that match the previous turn's request, i.e. what a
+provider-side prompt cache can reuse.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_request_builder
+"""
+import argparse
+import json
+import os
+import time
+
+from livekit.agents.llm import ChatContext, ChatImage, ChatMessage
+from livekit.plugins.openai.llm import _build_oai_context
+
+from benchmarks.bench_vision_cache import synthetic_frame
+from request_builder import IncrementalRequestBuilder
+
+SYSTEM_PROMPT = "You are Philip, a professional healthcare assistant at the Clinic. " * 90
+IMAGE_TURN = 3
+
+
+def common_prefix(a: str, b: str) -> int:
+    return len(os.path.commonprefix([a, b]))
+
+
+def run_session(turns: int, incremental: bool) -> list[tuple[float, int, int]]:
+    frame = synthetic_frame(640, 360)
+    builder = IncrementalRequestBuilder()
+    chat_ctx = ChatContext(messages=[ChatMessage(role="system", content=SYSTEM_PROMPT)])
+    previous = ""
+    rows = []
+    for turn in range(turns):
+        content: list = [f"Turn {turn}: here is how the symptoms have changed since yesterday. " * 2]
+        if turn == IMAGE_TURN:
+            content.append(ChatImage(image=frame))
+        chat_ctx.messages.append(ChatMessage(role="user", content=content))
+
+        request_ctx = chat_ctx.copy()
+        start = time.perf_counter()
+        if incremental:
+            messages, _ = builder.build(request_ctx)
+        else:
+            messages = _build_oai_context(request_ctx, cache_key=object())
+        elapsed = (time.perf_counter() - start) * 1000
+
+        body = json.dumps(messages)
+        rows.append((elapsed, len(body), common_prefix(previous, body)))
+        previous = body
+
+        reply = "The area looks mildly inflamed with no sign of infection; keep it clean and dry. " * 3
+        chat_ctx.messages.append(ChatMessage(role="assistant", content=reply))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=30)
+    args = parser.parse_args()
+
+    run_session(IMAGE_TURN + 1, False)  # warm up Pillow
+    before = run_session(args.turns, False)
+    after = run_session(args.turns, True)
+
+    print(f"{'turn':>4} | {'ms':>7}{'request KiB':>13}{'stable KiB':>12} | {'ms':>7}{'request KiB':>13}{'stable KiB':>12}")
+    print(f"{'':>4} | {'plugin builder':^32} | {'incremental builder':^32}")
+    for turn, (b, a) in enumerate(zip(before, after), start=1):
+        if turn % 5 and turn not in (1, IMAGE_TURN + 1, IMAGE_TURN + 2):
+            continue
+        print(
+            f"{turn:>4} | {b[0]:>7.2f}{b[1] / 1024:>13.1f}{b[2] / 1024:>12.1f} | "
+            f"{a[0]:>7.2f}{a[1] / 1024:>13.1f}{a[2] / 1024:>12.1f}"
+        )
+    print(
+        f"session serialization: {sum(r[0] for r in before):.1f} ms -> {sum(r[0] for r in after):.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Time to first audio for a streamed reply under different segmentation policies.
+
+A fake LLM streams a reply word by word after a fixed time to first token.
+A fake streaming TTS behaves like Deepgram's websocket: it only synthesizes
+text when the stream is flushed, taking a fixed latency plus a per-character
+cost per flush. "whole reply" is what VoiceAssistant does with the bare
+TTS (one flush at the end); the other rows go through SentenceStreamingTTS.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_speech_stream
+"""
+import argparse
+import asyncio
+import time
+
+from livekit import rtc
+from livekit.agents import tts
+
+from speech_stream import SentenceStreamingTTS
+
+REPLY = (
+    "Okay, I understand, and I'm sorry to hear that you've been dealing with this rash. From what you describe, "
+    "it sounds like it could be contact dermatitis, which often happens after a change in soap "
+    "or detergent. Try switching back to your previous soap for a few days and keep the area "
+    "clean and dry. If the redness spreads, you develop a fever, or the itching keeps you up at "
+    "night, please book an appointment so a doctor can take a closer look."
+)
+
+
+class FakeTTS(tts.TTS):
+    def __init__(self, latency: float, per_char: float):
+        super().__init__(capabilities=tts.TTSCapabilities(streaming=True), sample_rate=24000, num_channels=1)
+        self.latency = latency
+        self.per_char = per_char
+
+    def synthesize(self, text, *, conn_options=None):
+        raise NotImplementedError
+
+    def stream(self, *, conn_options=None):
+        return FakeStream(tts=self)
+
+
+class FakeStream(tts.SynthesizeStream):
+    async def _run(self) -> None:
+        text = ""
+        async for data in self._input_ch:
+            if isinstance(data, self._FlushSentinel):
+                if text:
+                    await asyncio.sleep(self._tts.latency + self._tts.per_char * len(text))
+                    frame = rtc.AudioFrame.create(24000, 1, 240)
+                    self._event_ch.send_nowait(tts.SynthesizedAudio(frame=frame, request_id="fake", is_final=True))
+                text = ""
+                continue
+            text += data
+
+
+async def fake_llm(ttft: float, words_per_second: float):
+    await asyncio.sleep(ttft)
+    for word in REPLY.split(" "):
+        yield word + " "
+        await asyncio.sleep(1 / words_per_second)
+
+
+async def run_turn(engine: tts.TTS, args) -> tuple[float, int]:
+    start = time.perf_counter()
+    stream = engine.stream()
+
+    async def push():
+        async for token in fake_llm(args.ttft, args.words_per_second):
+            stream.push_text(token)
+        stream.end_input()
+
+    push_task = asyncio.create_task(push())
+    first_audio = None
+    async for _ in stream:
+        if first_audio is None:
+            first_audio = time.perf_counter() - start
+    await push_task
+    await stream.aclose()
+    return first_audio, getattr(stream, "segments", 1)
+
+
+async def main_async(args):
+    fake = FakeTTS(args.tts_latency, args.tts_per_char)
+    policies = [
+        ("whole reply", fake),
+        ("sentence, min 60", SentenceStreamingTTS(fake, min_chars=60)),
+        ("sentence, min 20", SentenceStreamingTTS(fake, min_chars=20)),
+        ("clause, min 40", SentenceStreamingTTS(fake, min_chars=40, clauses=True)),
+        ("clause, min 20", SentenceStreamingTTS(fake, min_chars=20, clauses=True)),
+        ("clause, min 0", SentenceStreamingTTS(fake, min_chars=0, clauses=True)),
+    ]
+    print(f"{'policy':<20}{'first audio':>14}{'TTS flushes':>13}")
+    for name, engine in policies:
+        first_audio, segments = await run_turn(engine, args)
+        print(f"{name:<20}{first_audio * 1000:>11.0f} ms{segments:>13}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ttft", type=float, default=0.5)
+    parser.add_argument("--words-per-second", type=float, default=30.0)
+    parser.add_argument("--tts-latency", type=float, default=0.2)
+    parser.add_argument("--tts-per-char", type=float, default=0.001)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
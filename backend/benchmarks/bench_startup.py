@@ -0,0 +1,69 @@
+"""Worker cold start: import time of the entrypoint modules, checked against a budget.
+
+Each module is imported in a fresh interpreter under `python -X importtime`,
+which is what a new worker process pays before `cli.run_app` can register
+with the server. The cumulative time of the module's own import is taken
+over --runs runs, and the median is compared with --budget-ms. The heaviest
+imports (by self time, from the median run) show where the time goes.
+Provider SDKs are imported in prewarm, in the job process, so they are not
+part of this number.
+
+Exits with status 1 if a module is over budget, so it can run in CI.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_startup
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = ["superagent", "voice"]
+BUDGET_MS = 1000.0
+
+
+def import_profile(module: str) -> list[tuple[str, int, int]]:
+    """(name, self us, cumulative us) for every import made by `import module`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    over = False
+    for module in MODULES:
+        profiles = [import_profile(module) for _ in range(args.runs)]
+        totals = [next(cum for name, _, cum in rows if name == module) / 1000 for rows in profiles]
+        median = statistics.median(totals)
+        status = "ok" if median <= args.budget_ms else "OVER BUDGET"
+        over |= median > args.budget_ms
+        print(f"{module}: {median:.0f} ms median import (min {min(totals):.0f}, max {max(totals):.0f}), "
+              f"budget {args.budget_ms:.0f} ms: {status}")
+
+        rows = profiles[totals.index(sorted(totals)[len(totals) // 2])]
+        for name, self_us, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+            print(f"    {self_us / 1000:>7.1f} ms  {name}")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
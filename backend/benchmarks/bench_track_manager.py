@@ -0,0 +1,142 @@
+"""Track-switch latency of VideoTrackManager against a fake rtc.Room.
+
+Replays the room events that used to leave get_video_track stuck or force a
+full rescan: a participant who turns the camera on after joining, a camera
+switch, the participant dropping off, and a second participant publishing
+video in the same room. For each scenario it reports which track ends up
+feeding the sampler and how long the switch took from the room event.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_track_manager
+"""
+import asyncio
+import time
+
+from livekit import rtc
+
+from frame_sampler import FrameSampler
+from track_manager import VideoTrackManager
+
+SOURCE_FPS = 30
+
+
+class FakeTrack:
+    kind = rtc.TrackKind.KIND_VIDEO
+
+    def __init__(self, sid: str):
+        self.sid = sid
+        self.frame = rtc.VideoFrame(64, 36, rtc.VideoBufferType.I420, bytearray(64 * 36 * 3 // 2))
+
+
+class FakePublication:
+    kind = rtc.TrackKind.KIND_VIDEO
+
+    def __init__(self, track: FakeTrack, source=rtc.TrackSource.SOURCE_CAMERA):
+        self.sid = f"PUB_{track.sid}"
+        self.source = source
+        self.track = track
+
+
+class FakeParticipant:
+    def __init__(self, identity: str):
+        self.identity = identity
+        self.track_publications: dict[str, FakePublication] = {}
+
+
+class FakeRoom(rtc.EventEmitter):
+    def __init__(self):
+        super().__init__()
+        self.remote_participants: dict[str, FakeParticipant] = {}
+
+    def join(self, identity: str) -> FakeParticipant:
+        participant = FakeParticipant(identity)
+        self.remote_participants[identity] = participant
+        return participant
+
+    def publish(self, participant: FakeParticipant, sid: str, source=rtc.TrackSource.SOURCE_CAMERA) -> FakeTrack:
+        track = FakeTrack(sid)
+        publication = FakePublication(track, source)
+        participant.track_publications[publication.sid] = publication
+        self.emit("track_subscribed", track, publication, participant)
+        return track
+
+    def unpublish(self, participant: FakeParticipant, track: FakeTrack):
+        publication = participant.track_publications.pop(f"PUB_{track.sid}")
+        self.emit("track_unsubscribed", track, publication, participant)
+
+    def leave(self, participant: FakeParticipant):
+        del self.remote_participants[participant.identity]
+        self.emit("participant_disconnected", participant)
+
+
+async def fake_stream(track: FakeTrack):
+    while True:
+        yield rtc.VideoFrameEvent(frame=track.frame, timestamp_us=0, rotation=0)
+        await asyncio.sleep(1 / SOURCE_FPS)
+
+
+async def wait_for_source(sampler: FrameSampler, track: FakeTrack | None, timeout: float = 1.0) -> float | None:
+    """Seconds until the sampler sees a frame of `track` (or stops receiving frames if None)."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if track is None:
+            seen = sampler.frames_seen
+            await asyncio.sleep(3 / SOURCE_FPS)
+            if sampler.frames_seen == seen:
+                return time.perf_counter() - start
+            continue
+        if sampler.latest is track.frame:
+            return time.perf_counter() - start
+        await asyncio.sleep(0.001)
+    return None
+
+
+async def main():
+    room = FakeRoom()
+    sampler = FrameSampler(target_fps=1000)
+    manager = VideoTrackManager(room, stream_factory=fake_stream)
+    streaming = asyncio.create_task(manager.stream_into(sampler))
+
+    patient = room.join("patient")
+    results = []
+
+    camera = room.publish(patient, "patient_camera")
+    results.append(("late camera", camera, await wait_for_source(sampler, camera)))
+
+    second_camera = room.publish(patient, "patient_phone")
+    room.unpublish(patient, camera)
+    results.append(("camera switch", second_camera, await wait_for_source(sampler, second_camera)))
+
+    clinician = room.join("clinician")
+    room.publish(clinician, "clinician_camera")
+    results.append(("second participant", second_camera, await wait_for_source(sampler, second_camera)))
+
+    room.publish(patient, "patient_screen", source=rtc.TrackSource.SOURCE_SCREENSHARE)
+    results.append(("screen share", second_camera, await wait_for_source(sampler, second_camera)))
+
+    room.leave(patient)
+    clinician_camera = manager.current
+    results.append(("patient left", clinician_camera, await wait_for_source(sampler, clinician_camera)))
+
+    room.leave(clinician)
+    results.append(("everyone left", None, await wait_for_source(sampler, None)))
+
+    room.emit("disconnected", None)
+    await asyncio.wait_for(streaming, 1.0)
+
+    print(f"{'scenario':<20}{'selected track':<20}{'switch ms':>10}")
+    for name, track, latency in results:
+        selected = track.sid if track else "-"
+        if latency is None:
+            shown = "STUCK"
+        elif track is None:
+            shown = "stopped"
+        else:
+            shown = f"{latency * 1000:.1f}"
+        print(f"{name:<20}{selected:<20}{shown:>10}")
+    print("stream_into returned after room disconnect")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
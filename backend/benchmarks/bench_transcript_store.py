@@ -0,0 +1,131 @@
+"""Bulk ingestion and query latency of the transcript store.
+
+Ingestion: --files finished journals are written to a temporary
+conversations directory and indexed with `ingest_directory`, parsing in
+one worker process and then in one per CPU.
+
+Queries: --sessions synthetic sessions of --messages messages each (intake
+vocabulary, one rare term per 1000 sessions) are added to a fresh store,
+then each query runs --repeats times and the median is reported. For
+comparison, "grep" scans the same sessions as JSONL text for the rare
+term, which is what finding a consultation took before.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_transcript_store
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from conversation_journal import ConversationJournal
+from transcript_store import ParsedSession, TranscriptStore
+
+WORDS = (
+    "rash itchy forearm knee ache swelling fever cough headache dizziness allergy penicillin ibuprofen "
+    "paracetamol since yesterday week morning night pain severe mild moderate scale appointment clinic "
+    "image photo wound redness blister tooth gum bleeding nausea breath chest back stomach sleep"
+).split()
+DAY = 86400.0
+
+
+def make_sessions(count: int, messages: int, seed: int = 3) -> list[ParsedSession]:
+    rng = random.Random(seed)
+    start = 1_736_000_000.0
+    sessions = []
+    for i in range(count):
+        started = start + i * 60.0
+        rows = []
+        for seq in range(1, messages + 1):
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 30)))
+            if seq == 2 and i % 1000 == 0:
+                text += " erythema"
+            rows.append((seq, started + seq * 5.0, "user" if seq % 2 else "assistant", text))
+        sessions.append(ParsedSession(f"session_{i:06d}.jsonl", "1", f"room-{i}", "voice", started, started + 600.0, rows))
+    return sessions
+
+
+def write_journals(directory: str, sessions: list[ParsedSession]) -> None:
+    for s in sessions:
+        journal = ConversationJournal(
+            os.path.join(directory, s.source), session_id=s.session_id, agent="voice", flush_interval=0
+        )
+        for _, _, role, text in s.messages:
+            journal.append(role, text)
+        journal.close()
+
+
+def median_ms(fn, repeats: int) -> tuple[float, int]:
+    times, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--messages", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        conversations = os.path.join(directory, "conversations")
+        os.makedirs(conversations)
+        write_journals(conversations, make_sessions(args.files, args.messages, seed=1))
+        print(f"ingest {args.files} journal files:")
+        for workers in sorted({1, os.cpu_count() or 1}):
+            store = TranscriptStore(os.path.join(directory, f"ingest_{workers}.db"))
+            start = time.perf_counter()
+            store.ingest_directory(conversations, workers=workers)
+            elapsed = time.perf_counter() - start
+            start = time.perf_counter()
+            store.ingest_directory(conversations, workers=workers)
+            again = time.perf_counter() - start
+            store.close()
+            print(f"    {workers} worker(s): {args.files / elapsed:,.0f} sessions/s, rerun with nothing new {again * 1000:.0f} ms")
+
+        sessions = make_sessions(args.sessions, args.messages)
+        store = TranscriptStore(os.path.join(directory, "transcripts.db"))
+        start = time.perf_counter()
+        store.add(sessions)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(store.path)
+        print(f"\nadd {args.sessions:,} sessions ({args.sessions * args.messages:,} messages): "
+              f"{elapsed:.1f} s, {size / 2**20:.0f} MB")
+
+        first = sessions[0].started
+        middle = sessions[len(sessions) // 2]
+        queries = [
+            ("rare term", lambda: store.search("erythema")),
+            ("common terms, newest 50", lambda: store.search("rash AND forearm")),
+            ("common terms, by bm25", lambda: store.search("rash AND forearm", order="relevance")),
+            ("phrase", lambda: store.search('"severe pain"')),
+            ("prefix, user only", lambda: store.search("penicil*", role="user")),
+            ("text in one day", lambda: store.search("wound", since=first + 30 * DAY, until=first + 31 * DAY)),
+            ("one session, text", lambda: store.search("pain", session_id=middle.session_id)),
+            ("whole session", lambda: store.session(middle.source)),
+            ("time range, user", lambda: store.messages(role="user", since=first + 10 * DAY, until=first + 10 * DAY + 3600)),
+        ]
+        print(f"{'query':<28}{'median':>10}{'rows':>7}")
+        for name, fn in queries:
+            ms, rows = median_ms(fn, args.repeats)
+            print(f"{name:<28}{ms:>7.2f} ms{rows:>7}")
+        store.close()
+
+        text = "".join(
+            "".join(f'{{"role":"{role}","content":"{t}"}}\n' for _, _, role, t in s.messages) for s in sessions
+        )
+        start = time.perf_counter()
+        matches = sum(1 for line in text.splitlines() if "erythema" in line)
+        print(f"{'grep (in memory)':<28}{(time.perf_counter() - start) * 1000:>7.2f} ms{matches:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Time to first audio for a fixed phrase with and without the TTS cache.
+
+Uses the fake flush-driven TTS from bench_speech_stream, so the uncached
+numbers are its configured latency; the cached numbers are what
+SentenceStreamingTTS spends reading the phrase from TTSCache. "cold" loads
+from disk in a fresh TTSCache (as after a worker restart), "warm" is the
+in-memory copy kept after the first hit.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_tts_cache
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+from livekit import rtc
+
+from benchmarks.bench_speech_stream import FakeTTS
+from speech_stream import SentenceStreamingTTS
+from tts_cache import TTSCache
+
+GREETING = "Hi Patient, i am Philip. What's bring you today here?"
+
+
+async def first_audio(engine: SentenceStreamingTTS, text: str) -> float:
+    start = time.perf_counter()
+    stream = engine.stream()
+    stream.push_text(text)
+    stream.end_input()
+    elapsed = None
+    async for _ in stream:
+        if elapsed is None:
+            elapsed = time.perf_counter() - start
+    await stream.aclose()
+    return elapsed
+
+
+async def main_async(args):
+    fake = FakeTTS(args.tts_latency, 0.0)
+    directory = tempfile.mkdtemp()
+    segmenter = SentenceStreamingTTS(fake).segmenter()
+    chunks = segmenter.split(GREETING)
+
+    # 2 s of 24 kHz mono audio per chunk, about the length of a spoken sentence
+    seed = TTSCache(directory, model="aura-stella-en")
+    seed.register(chunks)
+    for chunk in chunks:
+        seed.put(chunk, [rtc.AudioFrame.create(24000, 1, 2400) for _ in range(20)])
+
+    uncached = await first_audio(SentenceStreamingTTS(fake), GREETING)
+    cache = TTSCache(directory, model="aura-stella-en")
+    cache.register(chunks)
+    engine = SentenceStreamingTTS(fake, cache=cache)
+    cold = await first_audio(engine, GREETING)
+    warm = await first_audio(engine, GREETING)
+
+    print(f"{'greeting':<24}{'first audio':>14}")
+    print(f"{'no cache':<24}{uncached * 1000:>11.1f} ms")
+    print(f"{'cache, cold (disk)':<24}{cold * 1000:>11.1f} ms")
+    print(f"{'cache, warm (memory)':<24}{warm * 1000:>11.1f} ms")
+
+    bounded = TTSCache(tempfile.mkdtemp(), model="aura-stella-en", max_bytes=args.max_bytes)
+    phrases = [f"Phrase number {i} for the eviction check." for i in range(args.phrases)]
+    bounded.register(phrases)
+    for phrase in phrases:
+        bounded.put(phrase, [rtc.AudioFrame.create(24000, 1, 2400) for _ in range(20)])
+    kept = sum(bounded.get(p) is not None for p in phrases)
+    print(f"LRU: {args.phrases} phrases into {args.max_bytes // 1024} KiB keeps the newest {kept}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tts-latency", type=float, default=0.25)
+    parser.add_argument("--phrases", type=int, default=40)
+    parser.add_argument("--max-bytes", type=int, default=1024 * 1024)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""LLM calls and wasted completion tokens for bursty typed chat, with and without TurnScheduler.
+
+A fake LLM streams a fixed-length reply at a fixed token rate. The patient
+types in bursts: a few messages close together, then a pause. Without the
+scheduler every message starts its own LLM call, and each reply keeps
+generating even after a newer message has made it stale. With the
+scheduler, bursts are merged and stale replies are cancelled. Wasted
+tokens are completion tokens generated for a reply that a newer message
+superseded. Times are scaled down by --speedup so the run takes a few
+seconds.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_turn_scheduler
+"""
+import argparse
+import asyncio
+import random
+
+from turn_scheduler import TurnOutput, TurnScheduler
+
+
+class FakeStream:
+    def __init__(self, tokens: int, rate: float, stats: dict):
+        self._stats = stats
+        self.generated = 0
+        self.closed = False
+        self.finished_at: float | None = None
+        self._task = asyncio.create_task(self._generate(tokens, rate))
+
+    async def _generate(self, tokens: int, rate: float) -> None:
+        for _ in range(tokens):
+            await asyncio.sleep(1 / rate)
+            self.generated += 1
+            self._stats["tokens"] += 1
+        self.finished_at = asyncio.get_running_loop().time()
+
+    async def aclose(self) -> None:
+        self.closed = True
+        self._task.cancel()
+
+
+def workload(bursts: int, seed: int) -> list[float]:
+    rng = random.Random(seed)
+    times, now = [], 0.0
+    for _ in range(bursts):
+        for i in range(rng.randint(1, 4)):
+            now += rng.uniform(0.05, 0.3) if i else rng.uniform(2.0, 4.0)
+            times.append(now)
+    return times
+
+
+async def run(times: list[float], scheduled: bool, args) -> dict:
+    stats = {"calls": 0, "tokens": 0}
+    streams: list[tuple[float, FakeStream]] = []
+    rate = args.tokens_per_second * args.speedup
+
+    async def answer(text: str, use_image: bool):
+        stats["calls"] += 1
+        stream = FakeStream(args.reply_tokens, rate, stats)
+        streams.append((asyncio.get_running_loop().time(), stream))
+        return TurnOutput(stream)
+
+    scheduler = TurnScheduler(answer, coalesce_window=args.coalesce_window / args.speedup)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    arrivals = []
+    for t in times:
+        await asyncio.sleep(max(0.0, start + t / args.speedup - loop.time()))
+        arrivals.append(loop.time())
+        if scheduled:
+            scheduler.submit(f"message at {t:.2f}s")
+        else:
+            asyncio.create_task(answer(f"message at {t:.2f}s", False))
+
+    await asyncio.sleep(args.reply_tokens / rate + 0.5)
+    await scheduler.aclose()
+
+    # a reply is stale if another message arrived while it was still generating
+    wasted = 0
+    for started, stream in streams:
+        finished = stream.finished_at or float("inf")
+        if any(started < a < finished for a in arrivals):
+            wasted += stream.generated
+    stats["wasted"] = wasted
+    stats["cancelled"] = sum(s.closed for _, s in streams)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--reply-tokens", type=int, default=120)
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--coalesce-window", type=float, default=0.35)
+    parser.add_argument("--speedup", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    times = workload(args.bursts, args.seed)
+    before = asyncio.run(run(times, False, args))
+    after = asyncio.run(run(times, True, args))
+
+    print(f"{len(times)} typed messages in {args.bursts} bursts")
+    print(f"{'':<22}{'LLM calls':>10}{'tokens':>9}{'wasted':>9}{'cancelled':>11}")
+    for name, s in (("create_task per msg", before), ("TurnScheduler", after)):
+        print(f"{name:<22}{s['calls']:>10}{s['tokens']:>9}{s['wasted']:>9}{s['cancelled']:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Encode time per VisionProfile, i.e. the latency VisionFrameCache takes off a vision turn.
+
+Before the cache, `_answer` handed the raw frame to ChatImage and the OpenAI
+plugin encoded it while building the request; that cost now runs in a worker
+thread between turns. Frames are synthetic but textured, so JPEG sizes are in
+the same range as a webcam picture.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_vision_cache
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+from livekit import rtc
+
+from frame_sampler import downscale_frame
+from vision_cache import DEFAULT_PROFILES, encode_frame
+
+
+def synthetic_frame(width: int, height: int) -> rtc.VideoFrame:
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:height, 0:width]
+    rgba = np.empty((height, width, 4), dtype=np.uint8)
+    rgba[..., 0] = (xx * 255 // width).astype(np.uint8)
+    rgba[..., 1] = (yy * 255 // height).astype(np.uint8)
+    rgba[..., 2] = rng.integers(0, 64, size=(height, width), dtype=np.uint8)
+    rgba[..., 3] = 255
+    frame = rtc.VideoFrame(width, height, rtc.VideoBufferType.RGBA, rgba.tobytes())
+    return frame.convert(rtc.VideoBufferType.I420)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    raw = synthetic_frame(1280, 720)
+    sources = {"raw 1280x720": raw, "sampled": downscale_frame(raw, 1024, 1024)}
+    encode_frame(raw, DEFAULT_PROFILES[0])  # warm up Pillow
+
+    print(f"{'source':<16}{'profile':<12}{'mean ms':>10}{'p95 ms':>10}{'payload KiB':>14}")
+    for source_name, frame in sources.items():
+        for profile in DEFAULT_PROFILES:
+            timings = []
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                url = encode_frame(frame, profile)
+                timings.append((time.perf_counter() - start) * 1000)
+            p95 = statistics.quantiles(timings, n=20)[-1]
+            print(
+                f"{source_name:<16}{profile.name:<12}{statistics.mean(timings):>10.2f}"
+                f"{p95:>10.2f}{len(url) / 1024:>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""VisionIntentDetector accuracy and speed, plus the cost of a vision turn on each path.
+
+The detector is scored on a small labelled set of consultation utterances.
+Vision turn cost is modelled from the request shape: the tool path sends
+the context once to get the image tool call and again with the frame
+attached; the fast path sends the context with the frame once. Latency
+uses a fixed time-to-first-token per request and a decode rate for the
+tool call arguments, both adjustable.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_vision_intent
+"""
+import argparse
+import time
+
+from livekit.agents.llm import ChatContext, ChatMessage
+
+from context_window import IMAGE_TOKEN_ESTIMATE, TokenCounter
+from vision_intent import VisionIntentDetector
+
+VISION = [
+    "Can you look at this rash on my arm?",
+    "Could you see the swelling here?",
+    "What does this look like to you?",
+    "Take a look at my tongue please",
+    "How does it look now that it has healed a bit?",
+    "These spots appeared yesterday, can you see them?",
+    "Have a look at my knee",
+    "Would you look at the cut on my finger?",
+    "What do you see on my eyelid?",
+    # implicit: left to the image tool
+    "I'm showing you the cut now",
+    "Here is a picture of the wound",
+    "This bruise has been here for a week",
+]
+NOT_VISION = [
+    "I've had a headache for three days",
+    "My skin has been itchy since I changed soap",
+    "I take ibuprofen twice a day",
+    "No allergies that I know of",
+    "The pain is about a six out of ten",
+    "My mother had diabetes",
+    "I can't see very well at night",
+    "Can you send me an email with the appointment details?",
+    "I have a rash but it's on my back so I can't show it",
+    "I smoke about five cigarettes a day",
+    "It started after I came back from holiday",
+    "Should I book an appointment with a dermatologist?",
+    "The pain is right here under my ribs",
+    "I had an MRI and the images came back clear",
+    "My camera isn't working today",
+    "I found some pictures of rashes online",
+]
+
+SYSTEM_PROMPT = "You are Philip, a professional healthcare assistant at the Clinic. " * 90
+TOOL_CALL_TOKENS = 25
+
+
+def session_context(turns: int) -> ChatContext:
+    chat_ctx = ChatContext(messages=[ChatMessage(role="system", content=SYSTEM_PROMPT)])
+    for turn in range(turns):
+        chat_ctx.messages.append(ChatMessage(role="user", content=f"Turn {turn}: the symptoms are about the same."))
+        chat_ctx.messages.append(ChatMessage(role="assistant", content="Thank you, could you tell me a bit more?"))
+    return chat_ctx
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=10, help="earlier turns in the context")
+    parser.add_argument("--ttft-ms", type=float, default=700.0)
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    args = parser.parse_args()
+
+    detector = VisionIntentDetector()
+    tp = sum(detector.matches(t) for t in VISION)
+    fp = sum(detector.matches(t) for t in NOT_VISION)
+    print(f"detector: {tp}/{len(VISION)} vision turns caught, {fp}/{len(NOT_VISION)} false positives")
+    for text in VISION + NOT_VISION:
+        if detector.matches(text) != (text in VISION):
+            print(f"  {'missed' if text in VISION else 'false positive'}: {text}")
+
+    utterances = VISION + NOT_VISION
+    iterations = 2000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in utterances:
+            detector.matches(text)
+    per_call = (time.perf_counter() - start) / (iterations * len(utterances)) * 1e6
+    print(f"detector: {per_call:.1f} us per utterance")
+
+    counter = TokenCounter()
+    chat_ctx = session_context(args.turns)
+    question = ChatMessage(role="user", content="Can you look at this rash on my arm?")
+    base = counter.context(chat_ctx) + counter.message(question)
+    with_image = base + IMAGE_TOKEN_ESTIMATE
+    tool_decode_ms = TOOL_CALL_TOKENS / args.tokens_per_second * 1000
+
+    tool_tokens = base + (with_image + TOOL_CALL_TOKENS)
+    tool_ms = args.ttft_ms + tool_decode_ms + args.ttft_ms
+    fast_tokens = with_image
+    fast_ms = args.ttft_ms
+
+    print()
+    print(f"{'path':<12}{'requests':>10}{'prompt tokens':>15}{'time to first word':>20}")
+    print(f"{'image tool':<12}{2:>10}{tool_tokens:>15}{tool_ms:>17.0f} ms")
+    print(f"{'fast path':<12}{1:>10}{fast_tokens:>15}{fast_ms:>17.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
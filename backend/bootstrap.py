@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import time
+
+from livekit import rtc
+from livekit.agents import AutoSubscribe, JobContext
+
+from speech_stream import SentenceStreamingTTS
+
+logger = logging.getLogger("bootstrap")
+
+
+class SessionBootstrap:
+    """Runs the independent steps of session start concurrently and times them.
+
+    Connecting to the room and getting the greeting ready (opening the TTS
+    connection, and synthesizing the greeting into the phrase cache if it is
+    not there yet) don't depend on each other, so `start` runs them side by
+    side while the entrypoint builds the rest of the session. The greeting
+    then waits for the participant's audio track to be subscribed rather
+    than a fixed delay.
+
+    Every step is timed from the moment the bootstrap is created, which is
+    when the job was handed to the entrypoint; `timings` holds the seconds
+    per step and `watch_first_audio` adds "first_audio", the job assignment
+    to first greeting audio latency.
+    """
+
+    def __init__(self, ctx: JobContext):
+        self._ctx = ctx
+        self._start = time.perf_counter()
+        self._task: asyncio.Task | None = None
+        self.timings: dict[str, float] = {}
+
+    def start(self, *, auto_subscribe: AutoSubscribe, tts: SentenceStreamingTTS, greeting: str) -> None:
+        async def _connect():
+            await self._ctx.connect(auto_subscribe=auto_subscribe)
+            self._mark("connected")
+            logger.info(f"Connected to room: {self._ctx.room.name}")
+
+        async def _greeting():
+            try:
+                await tts.warm([greeting])
+            except Exception as e:
+                # the greeting is synthesized on demand instead
+                logger.warning(f"Greeting not pre-synthesized: {str(e)}")
+            self._mark("greeting_ready")
+
+        self._task = asyncio.create_task(self._run(_connect(), _greeting()))
+
+    async def ready(self) -> None:
+        """Wait for the room connection and the greeting. Connection errors are raised here."""
+        await self._task
+
+    async def wait_for_participant_audio(self, timeout: float) -> bool:
+        """Wait until a remote audio track is subscribed. Returns False on timeout."""
+        room = self._ctx.room
+        subscribed = asyncio.Event()
+
+        def _on_track_subscribed(track: rtc.Track, *_):
+            if track.kind == rtc.TrackKind.KIND_AUDIO:
+                subscribed.set()
+
+        room.on("track_subscribed", _on_track_subscribed)
+        try:
+            if not _has_remote_audio(room):
+                await asyncio.wait_for(subscribed.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"No participant audio after {timeout:.1f} s, greeting anyway")
+            return False
+        finally:
+            room.off("track_subscribed", _on_track_subscribed)
+        self._mark("participant_audio")
+        return True
+
+    def watch_first_audio(self, assistant: rtc.EventEmitter) -> None:
+        """Record when the agent first starts speaking, i.e. the greeting's first audio."""
+        assistant.once("agent_started_speaking", lambda: self._mark("first_audio"))
+
+    async def _run(self, *steps) -> None:
+        results = await asyncio.gather(*steps, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    def _mark(self, step: str) -> None:
+        self.timings[step] = time.perf_counter() - self._start
+        logger.info(f"Bootstrap: {step} after {self.timings[step] * 1000:.0f} ms")
+
+
+def _has_remote_audio(room: rtc.Room) -> bool:
+    return any(
+        publication.track is not None and publication.kind == rtc.TrackKind.KIND_AUDIO
+        for participant in room.remote_participants.values()
+        for publication in participant.track_publications.values()
+    )
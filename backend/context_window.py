@@ -0,0 +1,204 @@
+import asyncio
+import logging
+
+from livekit.agents import llm
+from livekit.agents.llm import ChatContext, ChatImage, ChatMessage
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger("context-window")
+
+IMAGE_TOKEN_ESTIMATE = 425
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_PREFIX = "Summary of the earlier part of this consultation:\n"
+SUMMARY_INSTRUCTIONS = (
+    "You maintain running notes of a patient intake conversation for a healthcare assistant. "
+    "Merge the previous notes with the new transcript into concise notes. Keep every symptom, "
+    "duration, severity, medication, allergy, history item, image finding, contact detail and "
+    "agreed next step. Drop greetings and small talk. Answer with the notes only."
+)
+
+
+_fallback_logged = False
+
+
+class TokenCounter:
+    """Counts prompt tokens locally with tiktoken.
+
+    Without tiktoken, or when its encoding cannot be loaded (it is fetched
+    on first use), tokens are estimated as chars/4, which can be well off
+    for non-English text; that is logged once per process.
+    """
+
+    def __init__(self, model: str = "gpt-4"):
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                try:
+                    self._encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                _log_fallback(f"tiktoken encoding unavailable ({str(e)})")
+        else:
+            _log_fallback("tiktoken is not installed")
+        self._cache: dict[str, tuple[int, int]] = {}
+
+    def text(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return len(text) // 4 + 1
+
+    def message(self, msg: ChatMessage) -> int:
+        cached = self._cache.get(msg.id)
+        if cached is not None and cached[0] == id(msg.content):
+            return cached[1]
+
+        tokens = MESSAGE_OVERHEAD_TOKENS
+        contents = msg.content if isinstance(msg.content, list) else [msg.content]
+        for content in contents:
+            if isinstance(content, str):
+                tokens += self.text(content)
+            elif isinstance(content, ChatImage):
+                tokens += IMAGE_TOKEN_ESTIMATE
+        for call in msg.tool_calls or []:
+            tokens += self.text(call.function_info.name) + self.text(call.raw_arguments or "")
+
+        self._cache[msg.id] = (id(msg.content), tokens)
+        return tokens
+
+    def forget(self, msg: ChatMessage) -> None:
+        self._cache.pop(msg.id, None)
+
+    def context(self, chat_ctx: ChatContext) -> int:
+        return sum(self.message(msg) for msg in chat_ctx.messages)
+
+
+def _log_fallback(reason: str) -> None:
+    global _fallback_logged
+    if not _fallback_logged:
+        _fallback_logged = True
+        logger.warning(f"{reason}: estimating prompt tokens as characters / 4, context trimming will be approximate")
+
+
+def _render(messages: list[ChatMessage]) -> str:
+    lines = []
+    for msg in messages:
+        contents = msg.content if isinstance(msg.content, list) else [msg.content]
+        text = " ".join(
+            c if isinstance(c, str) else "[image]" for c in contents if isinstance(c, (str, ChatImage))
+        )
+        if msg.tool_calls:
+            text += " " + " ".join(f"[called {c.function_info.name}]" for c in msg.tool_calls)
+        if text.strip():
+            lines.append(f"{msg.role}: {text.strip()}")
+    return "\n".join(lines)
+
+
+class ContextWindow:
+    """Keeps a session ChatContext inside a token budget.
+
+    The leading system prompt and the last `keep_turns` user turns stay
+    verbatim. When the context grows past `max_tokens`, older turns are folded
+    into a running summary message placed right after the system prompt. The
+    summary is produced by a background LLM call started between turns, and
+    the folded messages are only removed once it is ready, so no request ever
+    waits on summarization.
+    """
+
+    def __init__(self, summarizer: llm.LLM, *, max_tokens: int = 6000, keep_turns: int = 6):
+        self._llm = summarizer
+        self._max_tokens = max_tokens
+        self._keep_turns = keep_turns
+        self._counter = TokenCounter()
+        self._task: asyncio.Task | None = None
+        self._summary: ChatMessage | None = None
+
+    @property
+    def counter(self) -> TokenCounter:
+        return self._counter
+
+    def maybe_compact(self, chat_ctx: ChatContext) -> None:
+        """Start a background summarization if the context is over budget."""
+        if self._task is not None and not self._task.done():
+            return
+        if self._counter.context(chat_ctx) <= self._max_tokens:
+            return
+        folded = self._foldable(chat_ctx)
+        if folded:
+            self._task = asyncio.create_task(self._compact(chat_ctx, folded))
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def _foldable(self, chat_ctx: ChatContext) -> list[ChatMessage]:
+        """Messages between the system prompt/summary and the last keep_turns user turns."""
+        start = 0
+        while start < len(chat_ctx.messages) and chat_ctx.messages[start].role == "system":
+            start += 1
+
+        user_indices = [i for i in range(start, len(chat_ctx.messages)) if chat_ctx.messages[i].role == "user"]
+        if len(user_indices) <= self._keep_turns:
+            return []
+        end = user_indices[-self._keep_turns]
+        return chat_ctx.messages[start:end]
+
+    async def _compact(self, chat_ctx: ChatContext, folded: list[ChatMessage]) -> None:
+        previous = ""
+        if self._summary is not None:
+            previous = str(self._summary.content)[len(SUMMARY_PREFIX):]
+
+        request = ChatContext().append(role="system", text=SUMMARY_INSTRUCTIONS)
+        request.append(
+            role="user",
+            text=f"Previous notes:\n{previous or '(none)'}\n\nNew transcript:\n{_render(folded)}",
+        )
+
+        try:
+            summary = await self._complete(request)
+        except Exception as e:
+            logger.error(f"Failed to summarize chat context: {str(e)}", exc_info=True)
+            return
+
+        before = self._counter.context(chat_ctx)
+        folded_ids = {id(msg) for msg in folded}
+        messages = [msg for msg in chat_ctx.messages if id(msg) not in folded_ids]
+
+        summary_msg = ChatMessage(role="system", content=SUMMARY_PREFIX + summary)
+        summary_index = next((i for i, msg in enumerate(messages) if msg is self._summary), None)
+        if summary_index is not None:
+            messages[summary_index] = summary_msg
+        else:
+            insert_at = 0
+            while insert_at < len(messages) and messages[insert_at].role == "system":
+                insert_at += 1
+            messages.insert(insert_at, summary_msg)
+        self._summary = summary_msg
+
+        chat_ctx.messages[:] = messages
+        for msg in folded:
+            self._counter.forget(msg)
+        logger.info(
+            f"Folded {len(folded)} messages into the summary: "
+            f"{before} -> {self._counter.context(chat_ctx)} tokens"
+        )
+
+    async def _complete(self, request: ChatContext) -> str:
+        stream = self._llm.chat(chat_ctx=request)
+        parts = []
+        try:
+            async for chunk in stream:
+                for choice in chunk.choices:
+                    if choice.delta.content:
+                        parts.append(choice.delta.content)
+        finally:
+            await stream.aclose()
+        return "".join(parts).strip()
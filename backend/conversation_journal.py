@@ -0,0 +1,266 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Iterator
+
+from image_store import digest_of
+
+logger = logging.getLogger("conversation-journal")
+
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", "conversations")
+JOURNAL_FLUSH_INTERVAL = float(os.getenv("JOURNAL_FLUSH_INTERVAL", "0.2"))
+ARCHIVE_DIR = "archive"
+
+
+class ConversationJournal:
+    """Append-only JSONL journal of one session's conversation.
+
+    The first line describes the session, then every message is one line,
+    written once, and a last `end` line marks a finished session:
+
+        {"type": "session", "session_id": "room-1", "agent": "voice", "started": 1737000000.0}
+        {"type": "message", "seq": 1, "ts": 1737000003.2, "role": "user", "content": "..."}
+        {"type": "end", "ts": 1737000300.0, "messages": 42}
+
+    `append` only queues the record. A writer thread encodes everything that
+    is queued, writes it, and fsyncs once per batch, at most every
+    `flush_interval` seconds, so a crash loses at most that much and the
+    event loop never waits on the disk. A crash can leave a partial last
+    line; `read_journal` skips it and `recover` cuts it off.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        session_id: str,
+        agent: str,
+        flush_interval: float = JOURNAL_FLUSH_INTERVAL,
+        on_closed: Callable[[str], None] | None = None,
+    ):
+        self.path = path
+        self._on_closed = on_closed
+        self._flush_interval = flush_interval
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._seq = 0
+        self.bytes_written = 0
+        self.fsyncs = 0
+        self._queue.put({"type": "session", "session_id": session_id, "agent": agent, "started": time.time()})
+        self._thread = threading.Thread(target=self._run, name="conversation-journal", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def create(cls, session_id: str, *, agent: str, directory: str = JOURNAL_DIR, **kwargs) -> "ConversationJournal":
+        os.makedirs(directory, exist_ok=True)
+        name = f"conversation_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{_safe_name(session_id)}.jsonl"
+        return cls(os.path.join(directory, name), session_id=session_id, agent=agent, **kwargs)
+
+    def append(self, role: str, content: Any, **fields) -> None:
+        """Queue one message; `content` must be JSON serializable (see `message_content`)."""
+        self._seq += 1
+        self._queue.put({"type": "message", "seq": self._seq, "ts": time.time(), "role": role, "content": content, **fields})
+
+    def close(self) -> None:
+        """Write the end marker, flush and wait for the writer thread."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put({"type": "end", "ts": time.time(), "messages": self._seq})
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    async def aclose(self) -> None:
+        """Close the journal, run `on_closed(path)` and archive the finished sessions in its directory."""
+        await asyncio.to_thread(self.close)
+        if self._on_closed is not None:
+            try:
+                await asyncio.to_thread(self._on_closed, self.path)
+            except Exception as e:
+                logger.error(f"Journal on_closed hook failed for {self.path}: {str(e)}", exc_info=True)
+        try:
+            await asyncio.to_thread(compact, os.path.dirname(self.path))
+        except (OSError, EOFError) as e:
+            logger.error(f"Failed to compact journals: {str(e)}")
+
+    def _run(self) -> None:
+        with open(self.path, "ab") as f:
+            stop = False
+            while not stop:
+                batch = [self._queue.get()]
+                # group commit: whatever arrives within the interval shares one fsync
+                deadline = time.monotonic() + self._flush_interval
+                while batch[-1] is not self._STOP and (remaining := deadline - time.monotonic()) > 0:
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                stop = batch[-1] is self._STOP
+                lines = [_encode(record) for record in batch if record is not self._STOP]
+                if not lines:
+                    continue
+                data = b"".join(lines)
+                try:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                except OSError as e:
+                    logger.error(f"Failed to write {len(lines)} journal records to {self.path}: {str(e)}")
+                    continue
+                self.bytes_written += len(data)
+                self.fsyncs += 1
+
+
+def _encode(record: dict) -> bytes:
+    try:
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+    except (TypeError, ValueError):
+        # never lose the message over one odd value
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", value)[:64] or "session"
+
+
+def message_content(content) -> Any:
+    """JSON form of a ChatMessage's content: text as is, images by their image store digest."""
+    if isinstance(content, str) or content is None:
+        return content
+    if isinstance(content, list):
+        return [message_content(c) for c in content]
+    digest = digest_of(content)
+    return {"type": "image", "sha256": digest} if digest else {"type": "image"}
+
+
+def read_journal(path: str) -> Iterator[dict]:
+    """Records of a journal, stopping at a partial or corrupt tail."""
+    with open(path, "rb") as f:
+        yield from read_records(f)
+
+
+def read_records(f) -> Iterator[dict]:
+    """Records from an open binary journal, stopping at a partial or corrupt tail."""
+    for line in f:
+        if not line.endswith(b"\n"):
+            return
+        try:
+            yield json.loads(line)
+        except ValueError:
+            return
+
+
+def recover(path: str) -> int:
+    """Cut a partial or corrupt tail off a journal. Returns the number of bytes removed."""
+    good = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                json.loads(line)
+            except ValueError:
+                break
+            good += len(line)
+        size = f.seek(0, os.SEEK_END)
+    if size > good:
+        with open(path, "r+b") as f:
+            f.truncate(good)
+            os.fsync(f.fileno())
+        logger.warning(f"Recovered {path}: dropped a partial tail of {size - good} bytes")
+    return size - good
+
+
+def is_finished(path: str) -> bool:
+    """Whether the journal ends with its end marker (the session was closed)."""
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(size - 256, 0))
+        tail = f.read()
+    return tail.endswith(b"\n") and tail.splitlines()[-1].startswith(b'{"type":"end"')
+
+
+def compact(directory: str = JOURNAL_DIR, *, stale_after: float = 3600.0) -> int:
+    """Compress finished journals into the directory's archive and delete them.
+
+    Every session gets its own archive file, `archive/<journal name>.gz`,
+    written to a temporary file and renamed into place, so a crash or a
+    concurrent compaction can at worst leave one session uncompressed, never
+    damage another. Journals without an end marker that have not been
+    written for `stale_after` seconds belong to a crashed session: their
+    partial tail is cut off and they are archived too. Returns the number of
+    journals archived. Safe to rerun, and to run from several job processes
+    at once.
+    """
+    now = time.time()
+    candidates = []
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(".jsonl"):
+            continue
+        try:
+            if is_finished(entry.path):
+                candidates.append(entry.path)
+            elif now - entry.stat().st_mtime > stale_after:
+                recover(entry.path)
+                candidates.append(entry.path)
+        except FileNotFoundError:
+            continue  # archived by another process meanwhile
+    if not candidates:
+        return 0
+
+    archive_dir = os.path.join(directory, ARCHIVE_DIR)
+    os.makedirs(archive_dir, exist_ok=True)
+    archived = 0
+    for path in sorted(candidates):
+        target = os.path.join(archive_dir, os.path.basename(path) + ".gz")
+        try:
+            if not os.path.exists(target):
+                _gzip_atomic(path, target)
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        archived += 1
+    logger.info(f"Archived {archived} finished journals into {archive_dir}")
+    return archived
+
+
+def _gzip_atomic(path: str, target: str) -> None:
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(path, "rb") as src, open(tmp, "wb") as raw:
+            with gzip.GzipFile(filename=os.path.basename(path), mode="wb", compresslevel=9, fileobj=raw, mtime=0) as gz:
+                while chunk := src.read(1 << 16):
+                    gz.write(chunk)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def read_archive(directory: str = JOURNAL_DIR) -> Iterator[tuple[str, list[dict]]]:
+    """(journal name, records) for every archived journal in the directory.
+
+    An archive that cannot be read is logged and skipped.
+    """
+    archive_dir = os.path.join(directory, ARCHIVE_DIR)
+    if os.path.isdir(archive_dir):
+        for entry in sorted(os.scandir(archive_dir), key=lambda e: e.name):
+            if not entry.name.endswith(".jsonl.gz"):
+                continue
+            try:
+                with gzip.open(entry.path, "rb") as f:
+                    yield entry.name[:-3], list(read_records(f))
+            except (OSError, EOFError) as e:
+                logger.warning(f"Skipping unreadable archive {entry.path}: {str(e)}")
@@ -0,0 +1,113 @@
+import time
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+from livekit import rtc
+
+
+class ScoredFrame(NamedTuple):
+    timestamp: float
+    frame: rtc.VideoFrame
+    sharpness: float
+    motion: float
+    score: float
+
+
+def luma_plane(frame: rtc.VideoFrame) -> np.ndarray:
+    """Return the Y plane of an I420 frame as a 2-D uint8 view (no copy)."""
+    if frame.type != rtc.VideoBufferType.I420:
+        frame = frame.convert(rtc.VideoBufferType.I420)
+    buf = np.frombuffer(frame.data, dtype=np.uint8)
+    return buf[:frame.width * frame.height].reshape(frame.height, frame.width)
+
+
+def laplacian_variance(luma: np.ndarray) -> float:
+    """Variance of the 4-neighbour Laplacian; higher means sharper."""
+    y = luma.astype(np.float32)
+    lap = (
+        4 * y[1:-1, 1:-1]
+        - y[:-2, 1:-1]
+        - y[2:, 1:-1]
+        - y[1:-1, :-2]
+        - y[1:-1, 2:]
+    )
+    return float(lap.var())
+
+
+class FrameRing:
+    """Short, memory-budgeted history of sampled frames scored for sharpness.
+
+    Each pushed frame gets a Laplacian-variance sharpness score and a motion
+    score (mean absolute luma change from the previous frame). best() picks
+    the frame that is sharpest relative to its motion, which favours the
+    moment the patient held still over whatever arrived last.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = 4 * 1024 * 1024,
+        max_age: float = 5.0,
+        score_step: int = 2,
+    ):
+        self._frames: deque[ScoredFrame] = deque()
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._score_step = score_step
+        self._bytes = 0
+        self._prev_luma: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def push(self, frame: rtc.VideoFrame, now: float | None = None) -> ScoredFrame:
+        """Score a frame and add it to the ring, evicting old or over-budget entries."""
+        if now is None:
+            now = time.monotonic()
+
+        luma = luma_plane(frame)[::self._score_step, ::self._score_step]
+        sharpness = laplacian_variance(luma)
+        if self._prev_luma is not None and self._prev_luma.shape == luma.shape:
+            motion = float(np.abs(luma.astype(np.int16) - self._prev_luma).mean())
+        else:
+            motion = 0.0
+        self._prev_luma = luma.astype(np.int16)
+
+        entry = ScoredFrame(now, frame, sharpness, motion, sharpness / (1.0 + motion))
+        self._frames.append(entry)
+        self._bytes += len(frame.data)
+
+        while self._frames and (
+            self._bytes > self._max_bytes or now - self._frames[0].timestamp > self._max_age
+        ):
+            if len(self._frames) == 1:
+                break
+            self._bytes -= len(self._frames.popleft().frame.data)
+        return entry
+
+    def clear(self) -> None:
+        self._frames.clear()
+        self._bytes = 0
+        self._prev_luma = None
+
+    def latest(self) -> rtc.VideoFrame | None:
+        return self._frames[-1].frame if self._frames else None
+
+    def best(self, window: float = 2.0, now: float | None = None) -> rtc.VideoFrame | None:
+        """Return the best-scoring frame from the last `window` seconds.
+
+        Falls back to the newest frame when nothing falls inside the window.
+        """
+        if not self._frames:
+            return None
+        if now is None:
+            now = time.monotonic()
+        candidates = [f for f in self._frames if now - f.timestamp <= window]
+        if not candidates:
+            return self._frames[-1].frame
+        return max(candidates, key=lambda f: f.score).frame
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import AsyncIterable
+
+import numpy as np
+from livekit import rtc
+from livekit.rtc._ffi_client import FfiClient, FfiHandle
+
+logger = logging.getLogger("frame-sampler")
+
+
+def downscale_frame(frame: rtc.VideoFrame, max_width: int, max_height: int) -> rtc.VideoFrame:
+    """Shrink a frame by an integer factor so it fits inside max_width x max_height.
+
+    The frame is kept in I420 so the Y, U and V planes can be decimated with
+    plain NumPy slicing instead of a full RGB conversion.
+    """
+    if frame.type != rtc.VideoBufferType.I420:
+        frame = frame.convert(rtc.VideoBufferType.I420)
+
+    width, height = frame.width, frame.height
+    factor = max(1, math.ceil(width / max_width), math.ceil(height / max_height))
+    if factor == 1:
+        return frame
+
+    chroma_width, chroma_height = (width + 1) // 2, (height + 1) // 2
+    luma_size = width * height
+    chroma_size = chroma_width * chroma_height
+
+    buf = np.frombuffer(frame.data, dtype=np.uint8)
+    y = buf[:luma_size].reshape(height, width)[::factor, ::factor]
+    u = buf[luma_size:luma_size + chroma_size].reshape(chroma_height, chroma_width)[::factor, ::factor]
+    v = buf[luma_size + chroma_size:luma_size + 2 * chroma_size].reshape(chroma_height, chroma_width)[::factor, ::factor]
+
+    data = np.concatenate((y.ravel(), u.ravel(), v.ravel()))
+    return rtc.VideoFrame(y.shape[1], y.shape[0], rtc.VideoBufferType.I420, data.tobytes())
+
+
+class FrameSampler:
+    """Rate-limits a video track to a few downscaled frames per second.
+
+    Frames arriving faster than target_fps are dropped before any conversion
+    work is done; with a SampledVideoStream they are dropped before they are
+    even copied out of the decoder. Sampled frames go into a bounded queue that discards the
+    oldest entry when full, so a slow consumer never makes the session hold
+    more than queue_size frames.
+    """
+
+    def __init__(
+        self,
+        *,
+        target_fps: float = 2.0,
+        queue_size: int = 2,
+        max_width: int = 1024,
+        max_height: int = 1024,
+    ):
+        if target_fps <= 0:
+            raise ValueError("target_fps must be positive")
+        self._interval = 1.0 / target_fps
+        self._max_width = max_width
+        self._max_height = max_height
+        self._queue: deque[rtc.VideoFrame] = deque(maxlen=queue_size)
+        self._frame_available = asyncio.Event()
+        self._next_sample_at = 0.0
+        self._latest: rtc.VideoFrame | None = None
+
+        self.frames_seen = 0
+        self.frames_sampled = 0
+        self.frames_dropped = 0
+
+    @property
+    def latest(self) -> rtc.VideoFrame | None:
+        """The most recently sampled frame, or None if nothing was sampled yet."""
+        return self._latest
+
+    def due(self, now: float | None = None) -> bool:
+        """Whether push() would keep a frame arriving now. A frame that is not due counts as seen."""
+        if now is None:
+            now = time.monotonic()
+        if now < self._next_sample_at:
+            self.frames_seen += 1
+            return False
+        return True
+
+    def push(self, frame: rtc.VideoFrame, now: float | None = None) -> bool:
+        """Offer a decoded frame to the sampler. Returns True if it was kept."""
+        if now is None:
+            now = time.monotonic()
+        if not self.due(now):
+            return False
+        self.frames_seen += 1
+        self._next_sample_at = now + self._interval
+
+        frame = downscale_frame(frame, self._max_width, self._max_height)
+        if len(self._queue) == self._queue.maxlen:
+            self.frames_dropped += 1
+        self._queue.append(frame)
+        self._latest = frame
+        self.frames_sampled += 1
+        self._frame_available.set()
+        return True
+
+    def clear(self) -> None:
+        """Forget queued and latest frames, e.g. after the track was unsubscribed."""
+        self._queue.clear()
+        self._latest = None
+        self._next_sample_at = 0.0
+
+    async def get(self) -> rtc.VideoFrame:
+        """Wait for and return the oldest queued sample."""
+        while not self._queue:
+            self._frame_available.clear()
+            await self._frame_available.wait()
+        return self._queue.popleft()
+
+    async def run(self, stream: AsyncIterable[rtc.VideoFrameEvent]) -> None:
+        """Feed every event of a video stream through the sampler."""
+        async for event in stream:
+            self.push(event.frame)
+        logger.debug(
+            f"Video stream ended: seen={self.frames_seen} sampled={self.frames_sampled} "
+            f"dropped={self.frames_dropped}"
+        )
+
+
+class SampledVideoStream(rtc.VideoStream):
+    """rtc.VideoStream that only copies out the frames `sampler` will keep.
+
+    VideoStream copies every decoded frame from the FFI buffer into a new
+    bytearray, 30 times a second for a typical camera, although the sampler
+    keeps one or two of them. Here a frame that is not due is released on
+    the FFI side without being copied or converted.
+    """
+
+    def __init__(self, track: rtc.Track, sampler: FrameSampler, **kwargs):
+        self._sampler = sampler
+        super().__init__(track, **kwargs)
+
+    async def _run(self) -> None:
+        # VideoStream._run, with the sampler consulted before the copy
+        while True:
+            event = await self._ffi_queue.wait_for(self._is_event)
+            video_event = event.video_stream_event
+            if video_event.HasField("frame_received"):
+                frame_received = video_event.frame_received
+                if not self._sampler.due():
+                    FfiHandle(frame_received.buffer.handle.id).dispose()
+                    continue
+                self._queue.put(rtc.VideoFrameEvent(
+                    frame=rtc.VideoFrame._from_owned_info(frame_received.buffer),
+                    timestamp_us=frame_received.timestamp_us,
+                    rotation=frame_received.rotation,
+                ))
+            elif video_event.HasField("eos"):
+                break
+
+        FfiClient.instance.queue.unsubscribe(self._ffi_queue)
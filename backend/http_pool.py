@@ -0,0 +1,260 @@
+import asyncio
+import atexit
+import logging
+import ssl
+import threading
+import time
+import weakref
+from collections import defaultdict
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import aiohttp
+import httpx
+
+try:
+    import h2  # noqa: F401
+except ImportError:
+    _HTTP2 = False
+else:
+    _HTTP2 = True
+
+logger = logging.getLogger("http-pool")
+
+
+@dataclass
+class HostStats:
+    requests: int = 0
+    connections: int = 0  # TCP connections opened
+    tls_handshakes: int = 0
+
+    @property
+    def reused(self) -> int:
+        return max(self.requests - self.connections, 0)
+
+
+class HttpPool:
+    """Process-wide pooled HTTP connections to the providers we call.
+
+    `client(url)` returns one httpx.AsyncClient per host (HTTP/2, from the
+    `httpx[http2]` requirement, with keep-alive and per-host limits), for the
+    Azure OpenAI SDK and plain REST calls like SendGrid. Without `h2` the
+    clients fall back to HTTP/1.1 and the pool logs a warning.
+    `aiohttp_session()` returns one aiohttp session for the livekit plugins
+    (Deepgram takes an `http_session`).
+
+    Connections belong to the event loop they were opened on. A job's loop
+    runs on its own thread (the job process's main thread, or the job's
+    thread under the THREAD executor), and prewarm runs on that same thread
+    before it, so httpx clients are kept per thread and aiohttp sessions per
+    running loop; concurrent jobs never share one. The pool is owned by the
+    process: a job only gives back its loop's session and keep-warm task
+    with `aclose_loop`, and everything else is closed at process exit.
+
+    Every request is counted per host, together with the TCP connections
+    and TLS handshakes it caused, so `stats()` shows how often connections
+    were reused. `keep_warm` opens connections ahead of the first real
+    request and pings hosts that have been idle for a while, so they are
+    not dropped by the server between turns.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections_per_host: int = 10,
+        max_keepalive_per_host: int = 5,
+        keepalive_expiry: float = 120.0,
+        connect_timeout: float = 15.0,
+        read_timeout: float = 30.0,
+        verify: ssl.SSLContext | bool = True,
+    ):
+        self._limits = httpx.Limits(
+            max_connections=max_connections_per_host,
+            max_keepalive_connections=max_keepalive_per_host,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._timeout = httpx.Timeout(connect=connect_timeout, read=read_timeout, write=10.0, pool=10.0)
+        self._keepalive_expiry = keepalive_expiry
+        self._verify = verify
+        self._max_connections_per_host = max_connections_per_host
+        self._lock = threading.Lock()
+        self._clients: dict[tuple[int, str], httpx.AsyncClient] = {}
+        self._sessions: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._warm_tasks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._stats: defaultdict[str, HostStats] = defaultdict(HostStats)
+        self._last_used: dict[str, float] = {}
+        self._closed = False
+        if not _HTTP2:
+            logger.warning("h2 is not installed: HTTP/2 is off, pooled httpx clients use HTTP/1.1")
+
+    @property
+    def http2(self) -> bool:
+        return _HTTP2
+
+    def client(self, url: str) -> httpx.AsyncClient:
+        """The calling thread's client for the host of `url`."""
+        key = (threading.get_ident(), _origin(url))
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(
+                    http2=_HTTP2,
+                    limits=self._limits,
+                    timeout=self._timeout,
+                    verify=self._verify,
+                    event_hooks={"request": [self._on_httpx_request]},
+                )
+                self._clients[key] = client
+        return client
+
+    def aiohttp_session(self) -> aiohttp.ClientSession:
+        """The running loop's aiohttp session; must be called from a coroutine."""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            trace = aiohttp.TraceConfig()
+            trace.on_request_start.append(self._on_aiohttp_request)
+            trace.on_connection_create_end.append(self._on_aiohttp_connection)
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=self._max_connections_per_host,
+                    keepalive_timeout=self._keepalive_expiry,
+                    ttl_dns_cache=300,
+                    ssl=self._verify,
+                ),
+                trace_configs=[trace],
+            )
+            self._sessions[loop] = session
+        return session
+
+    def stats(self) -> dict[str, HostStats]:
+        return dict(self._stats)
+
+    def log_stats(self) -> None:
+        for host, s in self._stats.items():
+            logger.info(
+                f"{host}: {s.requests} requests, {s.reused} on reused connections, "
+                f"{s.connections} connections opened, {s.tls_handshakes} TLS handshakes"
+            )
+
+    async def warm(self, *urls: str) -> None:
+        """Open a connection to each host by sending a HEAD request to it."""
+
+        async def _ping(url: str):
+            try:
+                await self.client(url).head(url)
+            except httpx.HTTPError as e:
+                logger.debug(f"Warm-up ping to {url} failed: {str(e)}")
+
+        await asyncio.gather(*(_ping(url) for url in urls))
+
+    def keep_warm(self, urls: list[str], *, interval: float = 60.0) -> None:
+        """Warm `urls` now, then ping each one that has been idle for `interval` seconds."""
+        urls = [url for url in urls if url]
+        loop = asyncio.get_running_loop()
+        if not urls or loop in self._warm_tasks:
+            return
+
+        async def _keep_warm():
+            await self.warm(*urls)
+            while True:
+                await asyncio.sleep(interval)
+                now = time.monotonic()
+                idle = [url for url in urls if now - self._last_used.get(_origin(url), 0.0) >= interval]
+                if idle:
+                    await self.warm(*idle)
+
+        self._warm_tasks[loop] = asyncio.create_task(_keep_warm())
+
+    async def aclose_loop(self) -> None:
+        """Stop the running loop's keep-warm task and close its aiohttp session.
+
+        Only this loop can use them, so a job calls this when it ends; the
+        rest of the pool stays open for the other jobs of the process. The
+        process's per-host counters so far are logged.
+        """
+        self.log_stats()
+        loop = asyncio.get_running_loop()
+        task = self._warm_tasks.pop(loop, None)
+        if task is not None:
+            task.cancel()
+        session = self._sessions.pop(loop, None)
+        if session is not None:
+            await session.close()
+
+    async def aclose(self) -> None:
+        """Close every client and session of the pool."""
+        if self._closed:
+            return
+        self._closed = True
+        self.log_stats()
+        for task in list(self._warm_tasks.values()):
+            task.cancel()
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                # its connections may belong to a loop that is already closed
+                logger.debug(f"Failed to close HTTP client: {str(e)}")
+        for session in list(self._sessions.values()):
+            await session.close()
+        self._sessions.clear()
+
+    def close(self) -> None:
+        """`aclose` for process exit, when no event loop is running any more."""
+        if not self._closed:
+            asyncio.run(self.aclose())
+
+    async def _on_httpx_request(self, request: httpx.Request) -> None:
+        host = _origin(str(request.url))
+        self._count_request(host)
+
+        async def _trace(event: str, info: dict) -> None:
+            if event == "connection.connect_tcp.complete":
+                self._stats[host].connections += 1
+            elif event == "connection.start_tls.complete":
+                self._stats[host].tls_handshakes += 1
+
+        request.extensions["trace"] = _trace
+
+    async def _on_aiohttp_request(self, session, trace_ctx, params: aiohttp.TraceRequestStartParams) -> None:
+        trace_ctx.host = _origin(str(params.url))
+        self._count_request(trace_ctx.host)
+
+    async def _on_aiohttp_connection(self, session, trace_ctx, params) -> None:
+        host = getattr(trace_ctx, "host", "unknown")
+        self._stats[host].connections += 1
+        if host.startswith(("https://", "wss://")):
+            self._stats[host].tls_handshakes += 1
+
+    def _count_request(self, host: str) -> None:
+        self._stats[host].requests += 1
+        self._last_used[host] = time.monotonic()
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+_pool: HttpPool | None = None
+
+
+_pool_lock = threading.Lock()
+
+
+def shared_pool() -> HttpPool:
+    """The process's HttpPool, created on first use and closed when the process exits."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HttpPool()
+            atexit.register(_pool.close)
+        return _pool
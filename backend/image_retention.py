@@ -0,0 +1,56 @@
+import logging
+
+from livekit.agents.llm import ChatContext, ChatImage
+
+from image_store import digest_of
+
+logger = logging.getLogger("image-retention")
+
+
+def _findings_after(chat_ctx: ChatContext, index: int, max_chars: int) -> str | None:
+    """Text of the first assistant reply after message `index`, shortened to max_chars."""
+    for msg in chat_ctx.messages[index + 1:]:
+        if msg.role == "assistant" and isinstance(msg.content, str) and msg.content.strip():
+            text = " ".join(msg.content.split())
+            if len(text) > max_chars:
+                text = text[:max_chars].rsplit(" ", 1)[0] + "..."
+            return text
+    return None
+
+
+def apply_image_retention(chat_ctx: ChatContext, keep_last: int = 1, max_chars: int = 240) -> int:
+    """Keep only the newest `keep_last` images inline in the chat context.
+
+    Older images are replaced with a short text note carrying the assistant's
+    reply to them, and the image's digest when it is in the image store, so
+    the findings stay in the conversation while the image bytes (and their
+    per-request encode cache) are released. Returns the number of images
+    replaced.
+    """
+    positions = [
+        (msg_index, content_index)
+        for msg_index, msg in enumerate(chat_ctx.messages)
+        if isinstance(msg.content, list)
+        for content_index, content in enumerate(msg.content)
+        if isinstance(content, ChatImage)
+    ]
+    stale = positions[:-keep_last] if keep_last > 0 else positions
+    if not stale:
+        return 0
+
+    for msg_index, content_index in stale:
+        msg = chat_ctx.messages[msg_index]
+        findings = _findings_after(chat_ctx, msg_index, max_chars)
+        digest = digest_of(msg.content[content_index])
+        shared = f"Image {digest} shared earlier" if digest else "Image shared earlier"
+        note = (
+            f"[{shared}, no longer attached. Assessment at the time: {findings}]"
+            if findings
+            else f"[{shared}, no longer attached.]"
+        )
+        content = list(msg.content)
+        content[content_index] = note
+        msg.content = content
+
+    logger.debug(f"Replaced {len(stale)} stale image(s) with text notes")
+    return len(stale)
@@ -0,0 +1,207 @@
+import asyncio
+import base64
+import hashlib
+import io
+import logging
+import os
+import queue
+import tempfile
+import threading
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    from livekit.agents.llm import ChatImage
+
+logger = logging.getLogger("image-store")
+
+IMAGE_DIR = os.getenv("IMAGE_DIR", "images")
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "90"))
+THUMBNAIL_SIZE = int(os.getenv("IMAGE_THUMBNAIL_SIZE", "256"))
+
+_DIGEST_KEY = "image_store.sha256"
+_DATA_URL_PREFIX = "data:image/jpeg;base64,"
+
+
+class ImageStore:
+    """Content-addressed store for the camera frames a conversation looked at.
+
+    Every image is kept once, as a JPEG named by the SHA-256 of its bytes,
+    with a small thumbnail next to it:
+
+        images/3f/3f9a...c1.jpg
+        images/3f/3f9a...c1.thumb.jpg
+
+    `put` returns the digest, which the chat history and the conversation
+    journal carry instead of the image bytes. A frame that is already stored
+    (the same vision cache payload sent on several turns, or by another job
+    process) is not written again. Files are written by a background thread
+    and renamed into place, so the event loop never waits on the disk and a
+    reader never sees a partial image.
+    """
+
+    _STOP = object()
+
+    def __init__(self, directory: str = IMAGE_DIR, *, quality: int = IMAGE_QUALITY, thumbnail_size: int = THUMBNAIL_SIZE):
+        self.directory = directory
+        self._quality = quality
+        self._thumbnail_size = thumbnail_size
+        self._known: set[str] = set()
+        self._last: tuple[str, str] | None = None  # (data URL, digest) of the last payload hashed
+        self._queue: queue.Queue = queue.Queue()
+        self.written = 0
+        self.deduplicated = 0
+        self._thread = threading.Thread(target=self._run, name="image-store", daemon=True)
+        self._thread.start()
+
+    async def put(self, image: "ChatImage") -> str | None:
+        """Store an image and return its digest, or None for images that are only a remote URL.
+
+        JPEG data URLs (what the vision cache prepares) are hashed right
+        away; a raw VideoFrame is encoded in a worker thread first.
+        """
+        digest = image._cache.get(_DIGEST_KEY)
+        if digest is not None:
+            return digest
+        last = self._last
+        if last is not None and image.image is last[0]:
+            # the vision cache hands out the same payload until the camera moves
+            image._cache[_DIGEST_KEY] = last[1]
+            self.deduplicated += 1
+            return last[1]
+        if isinstance(image.image, str):
+            if not image.image.startswith(_DATA_URL_PREFIX):
+                return None
+            data = base64.b64decode(image.image[len(_DATA_URL_PREFIX):])
+        else:
+            data = await asyncio.to_thread(self._encode, image.image)
+        digest = hashlib.sha256(data).hexdigest()
+        image._cache[_DIGEST_KEY] = digest
+        if isinstance(image.image, str):
+            self._last = (image.image, digest)
+        if digest in self._known:
+            self.deduplicated += 1
+        else:
+            self._known.add(digest)
+            self._queue.put((digest, data))
+        return digest
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.jpg")
+
+    def thumbnail_path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.thumb.jpg")
+
+    def get(self, digest: str) -> bytes:
+        """JPEG bytes of a stored image."""
+        with open(self.path(digest), "rb") as f:
+            return f.read()
+
+    def thumbnail(self, digest: str) -> bytes:
+        """JPEG bytes of an image's thumbnail, read only when asked for.
+
+        Thumbnails missing from the directory (copied in from elsewhere, or
+        from before a crash) are made from the image and kept.
+        """
+        try:
+            with open(self.thumbnail_path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            data = self._make_thumbnail(self.get(digest))
+            _write_atomic(self.thumbnail_path(digest), data)
+            return data
+
+    def digests(self) -> Iterator[str]:
+        """Digests of all stored images, without opening any of them."""
+        if not os.path.isdir(self.directory):
+            return
+        for shard in sorted(os.scandir(self.directory), key=lambda e: e.name):
+            if not shard.is_dir():
+                continue
+            for entry in sorted(os.scandir(shard.path), key=lambda e: e.name):
+                name = entry.name
+                if name.endswith(".jpg") and not name.endswith(".thumb.jpg"):
+                    yield name[:-4]
+
+    def flush(self) -> None:
+        """Wait until every queued image is on disk."""
+        self._queue.join()
+
+    async def aflush(self) -> None:
+        await asyncio.to_thread(self.flush)
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+    def _encode(self, frame) -> bytes:
+        from livekit.agents.utils import images
+
+        return images.encode(frame, images.EncodeOptions(format="JPEG", quality=self._quality))
+
+    def _make_thumbnail(self, data: bytes) -> bytes:
+        from PIL import Image
+
+        with Image.open(io.BytesIO(data)) as img:
+            size = (self._thumbnail_size, self._thumbnail_size)
+            img.draft("RGB", size)  # let the JPEG decoder downscale instead of decoding every pixel
+            img.thumbnail(size)
+            buffer = io.BytesIO()
+            img.convert("RGB").save(buffer, "JPEG", quality=75)
+        return buffer.getvalue()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                digest, data = item
+                self._write(digest, data)
+            except Exception as e:
+                logger.error(f"Failed to store image {item[0]}: {str(e)}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, digest: str, data: bytes) -> None:
+        path = self.path(digest)
+        if os.path.exists(path):
+            self.deduplicated += 1
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # the thumbnail goes first: an image on disk always has one
+        _write_atomic(self.thumbnail_path(digest), self._make_thumbnail(data))
+        _write_atomic(path, data)
+        self.written += 1
+        logger.debug(f"Stored image {digest} ({len(data)} bytes)")
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def digest_of(image: "ChatImage") -> str | None:
+    """Digest of an image that went through `ImageStore.put`, or None."""
+    return image._cache.get(_DIGEST_KEY)
+
+
+_store: ImageStore | None = None
+_store_lock = threading.Lock()
+
+
+def image_store() -> ImageStore:
+    """The process's image store; job threads share it (and its writer thread)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ImageStore()
+        return _store
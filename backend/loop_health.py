@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import weakref
+
+from agent_metrics import LOOP_LAG, LOOP_STALLS
+
+logger = logging.getLogger("loop-health")
+
+LOOP_PROBE_INTERVAL = float(os.getenv("LOOP_PROBE_INTERVAL", "0.1"))
+SLOW_CALLBACK_THRESHOLD = float(os.getenv("SLOW_CALLBACK_THRESHOLD", "0.25"))
+
+
+class LoopMonitor:
+    """Measures an event loop's scheduling lag and catches callbacks that block it.
+
+    A probe task on the loop wakes every `interval` seconds, records how
+    late it woke in the lag histogram and leaves a heartbeat. A watchdog
+    thread checks the heartbeat; when it is more than `threshold` seconds
+    overdue, some callback or coroutine step is still running, and the
+    watchdog logs the loop thread's stack at that moment, which is the
+    blocking code, with the session ID and the task being run. When the loop
+    comes back the total stall is logged and counted.
+
+    The loop pays for one wakeup per interval; the watchdog only reads the
+    heartbeat until something stalls.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        *,
+        session_id: str = "",
+        interval: float = LOOP_PROBE_INTERVAL,
+        threshold: float = SLOW_CALLBACK_THRESHOLD,
+    ):
+        self._loop = loop
+        self.session_id = session_id
+        self._interval = interval
+        self._threshold = threshold
+        self._heartbeat = time.monotonic()
+        self._reported: float | None = None
+        self._thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._probe: asyncio.Task | None = None
+        self.stalls = 0
+
+    def start(self) -> None:
+        self._probe = self._loop.create_task(self._run_probe())
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    async def aclose(self) -> None:
+        self._stopped.set()
+        if self._probe is not None:
+            self._probe.cancel()
+            self._probe = None
+        _monitors.pop(self._loop, None)
+
+    async def _run_probe(self) -> None:
+        while True:
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self._interval)
+            lag = max(time.monotonic() - self._heartbeat - self._interval, 0.0)
+            LOOP_LAG.observe(lag)
+            if lag >= self._threshold:
+                self.stalls += 1
+                LOOP_STALLS.inc()
+                logger.warning(f"Event loop was blocked for {lag * 1000:.0f} ms (session {self.session_id})")
+
+    def _watch(self) -> None:
+        poll = self._threshold / 2
+        while not self._stopped.wait(poll):
+            heartbeat = self._heartbeat
+            overdue = time.monotonic() - heartbeat - self._interval
+            if overdue < self._threshold or self._reported == heartbeat:
+                continue
+            # one report per stall; the heartbeat moves on once the loop is back
+            self._reported = heartbeat
+            self._report(overdue)
+
+    def _report(self, overdue: float) -> None:
+        frame = sys._current_frames().get(self._thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "(no stack)\n"
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        task_name = task.get_name() if task is not None else "(callback)"
+        logger.warning(
+            f"Event loop blocked for {overdue * 1000:.0f} ms so far "
+            f"(session {self.session_id}, task {task_name}), running:\n{stack}"
+        )
+
+
+_monitors: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LoopMonitor]" = weakref.WeakKeyDictionary()
+
+
+def watch_loop(session_id: str, **kwargs) -> LoopMonitor:
+    """Monitor the running loop, once per loop; a job's loop runs only that job's session."""
+    loop = asyncio.get_running_loop()
+    monitor = _monitors.get(loop)
+    if monitor is None:
+        monitor = _monitors[loop] = LoopMonitor(loop, session_id=session_id, **kwargs)
+        monitor.start()
+    monitor.session_id = session_id
+    return monitor
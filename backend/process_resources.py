@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+import aiohttp
+import openai as openai_sdk
+from livekit.agents import JobProcess
+from livekit.plugins import deepgram, silero
+
+from http_pool import shared_pool
+from speech_stream import SpeechSegmenter
+from tts_cache import TTSCache
+
+logger = logging.getLogger("process-resources")
+
+AZURE_API_VERSION = "2024-08-01-preview"
+
+
+@dataclass
+class ProcessResources:
+    """Heavy, session-independent resources loaded once per worker process.
+
+    The worker runs `prewarm_process` in every job process before it is
+    handed a job, so loading these is off the job-start path. Sessions borrow
+    them from `ctx.proc.userdata` instead of building their own:
+
+    - the Silero VAD model (an ONNX session),
+    - the Azure OpenAI client, on the process's pooled httpx client, with
+      the SDK's chat resource (imported on first use) already imported,
+    - the TTS phrase cache; missing phrases are synthesized on a background
+      thread, so a slow TTS provider cannot hold up the process start.
+
+    Deepgram's STT and TTS use an aiohttp session, which has to be opened on
+    the job's event loop; the entrypoints take it from `shared_pool()`.
+    """
+
+    vad: silero.VAD
+    azure_client: openai_sdk.AsyncAzureOpenAI
+    tts_cache: TTSCache | None
+    load_times: dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def load(
+        cls,
+        *,
+        tts_model: str,
+        cached_phrases: list[str],
+        segmenter: SpeechSegmenter,
+        fill_timeout: float = 60.0,
+    ) -> "ProcessResources":
+        load_times = {}
+
+        start = time.perf_counter()
+        vad = silero.VAD.load()
+        load_times["vad"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        azure_client = azure_openai_client()
+        # the SDK imports its chat resource types on first access, which is slow
+        azure_client.chat.completions
+        load_times["azure_client"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tts_cache = load_tts_cache(tts_model, cached_phrases, segmenter, fill_timeout)
+        load_times["tts_cache"] = time.perf_counter() - start
+
+        logger.info(
+            "Process resources loaded: "
+            + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in load_times.items())
+        )
+        return cls(vad=vad, azure_client=azure_client, tts_cache=tts_cache, load_times=load_times)
+
+
+def azure_openai_client() -> openai_sdk.AsyncAzureOpenAI:
+    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+    # retries are handled by the livekit plugin, not the SDK
+    return openai_sdk.AsyncAzureOpenAI(
+        max_retries=0,
+        azure_endpoint=endpoint,
+        api_version=AZURE_API_VERSION,
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        http_client=shared_pool().client(endpoint) if endpoint else None,
+    )
+
+
+def load_tts_cache(
+    tts_model: str, cached_phrases: list[str], segmenter: SpeechSegmenter, fill_timeout: float = 60.0
+) -> TTSCache | None:
+    """Open the on-disk TTSCache and start synthesizing whichever of `cached_phrases` it is missing.
+
+    Runs in prewarm, inside livekit's initialize_process_timeout, so the
+    fill happens on a background thread with its own event loop and the
+    cache is returned right away. Until a phrase is filled in it is
+    synthesized live, like any other text.
+    """
+    try:
+        cache = TTSCache(
+            os.getenv("TTS_CACHE_DIR", "tts_cache"),
+            model=tts_model,
+            max_bytes=int(os.getenv("TTS_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        )
+    except OSError as e:
+        logger.warning(f"TTS cache disabled: {str(e)}")
+        return None
+    chunks = [chunk for phrase in cached_phrases for chunk in segmenter.split(phrase)]
+    cache.register(chunks)
+    if all(cache.get(chunk) is not None for chunk in chunks):
+        return cache
+
+    async def _fill():
+        async with aiohttp.ClientSession() as session:
+            await cache.fill(deepgram.TTS(model=tts_model, http_session=session), chunks)
+
+    def _run():
+        try:
+            asyncio.run(asyncio.wait_for(_fill(), timeout=fill_timeout))
+        except Exception as e:
+            logger.warning(f"TTS cache not fully populated: {str(e)}")
+
+    threading.Thread(target=_run, name="tts-cache-fill", daemon=True).start()
+    return cache
+
+
+def prewarm_process(
+    proc: JobProcess, *, tts_model: str, cached_phrases: list[str], segmenter: SpeechSegmenter
+) -> None:
+    proc.userdata["resources"] = ProcessResources.load(
+        tts_model=tts_model, cached_phrases=cached_phrases, segmenter=segmenter
+    )
@@ -0,0 +1,260 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Literal, NamedTuple
+
+import openai as openai_sdk
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions
+from livekit.agents.llm import ChatContext, ChatMessage, FunctionContext, ToolChoice
+from livekit.plugins import openai
+from livekit.plugins.openai import llm as openai_llm
+from livekit.plugins.openai.utils import build_oai_message
+
+logger = logging.getLogger("request-builder")
+
+
+@dataclass
+class RequestStats:
+    """Per-request serialization and prompt-cache counters."""
+
+    messages: int
+    reused: int
+    stable_prefix: int
+    stable_prefix_chars: int
+    serialize_ms: float
+    prompt_tokens: int | None = None
+    cached_tokens: int | None = None
+
+
+class _Serialized(NamedTuple):
+    signature: tuple
+    message: dict[str, Any]
+    chars: int
+
+
+def _signature(msg: ChatMessage) -> tuple:
+    content = tuple(msg.content) if isinstance(msg.content, list) else (msg.content,)
+    tool_calls = tuple(c.tool_call_id for c in msg.tool_calls) if msg.tool_calls is not None else None
+    return (msg.role, msg.name, msg.tool_call_id, tool_calls, content)
+
+
+def _same(a: tuple, b: tuple) -> bool:
+    if len(a) != len(b) or a[:4] != b[:4] or len(a[4]) != len(b[4]):
+        return False
+    # ChatContext.copy() keeps the content parts, so identity is the fast path
+    return all(x is y or (isinstance(x, str) and x == y) for x, y in zip(a[4], b[4]))
+
+
+class IncrementalRequestBuilder:
+    """Serializes a ChatContext into OpenAI messages, reusing unchanged ones.
+
+    Messages are remembered by ChatMessage.id. A message whose role, tool
+    calls and content parts are unchanged gets the exact dict it got last
+    time, so only new or edited messages are serialized and the leading part
+    of the request stays byte-identical from turn to turn, which is what
+    Azure's prompt cache matches on. Images are encoded against the builder
+    rather than the individual stream, so a raw VideoFrame is encoded once
+    instead of on every request.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self._entries: OrderedDict[str, _Serialized] = OrderedDict()
+        self._max_entries = max_entries
+
+    def build(self, chat_ctx: ChatContext) -> tuple[list[dict[str, Any]], RequestStats]:
+        start = time.perf_counter()
+        messages = []
+        reused = 0
+        stable_prefix = 0
+        stable_prefix_chars = 0
+        for msg in chat_ctx.messages:
+            signature = _signature(msg)
+            entry = self._entries.get(msg.id)
+            if entry is not None and _same(entry.signature, signature):
+                self._entries.move_to_end(msg.id)
+                reused += 1
+                if stable_prefix == len(messages):
+                    stable_prefix += 1
+                    stable_prefix_chars += entry.chars
+            else:
+                oai_msg = build_oai_message(msg, self)
+                entry = _Serialized(signature, oai_msg, len(json.dumps(oai_msg)))
+                self._entries[msg.id] = entry
+                self._entries.move_to_end(msg.id)
+            messages.append(entry.message)
+
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+        stats = RequestStats(
+            messages=len(messages),
+            reused=reused,
+            stable_prefix=stable_prefix,
+            stable_prefix_chars=stable_prefix_chars,
+            serialize_ms=(time.perf_counter() - start) * 1000,
+        )
+        return messages, stats
+
+
+class _RequestCompletions:
+    def __init__(self, completions, stream: "_PrefixCachedStream"):
+        self._completions = completions
+        self._stream = stream
+
+    async def create(self, *, messages, **kwargs):
+        # the plugin serialized the stream's empty placeholder context
+        stream = await self._completions.create(messages=self._stream.build_messages(), **kwargs)
+        return _UsageTapStream(stream, self._stream)
+
+
+class _RequestChat:
+    def __init__(self, chat, stream: "_PrefixCachedStream"):
+        self.completions = _RequestCompletions(chat.completions, stream)
+
+
+class _RequestClient:
+    """The OpenAI client as seen by one stream: sends the builder's messages and reads cached_tokens."""
+
+    def __init__(self, client: openai_sdk.AsyncClient, stream: "_PrefixCachedStream"):
+        self._client = client
+        self.chat = _RequestChat(client.chat, stream)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class _UsageTapStream:
+    def __init__(self, stream, owner: "_PrefixCachedStream"):
+        self._stream = stream
+        self._owner = owner
+
+    async def __aenter__(self):
+        await self._stream.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        return await self._stream.__aexit__(*exc)
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        async for chunk in self._stream:
+            if chunk.usage is not None:
+                self._owner.record_usage(chunk.usage)
+            yield chunk
+
+
+class _PrefixCachedStream(openai_llm.LLMStream):
+    """LLMStream whose request messages come from the LLM's IncrementalRequestBuilder.
+
+    The plugin's _run serializes `_chat_ctx` itself, so the stream hands it
+    an empty context and keeps the real one behind `chat_ctx`; the client
+    wrapper then sends the builder's messages in its place. Everything else
+    (tools, retries, chunk parsing) is the plugin's.
+    """
+
+    def __init__(self, llm: "PrefixCachedLLM", *, client: openai_sdk.AsyncClient, chat_ctx: ChatContext, **kwargs):
+        super().__init__(llm, client=_RequestClient(client, self), chat_ctx=ChatContext(), **kwargs)
+        self._request_ctx = chat_ctx
+        self.stats: RequestStats | None = None
+
+    @property
+    def chat_ctx(self) -> ChatContext:
+        return self._request_ctx
+
+    def build_messages(self) -> list[dict[str, Any]]:
+        messages, self.stats = self._llm.builder.build(self._request_ctx)
+        return messages
+
+    def record_usage(self, usage: Any) -> None:
+        if self.stats is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.stats.prompt_tokens = usage.prompt_tokens
+        self.stats.cached_tokens = (getattr(details, "cached_tokens", None) or 0) if details else 0
+        self._llm._record(self.stats)
+
+
+class PrefixCachedLLM(openai.LLM):
+    """openai.LLM that serializes requests incrementally and reports prompt-cache hits.
+
+    Every chat() request is built with an IncrementalRequestBuilder shared
+    by the instance. Once the usage chunk arrives, the request's
+    RequestStats (serialization time, reused messages, stable prefix and
+    the cached_tokens Azure reports) is logged and kept in `last_stats`.
+    """
+
+    def __init__(self, *, client: openai_sdk.AsyncClient, **kwargs):
+        super().__init__(client=client, **kwargs)
+        self.builder = IncrementalRequestBuilder()
+        self.last_stats: RequestStats | None = None
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    @staticmethod
+    def with_azure(
+        *,
+        model: str = "gpt-4o",
+        azure_endpoint: str | None = None,
+        azure_deployment: str | None = None,
+        api_version: str | None = None,
+        api_key: str | None = None,
+        **kwargs,
+    ) -> "PrefixCachedLLM":
+        client = openai_sdk.AsyncAzureOpenAI(
+            max_retries=0,
+            azure_endpoint=azure_endpoint,
+            azure_deployment=azure_deployment,
+            api_version=api_version,
+            api_key=api_key,
+        )
+        return PrefixCachedLLM(model=model, client=client, **kwargs)
+
+    def chat(
+        self,
+        *,
+        chat_ctx: ChatContext,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        fnc_ctx: FunctionContext | None = None,
+        temperature: float | None = None,
+        n: int | None = 1,
+        parallel_tool_calls: bool | None = None,
+        tool_choice: ToolChoice | Literal["auto", "required", "none"] | None = None,
+    ) -> "_PrefixCachedStream":
+        if parallel_tool_calls is None:
+            parallel_tool_calls = self._opts.parallel_tool_calls
+        if tool_choice is None:
+            tool_choice = self._opts.tool_choice
+        if temperature is None:
+            temperature = self._opts.temperature
+
+        return _PrefixCachedStream(
+            self,
+            client=self._client,
+            model=self._opts.model,
+            user=self._opts.user,
+            chat_ctx=chat_ctx,
+            fnc_ctx=fnc_ctx,
+            conn_options=conn_options,
+            n=n,
+            temperature=temperature,
+            parallel_tool_calls=parallel_tool_calls,
+            tool_choice=tool_choice,
+        )
+
+    def _record(self, stats: RequestStats) -> None:
+        self.last_stats = stats
+        self.requests += 1
+        self.prompt_tokens += stats.prompt_tokens or 0
+        self.cached_tokens += stats.cached_tokens or 0
+        logger.info(
+            f"LLM request: {stats.messages} messages ({stats.reused} reused, "
+            f"stable prefix {stats.stable_prefix} / ~{stats.stable_prefix_chars // 4} tokens), "
+            f"serialized in {stats.serialize_ms:.2f} ms, "
+            f"{stats.cached_tokens}/{stats.prompt_tokens} prompt tokens cached "
+            f"(session {self.cached_tokens}/{self.prompt_tokens})"
+        )
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import re
+import time
+
+from livekit.agents import tts, utils
+
+from tts_cache import TTSCache
+
+logger = logging.getLogger("speech-stream")
+
+_SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s")
+_CLAUSE_END = re.compile(r"(?:[.!?]+[\"')\]]*|[,;:—])\s")
+
+
+class SpeechSegmenter:
+    """Splits streamed LLM text into speakable chunks.
+
+    A chunk ends at a sentence boundary (or also at a clause boundary, i.e.
+    a comma, semicolon, colon or dash, when `clauses` is set) once it holds
+    at least `min_chars` characters. Shorter pieces are carried into the next
+    chunk so the TTS is not asked to voice "Okay." on its own.
+    """
+
+    def __init__(self, *, min_chars: int = 20, clauses: bool = False):
+        self._min_chars = min_chars
+        self._pattern = _CLAUSE_END if clauses else _SENTENCE_END
+        self._buffer = ""
+
+    def push(self, text: str) -> list[str]:
+        self._buffer += text
+        chunks = []
+        start = 0
+        for match in self._pattern.finditer(self._buffer):
+            chunk = self._buffer[start:match.end()].strip()
+            if len(chunk) >= self._min_chars:
+                chunks.append(chunk)
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        return chunks
+
+    def flush(self) -> str | None:
+        chunk, self._buffer = self._buffer.strip(), ""
+        return chunk or None
+
+    def split(self, text: str) -> list[str]:
+        """Chunks for a complete text, e.g. a fixed phrase to put in the TTS cache."""
+        chunks = self.push(text)
+        rest = self.flush()
+        return chunks + [rest] if rest else chunks
+
+
+class SentenceStreamingTTS(tts.TTS):
+    """Streaming TTS wrapper that flushes the wrapped stream at every speakable chunk.
+
+    VoiceAssistant pushes the whole LLM reply into one TTS stream and only
+    ends the input after the last token. Deepgram synthesizes on flush, so
+    without this wrapper the first audio waits for the complete reply. Here
+    each chunk produced by SpeechSegmenter is pushed and flushed as soon as
+    it is ready. Chunks found in `cache` are played from it without a
+    request. Time to first audio is measured per stream (from the moment the
+    stream is opened, which is when the reply starts, and from the first
+    text pushed) and logged; the latest values are kept on the instance.
+    """
+
+    def __init__(
+        self,
+        wrapped: tts.TTS,
+        *,
+        min_chars: int = 20,
+        clauses: bool = False,
+        cache: TTSCache | None = None,
+    ):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=True),
+            sample_rate=wrapped.sample_rate,
+            num_channels=wrapped.num_channels,
+        )
+        self._wrapped = wrapped
+        self._min_chars = min_chars
+        self._clauses = clauses
+        self._cache = cache
+        self.last_time_to_first_audio: float | None = None
+        self.last_text_to_first_audio: float | None = None
+
+        @wrapped.on("metrics_collected")
+        def _forward_metrics(*args, **kwargs):
+            self.emit("metrics_collected", *args, **kwargs)
+
+    def synthesize(self, text: str, *, conn_options=None) -> tts.ChunkedStream:
+        return self._wrapped.synthesize(text, conn_options=conn_options)
+
+    def stream(self, *, conn_options=None) -> "SentenceSynthesizeStream":
+        return SentenceSynthesizeStream(
+            tts=self,
+            wrapped=self._wrapped,
+            segmenter=self.segmenter(),
+            cache=self._cache,
+            conn_options=conn_options,
+        )
+
+    def segmenter(self) -> SpeechSegmenter:
+        return SpeechSegmenter(min_chars=self._min_chars, clauses=self._clauses)
+
+    def prewarm(self) -> None:
+        self._wrapped.prewarm()
+        # deepgram.TTS keeps a websocket pool but does not open it in prewarm()
+        pool = getattr(self._wrapped, "_pool", None)
+        if isinstance(pool, utils.ConnectionPool):
+            pool.prewarm()
+
+    async def warm(self, texts: list[str]) -> None:
+        """Open the TTS connection and make sure `texts` can be played from the cache."""
+        self.prewarm()
+        if self._cache is not None:
+            segmenter = self.segmenter()
+            await self._cache.fill(self._wrapped, [chunk for text in texts for chunk in segmenter.split(text)])
+
+    def _record_first_audio(self, time_to_first_audio: float, text_to_first_audio: float) -> None:
+        self.last_time_to_first_audio = time_to_first_audio
+        self.last_text_to_first_audio = text_to_first_audio
+        logger.info(
+            f"First audio after {time_to_first_audio * 1000:.0f} ms "
+            f"({text_to_first_audio * 1000:.0f} ms after the first text)"
+        )
+
+
+class SentenceSynthesizeStream(tts.SynthesizeStream):
+    def __init__(
+        self,
+        *,
+        tts: SentenceStreamingTTS,
+        wrapped: "tts.TTS",
+        segmenter: SpeechSegmenter,
+        cache: TTSCache | None = None,
+        conn_options=None,
+    ):
+        super().__init__(tts=tts, conn_options=conn_options)
+        self._wrapped = wrapped
+        self._segmenter = segmenter
+        self._cache = cache
+        self._opened = time.perf_counter()
+        self._first_text: float | None = None
+        self.segments = 0
+
+    async def _metrics_monitor_task(self, event_aiter) -> None:
+        pass  # the wrapped TTS reports its own metrics
+
+    async def _run(self) -> None:
+        inner = self._wrapped.stream(conn_options=self._conn_options)
+        inner_events = inner.__aiter__()
+        chunks = asyncio.Queue[str | None]()
+        first_audio = True
+
+        def _emit(audio: tts.SynthesizedAudio) -> None:
+            nonlocal first_audio
+            if first_audio:
+                first_audio = False
+                now = time.perf_counter()
+                self._tts._record_first_audio(now - self._opened, now - (self._first_text or now))
+            self._event_ch.send_nowait(audio)
+
+        async def _forward_input():
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    # None ends _synthesize, so an empty flush must not be queued
+                    if rest := self._segmenter.flush():
+                        chunks.put_nowait(rest)
+                    continue
+                if self._first_text is None:
+                    self._first_text = time.perf_counter()
+                for chunk in self._segmenter.push(data):
+                    chunks.put_nowait(chunk)
+            if rest := self._segmenter.flush():
+                chunks.put_nowait(rest)
+            chunks.put_nowait(None)
+
+        async def _synthesize():
+            # one chunk at a time so cached and synthesized audio play in order
+            while (chunk := await chunks.get()) is not None:
+                if not any(c.isalnum() for c in chunk):
+                    continue
+                self.segments += 1
+                cached = self._cache.get(chunk) if self._cache is not None else None
+                if cached is not None:
+                    segment_id = utils.shortuuid()
+                    for i, frame in enumerate(cached):
+                        _emit(tts.SynthesizedAudio(
+                            frame=frame,
+                            request_id="cache",
+                            segment_id=segment_id,
+                            is_final=i == len(cached) - 1,
+                        ))
+                    continue
+
+                inner.push_text(chunk)
+                inner.flush()
+                frames = []
+                async for audio in inner_events:
+                    _emit(audio)
+                    frames.append(audio.frame)
+                    if audio.is_final:
+                        break
+                if self._cache is not None and self._cache.registered(chunk):
+                    self._cache.put(chunk, frames)
+            inner.end_input()
+
+        tasks = [
+            asyncio.create_task(_forward_input()),
+            asyncio.create_task(_synthesize()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await utils.aio.gracefully_cancel(*tasks)
+            await inner.aclose()
@@ -1,13 +1,9 @@
-import asyncio
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated
 import os
+import time
 import logging
-import json
-import inspect
-from datetime import datetime
-from functools import wraps
 from livekit import agents, rtc
-from livekit.agents import JobContext, WorkerOptions, cli, tokenize, tts
+from livekit.agents import AutoSubscribe, JobContext, JobExecutorType, JobProcess, WorkerOptions, cli
 from livekit.agents.llm import (
     ChatContext,
     ChatImage,
@@ -15,62 +11,54 @@ from livekit.agents.llm import (
 )
 from dotenv import load_dotenv
 from livekit.agents.voice_assistant import VoiceAssistant
-from livekit.plugins import deepgram, openai, silero
-
-# Enhanced logging setup
-def setup_logging():
-    log_directory = "logs"
-    if not os.path.exists(log_directory):
-        os.makedirs(log_directory)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = f"{log_directory}/assistant_{timestamp}.log"
-    
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
-    )
-    return logging.getLogger(__name__)
-
-logger = setup_logging()
-
-# Decorator for function logging
-def log_function_call(func):
-    @wraps(func)
-    async def wrapper(*args, **kwargs):
-        func_name = func.__name__
-        logger.info(f"{'='*50}")
-        logger.info(f"ENTERING FUNCTION: {func_name}")
-        logger.info(f"Arguments: {args[1:] if len(args) > 1 else 'No positional args'}")
-        logger.info(f"Keyword Arguments: {kwargs if kwargs else 'No keyword args'}")
-        
-        try:
-            result = await func(*args, **kwargs)
-            logger.info(f"FUNCTION {func_name} completed successfully")
-            logger.info(f"Return value: {result}")
-            return result
-        except Exception as e:
-            logger.error(f"ERROR in function {func_name}: {str(e)}", exc_info=True)
-            raise
-        finally:
-            logger.info(f"EXITING FUNCTION: {func_name}")
-            logger.info(f"{'='*50}")
-    
-    return wrapper
+import agent_metrics
+from app_logging import log_function_call, setup_job_logging, setup_logging
+from bootstrap import SessionBootstrap
+from context_window import ContextWindow
+from conversation_journal import ConversationJournal, message_content
+from frame_ring import FrameRing
+from frame_sampler import FrameSampler
+from image_retention import apply_image_retention
+from image_store import image_store
+from loop_health import watch_loop
+from speech_stream import SentenceStreamingTTS, SpeechSegmenter
+from track_manager import VideoTrackManager
+from transcript_store import index_journal
+from tracing import TurnTracer, trace_writer
+from turn_scheduler import TurnOutput, TurnScheduler
+from video_subscription import LazyVideoSubscription
+from vision_cache import VisionFrameCache
+from vision_intent import VisionIntentDetector, without_function
+
+if TYPE_CHECKING:
+    from process_resources import ProcessResources
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv(dotenv_path=".env.local")
-logger.info("Environment variables loaded from .env.local")
 
-# Log all environment variables (excluding sensitive values)
-env_vars = ['AZURE_OPENAI_ENDPOINT']
-for var in env_vars:
-    value = os.getenv(var)
-    logger.info(f"Environment variable {var}: {'[SET]' if value else '[NOT SET]'}")
+
+def log_environment():
+    """Log which environment variables are set (never their values)."""
+    logger.info("Environment variables loaded from .env.local")
+    env_vars = ['AZURE_OPENAI_ENDPOINT']
+    for var in env_vars:
+        value = os.getenv(var)
+        logger.info(f"Environment variable {var}: {'[SET]' if value else '[NOT SET]'}")
+
+
+TTS_MODEL = "aura-stella-en"
+TTS_MIN_CHUNK_CHARS = int(os.getenv("TTS_MIN_CHUNK_CHARS", "20"))
+TTS_CLAUSES = os.getenv("TTS_SEGMENTATION", "sentence") == "clause"
+GREETING = "Hi Patient, i am Philip. What's bring you today here?"
+CACHED_PHRASES = [
+    GREETING,
+    "While I can provide initial guidance, this doesn't replace a medical examination.",
+    "For urgent medical concerns, please seek immediate emergency care.",
+    "Any image analysis provided is preliminary and requires professional verification.",
+    "All information shared is confidential and protected.",
+]
 
 class AssistantFunction(agents.llm.FunctionContext):
     """This class is used to define functions that will be called by the assistant."""
@@ -101,30 +89,59 @@ class AssistantFunction(agents.llm.FunctionContext):
             
             
            
-@log_function_call
-async def get_video_track(room: rtc.Room):
-    """Get the first video track from the room."""
-    logger.info(f"Searching for video track in room: {room.name}")
-    video_track = asyncio.Future[rtc.RemoteVideoTrack]()
-
-    for pid, participant in room.remote_participants.items():
-        logger.debug(f"Examining participant {pid}")
-        for tid, track_publication in participant.track_publications.items():
-            logger.debug(f"Checking track {tid}")
-            if track_publication.track is not None and isinstance(
-                track_publication.track, rtc.RemoteVideoTrack
-            ):
-                logger.info(f"Found suitable video track: {track_publication.track.sid}")
-                video_track.set_result(track_publication.track)
-                break
-
-    return await video_track
+
+def prewarm(proc: JobProcess):
+    """Load the VAD, the Azure client and the TTS phrase cache once per worker process."""
+    setup_job_logging()
+    agent_metrics.start_exporter()
+    # provider SDKs are imported here, in the job process, rather than when the
+    # worker starts; the entrypoint's imports of them are then free
+    import request_builder  # noqa: F401
+    from process_resources import prewarm_process
+
+    prewarm_process(
+        proc,
+        tts_model=TTS_MODEL,
+        cached_phrases=CACHED_PHRASES,
+        segmenter=SpeechSegmenter(min_chars=TTS_MIN_CHUNK_CHARS, clauses=TTS_CLAUSES),
+    )
+
 
 @log_function_call
 async def entrypoint(ctx: JobContext):
     logger.info("Starting application entrypoint")
-    await ctx.connect()
-    logger.info(f"Connected to room: {ctx.room.name}")
+    # already imported by prewarm
+    from livekit.plugins import deepgram, openai
+
+    from http_pool import shared_pool
+    from request_builder import PrefixCachedLLM
+
+    resources: "ProcessResources" = ctx.proc.userdata["resources"]
+    bootstrap = SessionBootstrap(ctx)
+    loop_monitor = watch_loop(ctx.job.room.name)
+    ctx.add_shutdown_callback(loop_monitor.aclose)
+    http = shared_pool()
+    # the pool is shared by the process's jobs; only this loop's session is closed
+    ctx.add_shutdown_callback(http.aclose_loop)
+    # open the Azure connection now so the first turn skips the TLS handshake
+    http.keep_warm(
+        [os.getenv("AZURE_OPENAI_ENDPOINT")],
+        interval=float(os.getenv("HTTP_KEEP_WARM_INTERVAL", "60")),
+    )
+    lazy_video = os.getenv("VIDEO_SUBSCRIPTION", "always") == "lazy"
+    session_tts = SentenceStreamingTTS(
+        deepgram.TTS(model=TTS_MODEL, http_session=http.aiohttp_session()),
+        min_chars=TTS_MIN_CHUNK_CHARS,
+        clauses=TTS_CLAUSES,
+        cache=resources.tts_cache,
+    )
+    # connect and get the greeting ready while the rest of the session is set up
+    bootstrap.start(
+        auto_subscribe=AutoSubscribe.AUDIO_ONLY if lazy_video else AutoSubscribe.SUBSCRIBE_ALL,
+        tts=session_tts,
+        greeting=GREETING,
+    )
+    track_manager = VideoTrackManager(ctx.room)
 
     logger.info("Initializing chat context")
     chat_context = ChatContext(
@@ -297,29 +314,110 @@ Remember: Always prioritize patient safety and well-being. When in doubt, recomm
     )
 
     # logger.info("Initializing Azure GPT")
-    azuregpt = openai.LLM.with_azure(
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),  
-        api_version="2024-08-01-preview",
-        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-        model="gpt-4"
-    )
+    azuregpt = PrefixCachedLLM(model="gpt-4", client=resources.azure_client)
 
     # logger.info("Initializing Google AI")
     # google = openai.LLM.with_vertex(model="google/gemini-2.0-flash-exp")
 
-    latest_image: rtc.VideoFrame | None = None
+    frame_sampler = FrameSampler(
+        target_fps=float(os.getenv("VIDEO_SAMPLE_FPS", "2")),
+        max_width=int(os.getenv("VIDEO_SAMPLE_MAX_WIDTH", "1024")),
+        max_height=int(os.getenv("VIDEO_SAMPLE_MAX_HEIGHT", "1024")),
+    )
+    vision_profile = os.getenv("VISION_PROFILE", "standard")
+    images_inline = int(os.getenv("CHAT_IMAGES_INLINE", "1"))
+    frame_ring = FrameRing(max_bytes=int(os.getenv("VIDEO_RING_MAX_BYTES", str(4 * 1024 * 1024))))
+    vision_cache = VisionFrameCache()
+    vision_cache.start(frame_sampler, frame_ring, window=float(os.getenv("VISION_BEST_FRAME_WINDOW", "2")))
+    ctx.add_shutdown_callback(vision_cache.aclose)
+
+    video_subscription: LazyVideoSubscription | None = None
+    if lazy_video:
+        logger.info("Video will be subscribed on demand for vision turns")
+        video_subscription = LazyVideoSubscription(
+            ctx.room,
+            frame_sampler,
+            warm_window=float(os.getenv("VIDEO_WARM_WINDOW", "30")),
+            track_manager=track_manager,
+        )
+
+        @video_subscription.on("released")
+        def on_video_released():
+            frame_ring.clear()
+            vision_cache.clear()
+
+    vision_intent = VisionIntentDetector() if os.getenv("VISION_FAST_PATH", "1") == "1" else None
+
+    images = image_store()
+    ctx.add_shutdown_callback(images.aflush)
+
+    async def _current_image() -> ChatImage | None:
+        """Best available camera frame for a vision turn."""
+        if video_subscription is not None:
+            await video_subscription.acquire()
+        image = vision_cache.get(vision_profile)
+        latest_image = frame_ring.latest() or frame_sampler.latest
+        if image is None and latest_image:
+            image = ChatImage(image=latest_image)
+        return image
+
+    # frames sent by _before_llm, by question, until the question is committed
+    attached_images: dict[str, ChatImage] = {}
+
+    async def _before_llm(assistant: VoiceAssistant, chat_ctx: ChatContext):
+        """Send the frame with the first request when the user explicitly asks to be looked at."""
+        user_msg = chat_ctx.messages[-1]
+        if vision_intent is None or not isinstance(user_msg.content, str):
+            return None
+        if not vision_intent.matches(user_msg.content):
+            return None
+        if video_subscription is not None and not video_subscription.ready:
+            # don't hold the first request while the camera is subscribed; the
+            # image tool, if the model calls it, finds the video already flowing
+            video_subscription.prefetch()
+            return None
+
+        start = time.perf_counter()
+        image = await _current_image()
+        if image is None:
+            return None
+        logger.info(f"Vision intent detected, image attached in {(time.perf_counter() - start) * 1000:.0f} ms")
+        await images.put(image)
+        # chat_ctx is the assistant's copy for this request; the frame joins
+        # the question in chat_context when the question is committed
+        attached_images[user_msg.content] = image
+        while len(attached_images) > 4:  # questions whose answer was cancelled are never committed
+            attached_images.pop(next(iter(attached_images)))
+        user_msg.content = [user_msg.content, image]
+        # the frame is already in the request, so the model has no reason to call the image tool
+        return assistant.llm.chat(chat_ctx=chat_ctx, fnc_ctx=without_function(assistant.fnc_ctx, "image"))
 
     logger.info("Setting up Voice Assistant")
     assistant = VoiceAssistant(
-        vad=silero.VAD.load(),
-        stt=deepgram.STT(),
+        vad=resources.vad,
+        stt=deepgram.STT(http_session=http.aiohttp_session()),
         llm=azuregpt,
-        tts=deepgram.TTS(
-            model="aura-stella-en",
-        ),
+        tts=session_tts,
         fnc_ctx=AssistantFunction(),
         chat_ctx=chat_context,
+        before_llm_cb=_before_llm,
+    )
+    tracer = TurnTracer(trace_writer(), session_id=ctx.job.room.name)
+    tracer.attach(assistant, llm=azuregpt, tts=session_tts)
+    ctx.add_shutdown_callback(tracer.aclose)
+    agent_metrics.instrument_session(ctx, assistant, agent="superagent", llm=azuregpt, tts=session_tts, stt=assistant.stt)
+    # the finished session is indexed for search before it is archived
+    journal = ConversationJournal.create(ctx.job.room.name, agent="superagent", on_closed=index_journal)
+    ctx.add_shutdown_callback(journal.aclose)
+
+    # summaries use a plain openai.LLM on the same client, so they neither count
+    # towards PrefixCachedLLM's prompt-cache stats nor churn its request builder
+    context_window = ContextWindow(
+        openai.LLM(model="gpt-4", client=resources.azure_client),
+        max_tokens=int(os.getenv("CHAT_CONTEXT_MAX_TOKENS", "6000")),
+        keep_turns=int(os.getenv("CHAT_CONTEXT_KEEP_TURNS", "6")),
     )
+    ctx.add_shutdown_callback(context_window.aclose)
 
     chat = rtc.ChatManager(ctx.room)
     logger.info("Chat manager initialized")
@@ -327,28 +425,39 @@ Remember: Always prioritize patient safety and well-being. When in doubt, recomm
     @log_function_call
     async def _answer(text: str, use_image: bool = False):
         """Generate and deliver response."""
-        logger.info(f"Generating answer for text: {text[:100]}...")
-        logger.info(f"Using image: {use_image}")
+        tracer.ensure_turn("image" if use_image else "chat")
+        with tracer.span("answer", use_image=use_image):
+            logger.info(f"Generating answer for text: {text[:100]}...")
+            logger.info(f"Using image: {use_image}")
         
-        content: list[str | ChatImage] = [text]
-        if use_image and latest_image:
-            logger.info("Adding image to response")
-            content.append(ChatImage(image=latest_image))
-
-        logger.info("Updating chat context")
-        chat_context.messages.append(ChatMessage(role="user", content=content))
-
-        logger.info("Generating chat response")
-        stream = azuregpt.chat(chat_ctx=chat_context)
-        logger.info("Delivering response through assistant")
-        await assistant.say(stream, allow_interruptions=True)
+            content: list[str | ChatImage] = [text]
+            if use_image:
+                image = await _current_image()
+                if image:
+                    logger.info("Adding image to response")
+                    await images.put(image)
+                    content.append(image)
+
+            logger.info("Updating chat context")
+            chat_context.messages.append(ChatMessage(role="user", content=content))
+            journal.append("user", message_content(content), source="image" if use_image else "chat")
+            apply_image_retention(chat_context, keep_last=images_inline)
+
+            logger.info("Generating chat response")
+            stream = azuregpt.chat(chat_ctx=chat_context)
+            logger.info("Delivering response through assistant")
+            speech = await assistant.say(stream, allow_interruptions=True)
+            return TurnOutput(stream, speech)
+
+    turns = TurnScheduler(_answer, coalesce_window=float(os.getenv("CHAT_COALESCE_WINDOW", "0.35")))
+    ctx.add_shutdown_callback(turns.aclose)
 
     @chat.on("message_received")
     def on_message_received(msg: rtc.ChatMessage):
         """Handle incoming messages."""
         if msg.message:
             logger.info(f"Received message: {msg.message}")
-            asyncio.create_task(_answer(msg.message, use_image=False))
+            turns.submit(msg.message)
 
     @assistant.on("function_calls_finished")
     def on_function_calls_finished(called_functions: list[agents.llm.CalledFunction]):
@@ -362,35 +471,81 @@ Remember: Always prioritize patient safety and well-being. When in doubt, recomm
             logger.info(f"Processing result from function: {function.name}")
             logger.info(f"Function arguments: {function.call_info.arguments}")
             logger.info(f"Function result: {function.result}")
+            journal.append(
+                "tool", function.result, name=function.name, arguments=function.call_info.arguments
+            )
             
             if function.name == "image":
                 user_msg = function.call_info.arguments.get("user_msg")
                 if user_msg:
                     logger.info(f"Creating image response task for: {user_msg}")
-                    asyncio.create_task(_answer(user_msg, use_image=True))
+                    turns.submit(user_msg, use_image=True, coalesce=False)
             
 
+    @assistant.on("user_speech_committed")
+    def on_user_speech_committed(msg: ChatMessage):
+        image = attached_images.pop(msg.content, None) if isinstance(msg.content, str) else None
+        if image is not None:
+            # msg is the question as appended to chat_context: keep the frame
+            # the answer was given from with it for the turns that follow
+            msg.content = [msg.content, image]
+            apply_image_retention(chat_context, keep_last=images_inline)
+        journal.append("user", message_content(msg.content), source="voice")
+
+    @assistant.on("agent_speech_committed")
+    def on_agent_speech_committed(msg: ChatMessage):
+        journal.append("assistant", message_content(msg.content))
+
+    @assistant.on("agent_speech_interrupted")
+    def on_agent_speech_interrupted(msg: ChatMessage):
+        journal.append("assistant", message_content(msg.content), interrupted=True)
+
+    @assistant.on("agent_speech_committed")
+    @assistant.on("agent_speech_interrupted")
+    def on_agent_speech_done(msg: ChatMessage):
+        """Fold old turns into the summary between turns, off the request path."""
+        context_window.maybe_compact(chat_context)
+
+    if video_subscription is not None:
+        @assistant.on("function_calls_collected")
+        def on_function_calls_collected(function_calls: list[agents.llm.FunctionCallInfo]):
+            """Start subscribing to video while the image tool is still running."""
+            if any(fnc.function_info.name == "image" for fnc in function_calls):
+                video_subscription.prefetch()
+
+    await bootstrap.ready()
     logger.info("Starting assistant")
     assistant.start(ctx.room)
+    # watch the video of the participant the assistant listens to
+    track_manager.follow_first_participant()
 
-    await asyncio.sleep(1)
-    await assistant.say("Hi Patient, i am Philip. What's bring you today here?", allow_interruptions=True)
+    bootstrap.watch_first_audio(assistant)
+    await bootstrap.wait_for_participant_audio(timeout=float(os.getenv("GREETING_WAIT_TIMEOUT", "10")))
+    await assistant.say(GREETING, allow_interruptions=True)
 
     try:
-        while ctx.room.connection_state == rtc.ConnectionState.CONN_CONNECTED:
-            logger.info("Getting video track")
-            video_track = await get_video_track(ctx.room)
+        if video_subscription is not None:
+            return
 
-            logger.info("Starting video stream processing")
-            async for event in rtc.VideoStream(video_track):
-                latest_image = event.frame
+        logger.info("Starting video stream processing")
+        await track_manager.stream_into(frame_sampler)
     except Exception as e:
         logger.error(f"Error in main loop: {str(e)}", exc_info=True)
         raise
 
 
 if __name__ == "__main__":
+    # only the worker process logs to a file: job processes import this module
+    # too and forward their records to it
+    setup_logging()
+    log_environment()
+    agent_metrics.serve()
     logger.info("="*80)
     logger.info("STARTING APPLICATION")
     logger.info("="*80)
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    opts = WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm)
+    if opts.job_executor_type == JobExecutorType.THREAD:
+        # jobs run on threads of this process (the default on Windows), and
+        # livekit plugins can only be imported on the main thread
+        import process_resources, request_builder  # noqa: F401
+    cli.run_app(opts)
\ No newline at end of file
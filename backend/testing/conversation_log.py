@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger("conversation-log")
+
+
+class ConversationLogger:
+    """Streams a session's messages to a text log as the conversation goes.
+
+    `add_message` formats the line and queues it without waiting. A
+    background task writes the queued lines, from a thread, once
+    `flush_bytes` have built up or `flush_interval` seconds after the first
+    unwritten line, so memory stays flat however long the conversation is
+    and a crash loses at most one interval. The queue holds at most
+    `max_queue` lines: if the disk falls that far behind, messages are
+    dropped and counted rather than stalling the event loop.
+
+    Several sessions can log into the same file: every line carries the
+    session ID, and each batch is one append.
+    """
+
+    def __init__(
+        self,
+        path: str = "convo.txt",
+        *,
+        session_id: str = "",
+        max_queue: int = 1000,
+        flush_interval: float = 1.0,
+        flush_bytes: int = 64 * 1024,
+    ):
+        self.path = path
+        self.session_id = session_id
+        self.start_time = datetime.now()
+        self._max_queue = max_queue
+        self._flush_interval = flush_interval
+        self._flush_bytes = flush_bytes
+        self._lines: deque[str] = deque()
+        self._size = 0
+        self._pending = asyncio.Event()  # there are lines to write
+        self._flush_now = asyncio.Event()  # size threshold reached, or closing
+        self._closing = False
+        self._task: asyncio.Task | None = None
+        self._file = None
+        self.messages = 0
+        self.dropped = 0
+
+    def add_message(self, role: str, content: str):
+        """Add a message to the conversation log."""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._put(f"[{timestamp}] [{self.session_id}] {role.upper()}: {content}\n")
+        self.messages += 1
+
+    async def aclose(self):
+        """Write what is left and the end of conversation marker."""
+        if self._task is None:
+            return
+        self._put(f"Conversation End: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} [{self.session_id}]\n{'='*50}\n\n")
+        self._closing = True
+        self._flush_now.set()
+        await self._task
+        self._task = None
+        if self.dropped:
+            logger.warning(f"{self.dropped} messages were dropped from the conversation log")
+        logger.info(f"Conversation saved to {self.path}")
+
+    def _put(self, line: str):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            self._lines.append(
+                f"\n{'='*50}\nConversation Start: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')} [{self.session_id}]\n{'='*50}\n\n"
+            )
+        if len(self._lines) >= self._max_queue:
+            self.dropped += 1
+            return
+        self._lines.append(line)
+        self._size += len(line)
+        self._pending.set()
+        if self._size >= self._flush_bytes:
+            self._flush_now.set()
+
+    async def _run(self):
+        try:
+            while True:
+                await self._pending.wait()
+                try:
+                    await asyncio.wait_for(self._flush_now.wait(), self._flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._pending.clear()
+                self._flush_now.clear()
+                data = "".join(self._lines)
+                self._lines.clear()
+                self._size = 0
+                try:
+                    await asyncio.to_thread(self._write, data)
+                except OSError as e:
+                    logger.error(f"Failed to save conversation: {str(e)}")
+                if self._closing and not self._lines:
+                    return
+                if self._closing:
+                    self._flush_now.set()
+        finally:
+            if self._file is not None:
+                await asyncio.to_thread(self._file.close)
+                self._file = None
+
+    def _write(self, data: str):
+        if self._file is None:
+            # unbuffered, so a batch is a single append and never interleaves with another session's
+            self._file = open(self.path, "ab", buffering=0)
+        self._file.write(data.encode("utf-8"))
@@ -0,0 +1,64 @@
+import asyncio
+import logging
+import random
+from typing import Awaitable, TypeVar
+
+from livekit.agents import tts
+from livekit.agents.pipeline import VoicePipelineAgent
+
+from process_resources import load_tts_cache
+from speech_stream import SentenceStreamingTTS, SpeechSegmenter
+from tts_cache import TTSCache
+
+logger = logging.getLogger("fillers")
+
+T = TypeVar("T")
+
+
+def load_filler_cache(filler_messages: list[str], *, tts_model: str) -> TTSCache | None:
+    """Synthesize the filler lines into the TTS cache; call from prewarm."""
+    return load_tts_cache(tts_model, filler_messages, SpeechSegmenter())
+
+
+def with_cached_fillers(engine: tts.TTS, cache: TTSCache | None) -> tts.TTS:
+    """The agent's TTS, wrapped so that filler lines play from `cache` instead of being synthesized."""
+    return SentenceStreamingTTS(engine, cache=cache)
+
+
+async def run_with_filler(
+    agent: VoicePipelineAgent,
+    tool: Awaitable[T],
+    filler_messages: list[str],
+    *,
+    threshold: float = 0.5,
+) -> T:
+    """Run a tool call and only say a filler line if it is slow.
+
+    The tool starts immediately. If it has not finished after `threshold`
+    seconds, one of `filler_messages` is said so the user does not sit in
+    silence. Fillers are fixed lines synthesized by `load_filler_cache` at
+    prewarm; with a TTS from `with_cached_fillers` their audio is played
+    from the cache, so no TTS request sits on the latency path. A filler
+    whose audio has not started yet when the tool finishes is cancelled, so
+    a fast tool never pays for a whole extra utterance before its answer.
+    """
+    task = asyncio.ensure_future(tool)
+    done, _ = await asyncio.wait({task}, timeout=threshold)
+    if done:
+        return task.result()
+
+    message = random.choice(filler_messages)
+    logger.info(f"saying filler message: {message}")
+    # NOTE: add_to_chat_ctx=True adds the filler to the function call's chat
+    #   context, so the answer can follow on from it
+    say_task = asyncio.create_task(agent.say(message, add_to_chat_ctx=True))
+    try:
+        return await task
+    finally:
+        if not say_task.done():
+            say_task.cancel()
+        elif not say_task.cancelled() and say_task.exception() is None:
+            speech = say_task.result()
+            if not speech.synthesis_handle.tts_forwarder.played_text and speech.allow_interruptions:
+                logger.info("tool finished before the filler started playing, cancelling it")
+                speech.interrupt()
@@ -1,11 +1,10 @@
 import logging
-import random
 import re
 import os
+import sys
 import urllib.parse
 from typing import Annotated
 
-import aiohttp
 from dotenv import load_dotenv
 from livekit.agents import (
     AutoSubscribe,
@@ -18,6 +17,12 @@ from livekit.agents import (
 from livekit.agents.pipeline import AgentCallContext, VoicePipelineAgent
 from livekit.plugins import deepgram, openai, silero
 
+# the demos are run from this directory; the connection pool and the TTS
+# cache the fillers play from live in backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fillers import load_filler_cache, run_with_filler, with_cached_fillers  # noqa: E402
+from http_pool import shared_pool  # noqa: E402
+
 # Load environment variables
 load_dotenv('.env.local')
 
@@ -25,6 +30,16 @@ load_dotenv('.env.local')
 logger = logging.getLogger("weather-assistant")
 logger.setLevel(logging.INFO)
 
+# Only say a filler if the tool is still running after this many seconds
+FILLER_THRESHOLD = float(os.getenv("FILLER_THRESHOLD", "0.5"))
+# fixed lines, so they can be synthesized once at prewarm and played from the TTS cache
+FILLER_MESSAGES = [
+    "Checking the weather for you.",
+    "Let me fetch the current weather conditions.",
+    "A weather update is coming right up.",
+]
+TTS_MODEL = "aura-stella-en"
+
 class AssistantFunctions(llm.FunctionContext):
     """
     Defines LLM functions for the weather assistant.
@@ -42,22 +57,11 @@ class AssistantFunctions(llm.FunctionContext):
         # Get current agent context
         agent = AgentCallContext.get_current().agent
 
-        # Provide filler messages
-        if not agent.chat_ctx.messages or agent.chat_ctx.messages[-1].role != "assistant":
-            filler_messages = [
-                f"Checking the weather in {location} for you.",
-                f"Let me fetch the current weather conditions in {location}.",
-                f"Weather update for {location} coming right up."
-            ]
-            message = random.choice(filler_messages)
-            logger.info(f"Filler message: {message}")
-            await agent.say(message, add_to_chat_ctx=True)
-
-        # Fetch weather data
-        try:
-            url = f"https://wttr.in/{urllib.parse.quote(location)}?format=%C+%t"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
+        async def _fetch_weather() -> str:
+            # Fetch weather data
+            try:
+                url = f"https://wttr.in/{urllib.parse.quote(location)}?format=%C+%t"
+                async with shared_pool().aiohttp_session().get(url) as response:
                     if response.status == 200:
                         weather_data = await response.text()
                         formatted_weather = f"The weather in {location} is {weather_data.strip()}."
@@ -65,17 +69,27 @@ class AssistantFunctions(llm.FunctionContext):
                         return formatted_weather
                     else:
                         raise Exception(f"Weather API request failed: {response.status}")
-        except Exception as e:
-            logger.error(f"Weather retrieval error: {e}")
-            return f"Sorry, I couldn't retrieve the weather for {location}."
+            except Exception as e:
+                logger.error(f"Weather retrieval error: {e}")
+                return f"Sorry, I couldn't retrieve the weather for {location}."
+
+        # Provide a filler message if the lookup is still running after a moment
+        if agent.chat_ctx.messages and agent.chat_ctx.messages[-1].role == "assistant":
+            return await _fetch_weather()
+
+        return await run_with_filler(
+            agent, _fetch_weather(), FILLER_MESSAGES, threshold=FILLER_THRESHOLD
+        )
 
 def prewarm_process(proc: JobProcess):
     """Preload Silero VAD for faster session initialization."""
     proc.userdata["vad"] = silero.VAD.load()
+    proc.userdata["fillers"] = load_filler_cache(FILLER_MESSAGES, tts_model=TTS_MODEL)
 
 async def entrypoint(ctx: JobContext):
     """Main entry point for the weather assistant."""
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    ctx.add_shutdown_callback(shared_pool().aclose_loop)
     
     # Initialize function context
     fnc_ctx = AssistantFunctions()
@@ -106,7 +120,10 @@ async def entrypoint(ctx: JobContext):
         vad=ctx.proc.userdata["vad"],
         stt=deepgram.STT(),
         llm=azuregpt,
-        tts=deepgram.TTS(model="aura-stella-en"),
+        tts=with_cached_fillers(
+            deepgram.TTS(model=TTS_MODEL, http_session=shared_pool().aiohttp_session()),
+            ctx.proc.userdata["fillers"],
+        ),
         fnc_ctx=fnc_ctx,
         chat_ctx=initial_chat_ctx,
     )
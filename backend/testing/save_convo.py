@@ -1,10 +1,8 @@
 # Program for saving the conversation history in json format for each chat messages
 import logging
-import random
 import os
+import sys
 from typing import Annotated
-from datetime import datetime
-from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, Email, To, Content
 from dotenv import load_dotenv
 
@@ -19,42 +17,31 @@ from livekit.agents import (
 from livekit.agents.pipeline import AgentCallContext, VoicePipelineAgent
 from livekit.plugins import deepgram, openai, silero
 
+from conversation_log import ConversationLogger
+
+# the demos are run from this directory; the connection pool and the TTS
+# cache the fillers play from live in backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fillers import load_filler_cache, run_with_filler, with_cached_fillers  # noqa: E402
+from http_pool import shared_pool  # noqa: E402
+
 # Load environment variables
 load_dotenv('.env.local')
 
 logger = logging.getLogger("email-assistant")
 logger.setLevel(logging.INFO)
 
-class ConversationLogger:
-    def __init__(self):
-        self.conversation = []
-        self.start_time = datetime.now()
-
-    def add_message(self, role: str, content: str):
-        """Add a message to the conversation log."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.conversation.append({
-            "timestamp": timestamp,
-            "role": role,
-            "content": content
-        })
-
-    def save_to_file(self):
-        """Save the conversation to convo.txt."""
-        try:
-            with open("convo.txt", "a", encoding="utf-8") as f:
-                f.write(f"\n{'='*50}\n")
-                f.write(f"Conversation Start: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Conversation End: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"{'='*50}\n\n")
-                
-                for msg in self.conversation:
-                    f.write(f"[{msg['timestamp']}] {msg['role'].upper()}: {msg['content']}\n")
-                
-                f.write(f"\n{'='*50}\n\n")
-            logger.info("Conversation saved to convo.txt")
-        except Exception as e:
-            logger.error(f"Failed to save conversation: {str(e)}")
+SENDGRID_API_URL = "https://api.sendgrid.com/v3/mail/send"
+
+# only say a filler if the tool is still running after this many seconds
+FILLER_THRESHOLD = float(os.getenv("FILLER_THRESHOLD", "0.5"))
+# fixed lines, so they can be synthesized once at prewarm and played from the TTS cache
+FILLER_MESSAGES = [
+    "I'll help you send that email right away.",
+    "Let me send that email for you.",
+    "Sending your email now.",
+]
+TTS_MODEL = "aura-stella-en"
 
 class EmailAssistantFnc(llm.FunctionContext):
     """
@@ -78,71 +65,76 @@ class EmailAssistantFnc(llm.FunctionContext):
         agent = AgentCallContext.get_current().agent
         conversation_logger = agent.conversation_logger  # Access the logger
 
-        # Filler messages while processing
-        if not agent.chat_ctx.messages or agent.chat_ctx.messages[-1].role != "assistant":
-            filler_messages = [
-                "I'll help you send that email right away.",
-                "Let me send that email for you.",
-                "Sending your email now."
-            ]
-            message = random.choice(filler_messages)
-            logger.info(f"saying filler message: {message}")
-            conversation_logger.add_message("assistant", message)  # Log the filler message
-            speech_handle = await agent.say(message, add_to_chat_ctx=True)
-
-        logger.info(f"sending email to {to_email}")
+        async def _send_email() -> str:
+            logger.info(f"sending email to {to_email}")
         
-        try:
-            # Initialize SendGrid
-            sg = SendGridAPIClient(api_key=os.getenv('SENDGRID_API_KEY'))
-            from_email = Email(
-                email=os.getenv('MAIL_DEFAULT_SENDER'),
-                name=os.getenv('MAIL_DEFAULT_SENDER_NAME', 'AI Assistant')
-            )
-
-            # Format email content
-            html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <body>
-                <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                    {body_content}
-                </div>
-            </body>
-            </html>
-            """
-
-            # Create and send email
-            message = Mail(
-                from_email=from_email,
-                to_emails=To(to_email),
-                subject=subject,
-                html_content=Content("text/html", html_content.strip())
-            )
+            try:
+                from_email = Email(
+                    email=os.getenv('MAIL_DEFAULT_SENDER'),
+                    name=os.getenv('MAIL_DEFAULT_SENDER_NAME', 'AI Assistant')
+                )
+
+                # Format email content
+                html_content = f"""
+                <!DOCTYPE html>
+                <html>
+                <body>
+                    <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+                        {body_content}
+                    </div>
+                </body>
+                </html>
+                """
+
+                # Create and send email
+                message = Mail(
+                    from_email=from_email,
+                    to_emails=To(to_email),
+                    subject=subject,
+                    html_content=Content("text/html", html_content.strip())
+                )
             
-            sg.send(message)
-            result = f"Email sent successfully to {to_email}"
-            logger.info(result)
+                # posted over the process's pooled connection rather than a new SendGridAPIClient one
+                async with shared_pool().aiohttp_session().post(
+                    SENDGRID_API_URL,
+                    json=message.get(),
+                    headers={"Authorization": f"Bearer {os.getenv('SENDGRID_API_KEY')}"},
+                ) as response:
+                    if response.status >= 400:
+                        raise Exception(f"SendGrid returned {response.status}: {await response.text()}")
+                result = f"Email sent successfully to {to_email}"
+                logger.info(result)
             
-            # Log the email details
-            conversation_logger.add_message("system", f"Email sent: To: {to_email}, Subject: {subject}")
+                # Log the email details
+                conversation_logger.add_message("system", f"Email sent: To: {to_email}, Subject: {subject}")
             
-            return result
+                return result
+
+            except Exception as e:
+                error_msg = f"Failed to send email: {str(e)}"
+                logger.error(error_msg)
+                conversation_logger.add_message("system", f"Error: {error_msg}")
+                raise Exception(error_msg)
+
+        # Filler message if sending is still running after a moment; it goes
+        # through agent.say, which also adds it to the conversation log
+        if agent.chat_ctx.messages and agent.chat_ctx.messages[-1].role == "assistant":
+            return await _send_email()
 
-        except Exception as e:
-            error_msg = f"Failed to send email: {str(e)}"
-            logger.error(error_msg)
-            conversation_logger.add_message("system", f"Error: {error_msg}")
-            raise Exception(error_msg)
+        return await run_with_filler(
+            agent, _send_email(), FILLER_MESSAGES, threshold=FILLER_THRESHOLD
+        )
 
 
 def prewarm_process(proc: JobProcess):
     # preload silero VAD in memory
     proc.userdata["vad"] = silero.VAD.load()
+    proc.userdata["fillers"] = load_filler_cache(FILLER_MESSAGES, tts_model=TTS_MODEL)
 
 
 async def entrypoint(ctx: JobContext):
     await ctx.connect(auto_subscribe=AutoSubscribe.SUBSCRIBE_ALL)
+    ctx.add_shutdown_callback(shared_pool().aclose_loop)
     fnc_ctx = EmailAssistantFnc()  # create our function context instance
     
     initial_chat_ctx = llm.ChatContext().append(
@@ -168,14 +160,15 @@ async def entrypoint(ctx: JobContext):
     )
     
     # Create a conversation logger instance
-    conversation_logger = ConversationLogger()
+    conversation_logger = ConversationLogger(session_id=ctx.room.name)
     
     agent = VoicePipelineAgent(
         vad=ctx.proc.userdata["vad"],
         stt=deepgram.STT(),
         llm=azuregpt,
-        tts=deepgram.TTS(
-            model="aura-stella-en",
+        tts=with_cached_fillers(
+            deepgram.TTS(model=TTS_MODEL, http_session=shared_pool().aiohttp_session()),
+            ctx.proc.userdata["fillers"],
         ),
         fnc_ctx=fnc_ctx,
         chat_ctx=initial_chat_ctx,
@@ -209,8 +202,8 @@ async def entrypoint(ctx: JobContext):
         # Wait for the session to complete
         await ctx.wait_for_disconnect()
     finally:
-        # Save the conversation when the session ends
-        conversation_logger.save_to_file()
+        # Write the rest of the conversation when the session ends
+        await conversation_logger.aclose()
 
 
 if __name__ == "__main__":
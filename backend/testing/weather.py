@@ -2,13 +2,12 @@
 
 
 import logging
-import random
 import re
 import os
+import sys
 import urllib
 from typing import Annotated
 
-import aiohttp
 from dotenv import load_dotenv
 from livekit.agents import (
     AutoSubscribe,
@@ -21,12 +20,28 @@ from livekit.agents import (
 from livekit.agents.pipeline import AgentCallContext, VoicePipelineAgent
 from livekit.plugins import deepgram, openai, silero
 
+# the demos are run from this directory; the connection pool and the TTS
+# cache the fillers play from live in backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fillers import load_filler_cache, run_with_filler, with_cached_fillers  # noqa: E402
+from http_pool import shared_pool  # noqa: E402
+
 # load_dotenv()
 load_dotenv('.env.local')
 
 logger = logging.getLogger("weather-demo")
 logger.setLevel(logging.INFO)
 
+# only say a filler if the tool is still running after this many seconds
+FILLER_THRESHOLD = float(os.getenv("FILLER_THRESHOLD", "0.5"))
+# fixed lines, so they can be synthesized once at prewarm and played from the TTS cache
+FILLER_MESSAGES = [
+    "Let me check the weather for you.",
+    "Let me see what the weather is like right now.",
+    "One moment while I look up the weather.",
+]
+TTS_MODEL = "aura-stella-en"
+
 
 class AssistantFnc(llm.FunctionContext):
     """
@@ -46,56 +61,43 @@ class AssistantFnc(llm.FunctionContext):
 
         # When a function call is running, there are a couple of options to inform the user
         # that it might take awhile:
-        # Option 1: you can use .say filler message immediately after the call is triggered
+        # Option 1: you can use .say filler message if the call is still running after a moment
         # Option 2: you can prompt the agent to return a text response when it's making a function call
         agent = AgentCallContext.get_current().agent
 
-        if (
-            not agent.chat_ctx.messages
-            or agent.chat_ctx.messages[-1].role != "assistant"
-        ):
-            # skip if assistant already said something
-            filler_messages = [
-                "Let me check the weather in {location} for you.",
-                "Let me see what the weather is like in {location} right now.",
-                # LLM will complete this sentence if it is added to the end of the chat context
-                "The current weather in {location} is ",
-            ]
-            message = random.choice(filler_messages).format(location=location)
-            logger.info(f"saying filler message: {message}")
-
-            # NOTE: set add_to_chat_ctx=True will add the message to the end
-            #   of the chat context of the function call for answer synthesis
-            speech_handle = await agent.say(message, add_to_chat_ctx=True)  # noqa: F841
-
-        logger.info(f"getting weather for {location}")
-        url = f"https://wttr.in/{urllib.parse.quote(location)}?format=%C+%t"
-        weather_data = ""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
+        async def _fetch_weather() -> str:
+            logger.info(f"getting weather for {location}")
+            url = f"https://wttr.in/{urllib.parse.quote(location)}?format=%C+%t"
+            async with shared_pool().aiohttp_session().get(url) as response:
                 if response.status == 200:
                     # response from the function call is returned to the LLM
                     weather_data = (
                         f"The weather in {location} is {await response.text()}."
                     )
                     logger.info(f"weather data: {weather_data}")
-                else:
-                    raise Exception(
-                        f"Failed to get weather data, status code: {response.status}"
-                    )
+                    return weather_data
+                raise Exception(
+                    f"Failed to get weather data, status code: {response.status}"
+                )
+
+        if agent.chat_ctx.messages and agent.chat_ctx.messages[-1].role == "assistant":
+            # skip the filler if assistant already said something
+            return await _fetch_weather()
 
-        # (optional) To wait for the speech to finish before giving results of the function call
-        # await speech_handle.join()
-        return weather_data
+        return await run_with_filler(
+            agent, _fetch_weather(), FILLER_MESSAGES, threshold=FILLER_THRESHOLD
+        )
 
 
 def prewarm_process(proc: JobProcess):
     # preload silero VAD in memory to speed up session start
     proc.userdata["vad"] = silero.VAD.load()
+    proc.userdata["fillers"] = load_filler_cache(FILLER_MESSAGES, tts_model=TTS_MODEL)
 
 
 async def entrypoint(ctx: JobContext):
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    ctx.add_shutdown_callback(shared_pool().aclose_loop)
     fnc_ctx = AssistantFnc()  # create our fnc ctx instance
     initial_chat_ctx = llm.ChatContext().append(
         text=(
@@ -129,8 +131,9 @@ async def entrypoint(ctx: JobContext):
         # llm=openai.LLM.with_vertex(model="google/gemini-2.0-flash-exp"),
         # llm=celebras,
         llm=azuregpt,
-        tts=deepgram.TTS(
-            model="aura-stella-en",
+        tts=with_cached_fillers(
+            deepgram.TTS(model=TTS_MODEL, http_session=shared_pool().aiohttp_session()),
+            ctx.proc.userdata["fillers"],
         ),
         fnc_ctx=fnc_ctx,
         chat_ctx=initial_chat_ctx,
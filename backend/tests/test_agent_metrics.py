@@ -0,0 +1,58 @@
+"""Job process snapshots as read by the metrics endpoint.
+
+Run from the backend directory:
+
+    python -m pytest tests
+"""
+import json
+import os
+
+import agent_metrics
+from agent_metrics import MetricsRegistry, merge_snapshots
+
+
+def _snapshot(calls: int, active: int) -> dict:
+    registry = MetricsRegistry()
+    registry.counter("calls_total", "Calls.").inc(calls)
+    registry.gauge("active", "Active.").inc(active)
+    return registry.snapshot()
+
+
+def _write(directory, name: str, metrics: dict, *, exited: bool = False, pid: int | None = None) -> None:
+    with open(os.path.join(directory, name), "w") as f:
+        json.dump({"pid": pid or os.getpid(), "interval": 5.0, "exited": exited, "metrics": metrics}, f)
+
+
+def _value(snapshots: list[dict], name: str) -> float:
+    samples = merge_snapshots(snapshots).get(name, {"samples": []})["samples"]
+    return sum(value for _, value in samples)
+
+
+def test_exited_jobs_are_folded_and_deleted(tmp_path):
+    _write(tmp_path, "100-1.json", _snapshot(3, 1))
+    _write(tmp_path, "101-1.json", _snapshot(5, 1), exited=True)
+    snapshots = agent_metrics._SnapshotDirectory(str(tmp_path))
+
+    first = snapshots.read()
+    assert _value(first, "calls_total") == 8
+    assert _value(first, "active") == 1  # an exited job's gauges no longer count
+    assert sorted(os.listdir(tmp_path)) == ["100-1.json", agent_metrics.RETIRED_NAME]
+
+    # the live job exits, and a new process reuses its pid
+    _write(tmp_path, "100-1.json", _snapshot(4, 0), exited=True)
+    _write(tmp_path, "100-2.json", _snapshot(1, 1))
+    second = snapshots.read()
+    assert _value(second, "calls_total") == 10
+    assert _value(second, "active") == 1
+
+    # the total survives a restart of the serving process
+    assert _value(agent_metrics._SnapshotDirectory(str(tmp_path)).read(), "calls_total") == 10
+
+
+def test_stale_snapshot_of_a_dead_process_is_folded(tmp_path):
+    _write(tmp_path, "1-1.json", _snapshot(2, 1), pid=2**22 + 12345)
+    os.utime(tmp_path / "1-1.json", (0, 0))
+    snapshots = agent_metrics._SnapshotDirectory(str(tmp_path))
+
+    assert _value(snapshots.read(), "calls_total") == 2
+    assert os.listdir(tmp_path) == [agent_metrics.RETIRED_NAME]
@@ -0,0 +1,71 @@
+"""Compaction of finished journals into per-session archives.
+
+Run from the backend directory:
+
+    python -m pytest tests
+"""
+import asyncio
+import os
+import threading
+
+from conversation_journal import ARCHIVE_DIR, ConversationJournal, compact, read_archive
+
+
+def _journal(directory: str, session_id: str, messages: int = 3) -> ConversationJournal:
+    journal = ConversationJournal(
+        os.path.join(directory, f"conversation_{session_id}.jsonl"), session_id=session_id, agent="test", flush_interval=0
+    )
+    for i in range(messages):
+        journal.append("user", f"message {i}")
+    return journal
+
+
+def test_each_session_gets_its_own_archive(tmp_path):
+    directory = str(tmp_path)
+    for session_id in ("a", "b"):
+        _journal(directory, session_id).close()
+    running = _journal(directory, "c")
+
+    assert compact(directory) == 2
+    assert sorted(os.listdir(os.path.join(directory, ARCHIVE_DIR))) == [
+        "conversation_a.jsonl.gz",
+        "conversation_b.jsonl.gz",
+    ]
+    assert os.listdir(directory).count("conversation_c.jsonl") == 1  # still being written
+    archived = dict(read_archive(directory))
+    assert [r["content"] for r in archived["conversation_a.jsonl"] if r["type"] == "message"] == [
+        "message 0", "message 1", "message 2"
+    ]
+    running.close()
+    assert compact(directory) == 1
+    assert len(dict(read_archive(directory))) == 3
+
+
+def test_concurrent_compactions_archive_every_session_once(tmp_path):
+    directory = str(tmp_path)
+    for i in range(20):
+        _journal(directory, f"s{i}").close()
+    counts = []
+    threads = [threading.Thread(target=lambda: counts.append(compact(directory))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not [name for name in os.listdir(directory) if name.endswith(".jsonl")]
+    archived = dict(read_archive(directory))
+    assert len(archived) == 20
+    assert all(len(records) == 5 for records in archived.values())  # session, 3 messages, end
+    assert not [name for name in os.listdir(os.path.join(directory, ARCHIVE_DIR)) if name.endswith(".tmp")]
+
+
+def test_corrupt_archive_does_not_escape_aclose(tmp_path):
+    directory = str(tmp_path)
+    os.makedirs(os.path.join(directory, ARCHIVE_DIR))
+    with open(os.path.join(directory, ARCHIVE_DIR, "conversation_x.jsonl.gz"), "wb") as f:
+        f.write(b"\x1f\x8b truncated")
+
+    journal = _journal(directory, "a")
+    asyncio.run(journal.aclose())
+
+    assert list(dict(read_archive(directory))) == ["conversation_a.jsonl"]
@@ -0,0 +1,103 @@
+"""PrefixCachedLLM against a fake OpenAI client.
+
+Run from the backend directory:
+
+    python -m pytest tests
+"""
+import asyncio
+from types import SimpleNamespace
+
+from livekit.agents.llm import ChatContext
+from livekit.plugins import openai
+from livekit.plugins.openai import llm as openai_llm
+
+from request_builder import PrefixCachedLLM
+
+
+class FakeStream:
+    def __init__(self, prompt_tokens: int, cached_tokens: int):
+        self._chunks = [
+            SimpleNamespace(
+                id="req",
+                choices=[],
+                usage=SimpleNamespace(
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=1,
+                    total_tokens=prompt_tokens + 1,
+                    prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens),
+                ),
+            )
+        ]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for chunk in self._chunks:
+            yield chunk
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.requests: list[list[dict]] = []
+
+    async def create(self, *, messages, **kwargs):
+        self.requests.append(messages)
+        return FakeStream(prompt_tokens=100, cached_tokens=64 * (len(self.requests) - 1))
+
+
+class FakeClient:
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=FakeCompletions())
+
+
+async def _drain(stream) -> None:
+    async with stream:
+        async for _ in stream:
+            pass
+
+
+def test_requests_reuse_serialized_messages():
+    async def run():
+        client = FakeClient()
+        llm = PrefixCachedLLM(model="gpt-4", client=client)
+        chat_ctx = ChatContext().append(role="system", text="You are a helpful assistant.")
+        chat_ctx.append(role="user", text="hello")
+
+        first = llm.chat(chat_ctx=chat_ctx.copy())
+        assert first.chat_ctx.messages[-1].content == "hello"
+        await _drain(first)
+        chat_ctx.append(role="assistant", text="hi")
+        chat_ctx.append(role="user", text="my arm itches")
+        await _drain(llm.chat(chat_ctx=chat_ctx.copy()))
+
+        sent = client.chat.completions.requests
+        assert [m["content"] for m in sent[1]] == [
+            "You are a helpful assistant.", "hello", "hi", "my arm itches"
+        ]
+        assert sent[1][0] is sent[0][0]
+        assert llm.last_stats.reused == 2
+        assert llm.last_stats.stable_prefix == 2
+        assert (llm.cached_tokens, llm.prompt_tokens, llm.requests) == (64, 200, 2)
+
+    asyncio.run(run())
+
+
+def test_plugin_llm_is_unaffected():
+    async def run():
+        client = FakeClient()
+        PrefixCachedLLM(model="gpt-4", client=FakeClient())
+        plain = openai.LLM(model="gpt-4", client=client)
+        stream = plain.chat(chat_ctx=ChatContext().append(role="user", text="hello"))
+        assert type(stream) is openai_llm.LLMStream
+        await _drain(stream)
+
+        assert client.chat.completions.requests == [[{"role": "user", "content": "hello"}]]
+
+    asyncio.run(run())
@@ -0,0 +1,183 @@
+"""VideoTrackManager driven by a fake rtc.Room.
+
+Run from the backend directory:
+
+    python -m pytest tests
+"""
+import asyncio
+
+from livekit import rtc
+
+from frame_sampler import FrameSampler
+from track_manager import VideoTrackManager
+
+
+class FakeTrack:
+    kind = rtc.TrackKind.KIND_VIDEO
+
+    def __init__(self, sid: str):
+        self.sid = sid
+        self.frame = rtc.VideoFrame(64, 36, rtc.VideoBufferType.I420, bytearray(64 * 36 * 3 // 2))
+
+
+class FakePublication:
+    kind = rtc.TrackKind.KIND_VIDEO
+
+    def __init__(self, track: FakeTrack, source=rtc.TrackSource.SOURCE_CAMERA):
+        self.sid = f"PUB_{track.sid}"
+        self.source = source
+        self.track = track
+
+
+class FakeParticipant:
+    def __init__(self, identity: str):
+        self.identity = identity
+        self.track_publications: dict[str, FakePublication] = {}
+
+
+class FakeRoom(rtc.EventEmitter):
+    def __init__(self):
+        super().__init__()
+        self.remote_participants: dict[str, FakeParticipant] = {}
+
+    def join(self, identity: str) -> FakeParticipant:
+        participant = FakeParticipant(identity)
+        self.remote_participants[identity] = participant
+        self.emit("participant_connected", participant)
+        return participant
+
+    def publish(self, participant: FakeParticipant, sid: str, source=rtc.TrackSource.SOURCE_CAMERA) -> FakeTrack:
+        track = FakeTrack(sid)
+        publication = FakePublication(track, source)
+        participant.track_publications[publication.sid] = publication
+        self.emit("track_subscribed", track, publication, participant)
+        return track
+
+    def unpublish(self, participant: FakeParticipant, track: FakeTrack) -> None:
+        publication = participant.track_publications.pop(f"PUB_{track.sid}")
+        self.emit("track_unsubscribed", track, publication, participant)
+
+    def leave(self, participant: FakeParticipant) -> None:
+        del self.remote_participants[participant.identity]
+        self.emit("participant_disconnected", participant)
+
+
+async def fake_stream(track: FakeTrack):
+    while True:
+        yield rtc.VideoFrameEvent(frame=track.frame, timestamp_us=0, rotation=0)
+        await asyncio.sleep(0.005)
+
+
+async def _until(predicate, timeout: float = 1.0) -> None:
+    async def _poll():
+        while not predicate():
+            await asyncio.sleep(0.001)
+
+    await asyncio.wait_for(_poll(), timeout)
+
+
+def test_subscribe_and_unsubscribe_select_the_track():
+    async def run():
+        room = FakeRoom()
+        manager = VideoTrackManager(room, stream_factory=fake_stream)
+        changes = []
+        manager.on("track_changed", changes.append)
+        assert manager.current is None
+
+        patient = room.join("patient")
+        camera = room.publish(patient, "camera")
+        assert manager.current is camera
+
+        phone = room.publish(patient, "phone")
+        assert manager.current is phone  # the newest camera wins
+
+        room.unpublish(patient, phone)
+        assert manager.current is camera
+        room.unpublish(patient, camera)
+        assert manager.current is None
+        assert changes == [camera, phone, camera, None]
+
+    asyncio.run(run())
+
+
+def test_camera_is_preferred_over_screen_share():
+    async def run():
+        room = FakeRoom()
+        manager = VideoTrackManager(room, stream_factory=fake_stream)
+        patient = room.join("patient")
+        camera = room.publish(patient, "camera")
+        room.publish(patient, "screen", source=rtc.TrackSource.SOURCE_SCREENSHARE)
+        assert manager.current is camera
+
+    asyncio.run(run())
+
+
+def test_participant_switch():
+    async def run():
+        room = FakeRoom()
+        manager = VideoTrackManager(room, stream_factory=fake_stream)
+        patient = room.join("patient")
+        clinician = room.join("clinician")
+        patient_camera = room.publish(patient, "patient_camera")
+        clinician_camera = room.publish(clinician, "clinician_camera")
+        # the participant who joined first is the one VoiceAssistant talks to
+        assert manager.current is patient_camera
+
+        manager.link_participant("clinician")
+        assert manager.current is clinician_camera
+        manager.link_participant("patient")
+        assert manager.current is patient_camera
+
+        room.leave(patient)
+        assert manager.current is clinician_camera
+
+    asyncio.run(run())
+
+
+def test_follow_first_participant():
+    async def run():
+        room = FakeRoom()
+        manager = VideoTrackManager(room, stream_factory=fake_stream)
+        manager.follow_first_participant()
+        clinician = room.join("clinician")
+        patient = room.join("patient")
+        patient_camera = room.publish(patient, "patient_camera")
+        clinician_camera = room.publish(clinician, "clinician_camera")
+        assert manager.current is clinician_camera
+
+        room.unpublish(clinician, clinician_camera)
+        assert manager.current is patient_camera
+
+        # already in the room when the assistant starts
+        room = FakeRoom()
+        patient = room.join("patient")
+        manager = VideoTrackManager(room, stream_factory=fake_stream)
+        manager.follow_first_participant()
+        clinician_camera = room.publish(room.join("clinician"), "clinician_camera")
+        assert manager.current is clinician_camera
+        patient_camera = room.publish(patient, "patient_camera")
+        assert manager.current is patient_camera
+
+    asyncio.run(run())
+
+
+def test_stream_into_follows_the_selection():
+    async def run():
+        room = FakeRoom()
+        sampler = FrameSampler(target_fps=1000)
+        manager = VideoTrackManager(room, stream_factory=fake_stream)
+        streaming = asyncio.create_task(manager.stream_into(sampler))
+
+        patient = room.join("patient")
+        camera = room.publish(patient, "camera")
+        await _until(lambda: sampler.latest is camera.frame)
+
+        phone = room.publish(patient, "phone")
+        room.unpublish(patient, camera)
+        await _until(lambda: sampler.latest is phone.frame)
+
+        room.emit("disconnected", None)
+        await asyncio.wait_for(streaming, 1.0)
+        assert manager.current is None
+
+    asyncio.run(run())
@@ -0,0 +1,44 @@
+"""Incremental ingestion of legacy snapshot files.
+
+Run from the backend directory:
+
+    python -m pytest tests
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import transcript_store
+from transcript_store import TranscriptStore
+
+
+def _snapshot(directory: str, name: str, texts: list[str]) -> None:
+    messages = [{"role": "user", "content": text} for text in texts]
+    with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+        json.dump({"timestamp": "20240101_120000", "messages": messages}, f)
+
+
+def test_folded_snapshots_are_not_parsed_again(tmp_path, monkeypatch):
+    parsed = []
+    parse_file = transcript_store._parse_file
+    monkeypatch.setattr(transcript_store, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(transcript_store, "_parse_file", lambda path: parsed.append(path) or parse_file(path))
+    directory = str(tmp_path)
+    _snapshot(directory, "conversation_20240101_120000.json", ["hello"])
+    _snapshot(directory, "conversation_20240101_120005.json", ["hello", "my arm itches"])
+    store = TranscriptStore(os.path.join(directory, "transcripts.db"))
+    try:
+        assert store.ingest_directory(directory, workers=1) == 1
+        assert len(parsed) == 2
+        assert store.ingest_directory(directory, workers=1) == 0
+        assert len(parsed) == 2
+
+        _snapshot(directory, "conversation_20240101_120010.json", ["hello", "my arm itches", "since monday"])
+        assert store.ingest_directory(directory, workers=1) == 1
+        assert len(parsed) == 5
+        assert store.ingest_directory(directory, workers=1) == 0
+        assert len(parsed) == 5
+        sessions = store._db.execute("SELECT source FROM sessions").fetchall()
+        assert sessions == [("conversation_20240101_120000.json",)]
+    finally:
+        store.close()
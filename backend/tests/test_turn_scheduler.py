@@ -0,0 +1,145 @@
+"""TurnScheduler with a fake LLM whose streams generate a token per permit.
+
+Run from the backend directory:
+
+    python -m pytest tests
+"""
+import asyncio
+
+from turn_scheduler import TurnOutput, TurnScheduler
+
+REPLY_TOKENS = 10
+
+
+class FakeStream:
+    """Stands in for an llm.LLMStream: generates one token each time the test advances it."""
+
+    def __init__(self, tokens: int):
+        self.generated = 0
+        self.closed = False
+        self._permits: asyncio.Queue[None] = asyncio.Queue()
+        self._task = asyncio.create_task(self._generate(tokens))
+
+    async def _generate(self, tokens: int) -> None:
+        while self.generated < tokens:
+            await self._permits.get()
+            self.generated += 1
+
+    def advance(self, tokens: int) -> None:
+        for _ in range(tokens):
+            self._permits.put_nowait(None)
+
+    async def aclose(self) -> None:
+        self.closed = True
+        self._task.cancel()
+
+
+class FakeSpeech:
+    allow_interruptions = True
+
+    def __init__(self):
+        self.interrupted = False
+
+    def interrupt(self) -> None:
+        self.interrupted = True
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts: list[tuple[str, bool]] = []
+        self.streams: list[FakeStream] = []
+        self.speeches: list[FakeSpeech] = []
+
+    async def answer(self, text: str, use_image: bool) -> TurnOutput:
+        self.prompts.append((text, use_image))
+        stream, speech = FakeStream(REPLY_TOKENS), FakeSpeech()
+        self.streams.append(stream)
+        self.speeches.append(speech)
+        return TurnOutput(stream, speech)
+
+    @property
+    def wasted_tokens(self) -> int:
+        return sum(s.generated for s in self.streams if s.closed)
+
+
+async def _until(predicate, timeout: float = 1.0) -> None:
+    async def _poll():
+        while not predicate():
+            await asyncio.sleep(0.001)
+
+    await asyncio.wait_for(_poll(), timeout)
+
+
+def test_rapid_partial_turns_are_coalesced():
+    async def run():
+        fake = FakeLLM()
+        scheduler = TurnScheduler(fake.answer, coalesce_window=0.05)
+        for text in ("my arm", "has a rash", "since tuesday"):
+            scheduler.submit(text)
+            await asyncio.sleep(0.01)
+        await _until(lambda: fake.prompts)
+        await asyncio.sleep(0.1)
+
+        assert fake.prompts == [("my arm\nhas a rash\nsince tuesday", False)]
+        assert scheduler.turns == 1
+        assert scheduler.merged == 2
+        await scheduler.aclose()
+
+    asyncio.run(run())
+
+
+def test_image_and_uncoalesced_turns_are_not_merged():
+    async def run():
+        fake = FakeLLM()
+        scheduler = TurnScheduler(fake.answer, coalesce_window=0.05)
+        scheduler.submit("hello")
+        scheduler.submit("look at this", use_image=True, coalesce=False)
+        scheduler.submit("and this", use_image=True, coalesce=False)
+        await _until(lambda: len(fake.prompts) == 3)
+
+        assert fake.prompts == [("hello", False), ("look at this", True), ("and this", True)]
+        assert scheduler.merged == 0
+        await scheduler.aclose()
+
+    asyncio.run(run())
+
+
+def test_superseded_generation_is_cancelled():
+    async def run():
+        fake = FakeLLM()
+        scheduler = TurnScheduler(fake.answer, coalesce_window=0.0)
+
+        scheduler.submit("first", coalesce=False)
+        await _until(lambda: len(fake.streams) == 1)
+        first = fake.streams[0]
+        first.advance(3)
+        await _until(lambda: first.generated == 3)
+
+        # a newer turn while the first reply is still generating supersedes it
+        scheduler.submit("second", coalesce=False)
+        await _until(lambda: len(fake.streams) == 2)
+        assert first.closed
+        assert fake.speeches[0].interrupted
+        assert scheduler.cancelled == 1
+
+        # a reply that finished generating is left alone
+        second = fake.streams[1]
+        second.advance(REPLY_TOKENS)
+        await _until(lambda: second._task.done())
+        scheduler.submit("third", coalesce=False)
+        await _until(lambda: len(fake.streams) == 3)
+        assert not second.closed
+        assert not fake.speeches[1].interrupted
+        assert scheduler.cancelled == 1
+
+        fake.streams[2].advance(5)
+        await _until(lambda: fake.streams[2].generated == 5)
+        await scheduler.aclose()
+        await _until(lambda: fake.streams[2].closed)
+
+        # the first reply stopped at 3 tokens, the third at 5 when the session closed
+        assert fake.wasted_tokens == 3 + 5
+        assert [s.generated for s in fake.streams] == [3, REPLY_TOKENS, 5]
+        assert scheduler.cancelled == 2
+
+    asyncio.run(run())
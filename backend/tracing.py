@@ -0,0 +1,367 @@
+"""Per-turn latency spans, written as OTLP/JSON lines, and a CLI for stage percentiles.
+
+Summarize a trace file from the backend directory:
+
+    python -m tracing traces/turns.jsonl
+"""
+import argparse
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterable, NamedTuple
+
+logger = logging.getLogger("tracing")
+
+SERVICE_NAME = "medical-agent"
+SCOPE_NAME = "medical-agent.turns"
+TRACE_FILE = os.getenv("TRACE_FILE", "traces/turns.jsonl")
+TRACING = os.getenv("TRACING", "1") == "1"
+
+
+class Span(NamedTuple):
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str
+    start: float  # seconds since the epoch, like livekit's metrics timestamps
+    end: float
+    attributes: dict[str, Any]
+
+
+class TraceWriter:
+    """Appends spans to a JSONL file from a background thread.
+
+    `write` only puts the span on a queue. The thread takes everything that
+    is queued, turns it into one OTLP/JSON `ExportTraceServiceRequest` (the
+    shape the OpenTelemetry collector's file exporter writes) and appends it
+    as one line, so the event loop never encodes JSON or touches the file.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path: str, *, resource: dict[str, Any] | None = None):
+        self.path = path
+        self._resource = _attributes({"service.name": SERVICE_NAME, "process.pid": os.getpid(), **(resource or {})})
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, span: Span) -> None:
+        self._queue.put(span)
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+    def _run(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                spans = [self._queue.get()]
+                while True:
+                    try:
+                        spans.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = any(span is self._STOP for span in spans)
+                spans = [span for span in spans if span is not self._STOP]
+                if spans:
+                    try:
+                        f.write(json.dumps(self._export_request(spans), separators=(",", ":")) + "\n")
+                        f.flush()
+                    except (OSError, TypeError, ValueError) as e:
+                        logger.error(f"Failed to write {len(spans)} spans: {str(e)}")
+                if stop:
+                    return
+
+    def _export_request(self, spans: list[Span]) -> dict:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": self._resource},
+                "scopeSpans": [{
+                    "scope": {"name": SCOPE_NAME},
+                    "spans": [_otlp_span(span) for span in spans],
+                }],
+            }]
+        }
+
+
+def _otlp_span(span: Span) -> dict:
+    otlp = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(int(span.start * 1e9)),
+        "endTimeUnixNano": str(int(span.end * 1e9)),
+        "attributes": _attributes(span.attributes),
+    }
+    if span.parent_id:
+        otlp["parentSpanId"] = span.parent_id
+    if span.attributes.get("error"):
+        otlp["status"] = {"code": 2, "message": str(span.attributes["error"])}
+    return otlp
+
+
+def _attributes(values: dict[str, Any]) -> list[dict]:
+    attributes = []
+    for key, value in values.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}  # int64 is a string in OTLP/JSON
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        attributes.append({"key": key, "value": typed})
+    return attributes
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+_writer: TraceWriter | None = None
+
+
+def trace_writer() -> TraceWriter | None:
+    """The process's TraceWriter, created on first use; None when TRACING=0."""
+    global _writer
+    if _writer is None and TRACING:
+        _writer = TraceWriter(TRACE_FILE)
+    return _writer
+
+
+class _Turn:
+    __slots__ = ("trace_id", "span_id", "kind", "start", "stopped_at", "played", "tts_first_byte", "tools")
+
+    def __init__(self, kind: str, start: float):
+        self.trace_id = _new_id(128)
+        self.span_id = _new_id(64)
+        self.kind = kind
+        self.start = start
+        self.stopped_at = start
+        self.played = False
+        self.tts_first_byte = False
+        self.tools: dict[str, tuple[str, float]] = {}
+
+
+class TurnTracer:
+    """One trace per conversational turn, with a span per stage.
+
+    A voice turn starts when the VAD reports the end of the user's speech.
+    The pipeline's end-of-utterance metrics move the start back to the last
+    voiced frame and give `vad.end_of_speech`, `stt.final_transcript` and
+    `eou.commit`. LLM and TTS metrics give `llm.request`, `llm.first_token`,
+    `tts.request` and `tts.first_byte`, tool calls give `tool.<name>`, and
+    `playout.start` runs from the start of the turn to the first agent audio,
+    which is the latency the user hears. The turn's root span is written when
+    the reply has been played or interrupted, or when the next turn starts.
+
+    Typed chat and image follow-ups go through `_answer`, which calls
+    `ensure_turn` and wraps its work in `span("answer")`.
+    """
+
+    def __init__(self, writer: TraceWriter | None, *, session_id: str):
+        self._writer = writer
+        self._session_id = session_id
+        self._turn: _Turn | None = None
+        self._turns = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._writer is not None
+
+    def attach(self, assistant, *, llm, tts) -> None:
+        """Start voice turns on the assistant's events and record spans from the LLM's and TTS's own metrics."""
+        if not self.enabled:
+            return
+        from livekit.agents import metrics
+
+        @assistant.on("user_stopped_speaking")
+        def _on_user_stopped_speaking():
+            self.start_turn("voice")
+
+        @assistant.on("metrics_collected")
+        def _on_pipeline_metrics(m):
+            if isinstance(m, metrics.PipelineEOUMetrics):
+                self._on_end_of_utterance(m)
+
+        @llm.on("metrics_collected")
+        def _on_llm_metrics(m: metrics.LLMMetrics):
+            start = m.timestamp - m.duration
+            span_id = self.record(
+                "llm.request", start, m.timestamp,
+                ttft_ms=m.ttft * 1000, prompt_tokens=m.prompt_tokens, completion_tokens=m.completion_tokens,
+                tokens_per_second=m.tokens_per_second, cancelled=m.cancelled, error=m.error,
+            )
+            if span_id and m.ttft > 0:
+                self.record("llm.first_token", start, start + m.ttft, parent_id=span_id)
+
+        @tts.on("metrics_collected")
+        def _on_tts_metrics(m: metrics.TTSMetrics):
+            turn = self._turn
+            start = m.timestamp - m.duration
+            span_id = self.record(
+                "tts.request", start, m.timestamp,
+                ttfb_ms=m.ttfb * 1000, characters=m.characters_count, audio_duration=m.audio_duration,
+                streamed=m.streamed, cancelled=m.cancelled, error=m.error,
+            )
+            if span_id and m.ttfb > 0 and not turn.tts_first_byte:
+                turn.tts_first_byte = True
+                self.record("tts.first_byte", start, start + m.ttfb, parent_id=span_id)
+
+        @assistant.on("function_calls_collected")
+        def _on_function_calls_collected(function_calls):
+            if self._turn is not None:
+                now = time.time()
+                for fnc in function_calls:
+                    self._turn.tools[fnc.tool_call_id] = (fnc.function_info.name, now)
+
+        @assistant.on("function_calls_finished")
+        def _on_function_calls_finished(called_functions):
+            if self._turn is None:
+                return
+            now = time.time()
+            for called in called_functions:
+                name, start = self._turn.tools.pop(called.call_info.tool_call_id, (called.call_info.function_info.name, now))
+                error = called.exception
+                self.record(f"tool.{name}", start, now, error=repr(error) if error is not None else None)
+
+        @assistant.on("agent_started_speaking")
+        def _on_agent_started_speaking():
+            turn = self._turn
+            if turn is not None and not turn.played:
+                turn.played = True
+                self.record("playout.start", turn.start, time.time())
+
+        @assistant.on("agent_speech_committed")
+        @assistant.on("agent_speech_interrupted")
+        def _on_agent_speech_done(msg):
+            if self._turn is not None and self._turn.played:
+                self.end_turn()
+
+    def start_turn(self, kind: str) -> None:
+        if not self.enabled:
+            return
+        if self._turn is not None:
+            self.end_turn()
+        self._turn = _Turn(kind, time.time())
+        self._turns += 1
+
+    def ensure_turn(self, kind: str) -> None:
+        """Start a turn unless one is in progress (a tool follow-up belongs to the turn that called it)."""
+        if self._turn is None:
+            self.start_turn(kind)
+
+    def end_turn(self) -> None:
+        turn, self._turn = self._turn, None
+        if turn is None:
+            return
+        self._writer.write(Span(
+            "turn", turn.trace_id, turn.span_id, "", turn.start, time.time(),
+            {"session.id": self._session_id, "turn.index": self._turns, "turn.kind": turn.kind, "turn.played": turn.played},
+        ))
+
+    def record(self, name: str, start: float, end: float, *, parent_id: str | None = None, **attributes) -> str | None:
+        """Write a finished span in the current turn; returns its id, or None outside a turn."""
+        turn = self._turn
+        if turn is None:
+            return None
+        span_id = _new_id(64)
+        self._writer.write(Span(name, turn.trace_id, span_id, parent_id or turn.span_id, start, end, attributes))
+        return span_id
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        start = time.time()
+        try:
+            yield
+        except BaseException as e:
+            attributes["error"] = repr(e)
+            raise
+        finally:
+            self.record(name, start, time.time(), **attributes)
+
+    async def aclose(self) -> None:
+        self.end_turn()
+
+    def _on_end_of_utterance(self, m) -> None:
+        turn = self._turn
+        if turn is None:
+            return
+        speech_end = m.timestamp - m.end_of_utterance_delay
+        turn.start = min(turn.start, speech_end)
+        self.record("vad.end_of_speech", speech_end, max(turn.stopped_at, speech_end))
+        self.record("stt.final_transcript", speech_end, speech_end + m.transcription_delay)
+        self.record("eou.commit", speech_end, m.timestamp, speech_id=m.sequence_id)
+
+
+def read_spans(paths: Iterable[str]) -> Iterable[dict]:
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                for resource_spans in json.loads(line)["resourceSpans"]:
+                    for scope_spans in resource_spans["scopeSpans"]:
+                        yield from scope_spans["spans"]
+
+
+def stage_percentiles(spans: Iterable[dict]) -> dict[str, tuple[int, float, float, float]]:
+    """(count, p50, p95, p99) of each span name's duration, in milliseconds."""
+    durations: dict[str, list[float]] = {}
+    for span in spans:
+        ms = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+        durations.setdefault(span["name"], []).append(ms)
+    result = {}
+    for name, values in durations.items():
+        if len(values) == 1:
+            p50 = p95 = p99 = values[0]
+        else:
+            cuts = statistics.quantiles(values, n=100, method="inclusive")
+            p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+        result[name] = (len(values), p50, p95, p99)
+    return result
+
+
+STAGE_ORDER = [
+    "vad.end_of_speech", "stt.final_transcript", "eou.commit", "answer", "llm.first_token", "llm.request",
+    "tts.first_byte", "tts.request", "playout.start", "turn",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="p50/p95/p99 latency per stage from trace files.")
+    parser.add_argument("paths", nargs="*", default=[TRACE_FILE])
+    args = parser.parse_args()
+
+    try:
+        stats = stage_percentiles(read_spans(args.paths))
+    except OSError as e:
+        parser.error(f"cannot read {e.filename}: {e.strerror}")
+    order = {name: i for i, name in enumerate(STAGE_ORDER)}
+    # tool spans have open-ended names; they go just before playout
+    names = sorted(stats, key=lambda name: (order.get(name, order["playout.start"] - 0.5), name))
+    print(f"{'stage':<24}{'count':>7}{'p50':>11}{'p95':>11}{'p99':>11}")
+    for name in names:
+        count, p50, p95, p99 = stats[name]
+        print(f"{name:<24}{count:>7}{p50:>8.0f} ms{p95:>8.0f} ms{p99:>8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import asyncio
+import itertools
+import logging
+from typing import AsyncIterable, Callable, Literal, NamedTuple
+
+from livekit import rtc
+
+from frame_sampler import FrameSampler, SampledVideoStream
+
+logger = logging.getLogger("track-manager")
+
+EventTypes = Literal["track_changed"]
+
+
+class _TrackEntry(NamedTuple):
+    seq: int
+    track: rtc.RemoteVideoTrack
+    publication: rtc.RemoteTrackPublication
+    participant: rtc.RemoteParticipant
+
+
+class VideoTrackManager(rtc.EventEmitter[EventTypes]):
+    """Keeps track of which remote video track the agent should be watching.
+
+    Selection is driven purely by room events (track_subscribed,
+    track_unsubscribed, participant_disconnected), so there is nothing to poll
+    and no future that can be left waiting on a track that never shows up.
+
+    Preference order: the linked participant, then camera over screen share,
+    then the participant that joined first (the one VoiceAssistant talks to),
+    then the most recently subscribed track, which makes a camera switch take
+    effect as soon as the new track arrives.
+
+    Events:
+        track_changed: the selected track changed; called with the new
+            rtc.RemoteVideoTrack or None when no video is left.
+    """
+
+    def __init__(
+        self,
+        room: rtc.Room,
+        *,
+        participant_identity: str | None = None,
+        stream_factory: Callable[[rtc.Track], AsyncIterable[rtc.VideoFrameEvent]] | None = None,
+    ):
+        super().__init__()
+        self._room = room
+        self._identity = participant_identity
+        self._stream_factory = stream_factory
+        self._counter = itertools.count()
+        self._participant_order: dict[str, int] = {}
+        self._tracks: dict[str, _TrackEntry] = {}
+        self._current: rtc.RemoteVideoTrack | None = None
+        self._changed = asyncio.Event()
+        self._closed = False
+
+        room.on("track_subscribed", self._on_track_subscribed)
+        room.on("track_unsubscribed", self._on_track_unsubscribed)
+        room.on("participant_disconnected", self._on_participant_disconnected)
+        room.on("disconnected", self._on_disconnected)
+
+        for participant in room.remote_participants.values():
+            self._participant_seq(participant)
+            for publication in participant.track_publications.values():
+                if publication.track is not None and publication.kind == rtc.TrackKind.KIND_VIDEO:
+                    self._add(publication.track, publication, participant)
+        self._select()
+
+    @property
+    def current(self) -> rtc.RemoteVideoTrack | None:
+        return self._current
+
+    def link_participant(self, identity: str | None) -> None:
+        """Prefer the video of the participant the assistant is talking to."""
+        self._identity = identity
+        self._select()
+
+    def follow_first_participant(self) -> None:
+        """Link the participant VoiceAssistant links when started without one.
+
+        That is the first remote participant already in the room or, if the
+        room is still empty, the first one to join.
+        """
+        first = next(iter(self._room.remote_participants.values()), None)
+        if first is not None:
+            self.link_participant(first.identity)
+        else:
+            self._room.once("participant_connected", lambda participant: self.link_participant(participant.identity))
+
+    def preferred_publication(self) -> rtc.RemoteTrackPublication | None:
+        """Best video publication, subscribed or not (used for on-demand subscription)."""
+        candidates = []
+        for participant in self._room.remote_participants.values():
+            for publication in participant.track_publications.values():
+                if publication.kind == rtc.TrackKind.KIND_VIDEO:
+                    candidates.append((self._rank(participant, publication, 0), publication))
+        if not candidates:
+            return None
+        return max(candidates, key=lambda c: c[0])[1]
+
+    async def wait_for_track(self) -> rtc.RemoteVideoTrack | None:
+        """Wait until a video track is selected. Returns None once the room is gone."""
+        while self._current is None and not self._closed:
+            await self._changed.wait()
+        return self._current
+
+    async def stream_into(self, sampler: FrameSampler) -> None:
+        """Feed the selected track into the sampler until the room disconnects.
+
+        The stream is swapped as soon as the selection changes instead of
+        waiting for the old one to end.
+        """
+        while True:
+            track = await self.wait_for_track()
+            if track is None:
+                return
+
+            logger.info(f"Streaming video track {track.sid}")
+            changed = self._changed
+            if self._stream_factory is not None:
+                stream = self._stream_factory(track)
+            else:
+                stream = SampledVideoStream(track, sampler, capacity=1)
+            feed_task = asyncio.create_task(sampler.run(stream))
+            changed_task = asyncio.create_task(changed.wait())
+            try:
+                await asyncio.wait({feed_task, changed_task}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                feed_task.cancel()
+                changed_task.cancel()
+                await asyncio.gather(feed_task, changed_task, return_exceptions=True)
+                await stream.aclose()
+
+            if not feed_task.cancelled() and feed_task.exception():
+                raise feed_task.exception()
+            if self._current is track:
+                # the stream ended on its own; wait for the next selection change
+                await changed.wait()
+
+    def _participant_seq(self, participant: rtc.RemoteParticipant) -> int:
+        if participant.identity not in self._participant_order:
+            self._participant_order[participant.identity] = next(self._counter)
+        return self._participant_order[participant.identity]
+
+    def _rank(
+        self,
+        participant: rtc.RemoteParticipant,
+        publication: rtc.RemoteTrackPublication,
+        seq: int,
+    ) -> tuple:
+        return (
+            participant.identity == self._identity,
+            publication.source == rtc.TrackSource.SOURCE_CAMERA,
+            -self._participant_seq(participant),
+            seq,
+        )
+
+    def _add(self, track, publication, participant) -> None:
+        self._tracks[publication.sid] = _TrackEntry(next(self._counter), track, publication, participant)
+
+    def _select(self) -> None:
+        best = None
+        if self._tracks:
+            entry = max(self._tracks.values(), key=lambda t: self._rank(t.participant, t.publication, t.seq))
+            best = entry.track
+        if best is self._current:
+            return
+
+        self._current = best
+        logger.info(f"Selected video track: {best.sid if best else None}")
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        self.emit("track_changed", best)
+
+    def _on_track_subscribed(self, track, publication, participant) -> None:
+        if track.kind == rtc.TrackKind.KIND_VIDEO:
+            self._participant_seq(participant)
+            self._add(track, publication, participant)
+            self._select()
+
+    def _on_track_unsubscribed(self, track, publication, participant) -> None:
+        if self._tracks.pop(publication.sid, None) is not None:
+            self._select()
+
+    def _on_participant_disconnected(self, participant) -> None:
+        for sid in [sid for sid, t in self._tracks.items() if t.participant.identity == participant.identity]:
+            del self._tracks[sid]
+        self._select()
+
+    def _on_disconnected(self, *args) -> None:
+        self._closed = True
+        self._tracks.clear()
+        self._select()
+        self._changed.set()
@@ -0,0 +1,469 @@
+"""Indexed transcripts of every session, searchable by text, session, role and time.
+
+Index the conversations directory (snapshots, journals and archived
+journals) and search it, from the backend directory:
+
+    python -m transcript_store ingest conversations
+    python -m transcript_store search "rash forearm" --role user --since 2025-01-15
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Iterable, Iterator, NamedTuple
+
+from conversation_journal import ARCHIVE_DIR, is_finished, read_journal, read_records
+
+logger = logging.getLogger("transcript-store")
+
+TRANSCRIPT_DB = os.getenv("TRANSCRIPT_DB", "conversations/transcripts.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL UNIQUE,
+    session_id TEXT,
+    agent TEXT,
+    started REAL,
+    ended REAL,
+    version TEXT
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    session INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    ts REAL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshot_files (
+    name TEXT PRIMARY KEY,
+    version TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_session ON messages(session, seq);
+CREATE INDEX IF NOT EXISTS messages_ts ON messages(ts);
+CREATE INDEX IF NOT EXISTS sessions_started ON sessions(started);
+CREATE INDEX IF NOT EXISTS sessions_session_id ON sessions(session_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+
+class Message(NamedTuple):
+    source: str  # the session's source file, its key in the store
+    session_id: str | None
+    seq: int
+    ts: float | None
+    role: str
+    content: str
+
+
+class Hit(NamedTuple):
+    source: str
+    session_id: str | None
+    seq: int
+    ts: float | None
+    role: str
+    content: str
+    snippet: str
+
+
+class ParsedSession(NamedTuple):
+    source: str
+    version: str  # changes when the source changes, so unchanged files are skipped
+    session_id: str | None
+    agent: str | None
+    started: float | None
+    ended: float | None
+    messages: list[tuple[int, float | None, str, str]]  # seq, ts, role, text
+
+
+class TranscriptStore:
+    """SQLite store of session transcripts with an FTS5 index over the messages.
+
+    A session is keyed by its source: a snapshot or journal file name (an
+    archived journal keeps its journal's name). Ingesting a source again
+    replaces the session only if the source changed, so ingestion is
+    incremental and can be rerun at any time. The database is in WAL mode,
+    so job processes can index their session when it ends while others
+    search.
+    """
+
+    def __init__(self, path: str = TRANSCRIPT_DB):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=30.0, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    # -- ingestion ------------------------------------------------------------
+
+    def add(self, sessions: Iterable[ParsedSession], *, batch: int = 500) -> int:
+        """Insert or replace sessions whose source changed. Returns how many were written."""
+        versions = dict(self._db.execute("SELECT source, version FROM sessions"))
+        written = 0
+        pending = 0
+        self._db.execute("BEGIN")
+        try:
+            for s in sessions:
+                if versions.get(s.source) == s.version:
+                    continue
+                self._db.execute("DELETE FROM sessions WHERE source = ?", (s.source,))
+                session = self._db.execute(
+                    "INSERT INTO sessions (source, session_id, agent, started, ended, version) VALUES (?, ?, ?, ?, ?, ?)",
+                    (s.source, s.session_id, s.agent, s.started, s.ended, s.version),
+                ).lastrowid
+                self._db.executemany(
+                    "INSERT INTO messages (session, seq, ts, role, content) VALUES (?, ?, ?, ?, ?)",
+                    [(session, seq, ts, role, text) for seq, ts, role, text in s.messages],
+                )
+                written += 1
+                pending += 1
+                if pending >= batch:
+                    self._db.execute("COMMIT")
+                    self._db.execute("BEGIN")
+                    pending = 0
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return written
+
+    def ingest_directory(self, directory: str, *, workers: int | None = None) -> int:
+        """Index every snapshot, journal and archived journal in `directory`, parsing files in parallel.
+
+        Journals are skipped when their session is stored at the same
+        version. Snapshots are folded into sessions across files, so they
+        are compared as a set against the snapshot files of the last ingest
+        and are all parsed again only when one of them was added, changed
+        or removed.
+        """
+        known = dict(self._db.execute("SELECT source, version FROM sessions"))
+        entries = list(os.scandir(directory))
+        archive_dir = os.path.join(directory, ARCHIVE_DIR)
+        if os.path.isdir(archive_dir):
+            entries += [entry for entry in os.scandir(archive_dir) if entry.name.endswith(".jsonl.gz")]
+        snapshots = {entry.name: _file_version(entry) for entry in entries if entry.name.endswith(".json")}
+        snapshots_changed = snapshots != dict(self._db.execute("SELECT name, version FROM snapshot_files"))
+        paths = sorted(
+            entry.path for entry in entries
+            if entry.name.endswith(".json") and snapshots_changed
+            or entry.name.endswith((".jsonl", ".jsonl.gz")) and known.get(_source(entry.name)) != _file_version(entry)
+        )
+        written = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = executor.map(_parse_file, paths, chunksize=64)
+            written += self.add(_merge_snapshots(s for s in parsed if s is not None))
+        if snapshots_changed:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM snapshot_files")
+            self._db.executemany("INSERT INTO snapshot_files (name, version) VALUES (?, ?)", snapshots.items())
+            self._db.execute("COMMIT")
+        logger.info(f"Indexed {written} sessions from {directory}")
+        return written
+
+    def ingest_journal(self, path: str) -> int:
+        """Index one finished journal, e.g. when its session ends."""
+        session = _parse_file(path)
+        return self.add([session]) if session is not None else 0
+
+    # -- queries --------------------------------------------------------------
+
+    def search(
+        self,
+        text: str,
+        *,
+        role: str | None = None,
+        session_id: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        limit: int = 50,
+        order: str = "recent",
+    ) -> list[Hit]:
+        """Messages matching a search (words, "phrases", prefix*, AND/OR/NOT).
+
+        Any text is accepted: it is turned into a well-formed FTS5 query by
+        `fts_query`, so punctuation in what a user typed is never read as
+        query syntax. `order` is "recent" (newest first) or "relevance"
+        (bm25). Newest first stops after `limit` matches; relevance has to
+        rank every match, so it gets slower the more common the terms are.
+        """
+        query = fts_query(text)
+        if not query:
+            return []
+        if session_id is not None or (since is not None and until is not None):
+            # few candidates: find them through the messages' indexes, then check each against the text index
+            source = "FROM messages m CROSS JOIN messages_fts ON messages_fts.rowid = m.id JOIN sessions s ON s.id = m.session"
+            order_by = "m.ts DESC"
+        else:
+            source = "FROM messages_fts CROSS JOIN messages m ON m.id = messages_fts.rowid JOIN sessions s ON s.id = m.session"
+            order_by = "messages_fts.rowid DESC"
+        if order == "relevance":
+            order_by = "bm25(messages_fts)"
+        sql = [
+            "SELECT s.source, s.session_id, m.seq, m.ts, m.role, m.content,",
+            "       snippet(messages_fts, 0, '[', ']', '...', 12)",
+            source,
+            "WHERE messages_fts MATCH ?",
+        ]
+        params: list = [query]
+        _filters(sql, params, role=role, session_id=session_id, since=since, until=until)
+        sql.append(f"ORDER BY {order_by} LIMIT ?")
+        params.append(limit)
+        return [Hit(*row) for row in self._db.execute("\n".join(sql), params)]
+
+    def messages(
+        self,
+        *,
+        role: str | None = None,
+        session_id: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        limit: int = 1000,
+    ) -> list[Message]:
+        """Messages by session, role and time range, oldest first."""
+        sql = [
+            "SELECT s.source, s.session_id, m.seq, m.ts, m.role, m.content",
+            "FROM messages m JOIN sessions s ON s.id = m.session WHERE 1",
+        ]
+        params: list = []
+        _filters(sql, params, role=role, session_id=session_id, since=since, until=until)
+        sql.append("ORDER BY m.ts, m.session, m.seq LIMIT ?")
+        params.append(limit)
+        return [Message(*row) for row in self._db.execute("\n".join(sql), params)]
+
+    def session(self, source: str) -> list[Message]:
+        """A whole transcript, by its source name."""
+        return [Message(*row) for row in self._db.execute(
+            "SELECT s.source, s.session_id, m.seq, m.ts, m.role, m.content "
+            "FROM messages m JOIN sessions s ON s.id = m.session WHERE s.source = ? ORDER BY m.seq",
+            (source,),
+        )]
+
+    def sessions(self, *, since: float | None = None, until: float | None = None, limit: int = 100) -> list[tuple]:
+        """(source, session_id, agent, started, ended), newest first."""
+        sql, params = ["SELECT source, session_id, agent, started, ended FROM sessions WHERE 1"], []
+        if since is not None:
+            sql.append("AND started >= ?")
+            params.append(since)
+        if until is not None:
+            sql.append("AND started < ?")
+            params.append(until)
+        sql.append("ORDER BY started DESC LIMIT ?")
+        params.append(limit)
+        return list(self._db.execute("\n".join(sql), params))
+
+
+_QUERY_TOKEN = re.compile(r'"([^"]*)"?|(\S+)')
+_OPERATORS = ("AND", "OR", "NOT")
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query that cannot be a syntax error.
+
+    Every word and "quoted phrase" becomes an FTS5 string, with any double
+    quote inside it doubled; a trailing * stays a prefix search. AND, OR
+    and NOT stay operators when they stand between two terms, and are
+    searched for as words otherwise.
+    """
+    tokens = []
+    for phrase, word in _QUERY_TOKEN.findall(text):
+        if phrase:
+            tokens.append(("term", f'"{phrase}"'))
+        elif word in _OPERATORS:
+            tokens.append(("op", word))
+        elif word:
+            prefix = word.endswith("*") and len(word.rstrip("*")) > 0
+            word = word.rstrip("*") if prefix else word
+            quoted = '"' + word.replace('"', '""') + '"'
+            tokens.append(("term", quoted + "*" if prefix else quoted))
+    parts = []
+    for i, (kind, value) in enumerate(tokens):
+        if kind == "op":
+            between_terms = parts and parts[-1] not in _OPERATORS and i + 1 < len(tokens) and tokens[i + 1][0] == "term"
+            parts.append(value if between_terms else f'"{value}"')
+        else:
+            parts.append(value)
+    return " ".join(parts)
+
+
+def _filters(sql: list[str], params: list, *, role, session_id, since, until) -> None:
+    if role is not None:
+        sql.append("AND m.role = ?")
+        params.append(role)
+    if session_id is not None:
+        sql.append("AND m.session IN (SELECT id FROM sessions WHERE session_id = ? UNION ALL SELECT id FROM sessions WHERE source = ?)")
+        params.extend([session_id, session_id])
+    if since is not None:
+        sql.append("AND m.ts >= ?")
+        params.append(since)
+    if until is not None:
+        sql.append("AND m.ts < ?")
+        params.append(until)
+
+
+def index_journal(path: str) -> None:
+    """ConversationJournal's on_closed hook: index the finished session in TRANSCRIPT_DB."""
+    store = TranscriptStore()
+    try:
+        store.ingest_journal(path)
+    finally:
+        store.close()
+
+
+# -- parsing (runs in worker processes) ---------------------------------------
+
+def _file_version(entry: os.DirEntry) -> str:
+    stat = entry.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(filter(None, (_text(c) for c in content)))
+    if content is None:
+        return ""
+    if isinstance(content, dict) and content.get("type") == "image":
+        # the digest makes the message findable from an image in the image store
+        return f"[image {content['sha256']}]" if content.get("sha256") else ""
+    return json.dumps(content, ensure_ascii=False, default=str)
+
+
+def _source(name: str) -> str:
+    # an archived journal is the same session as the journal it was compressed from
+    return name[:-3] if name.endswith(".jsonl.gz") else name
+
+
+def _parse_file(path: str) -> ParsedSession | None:
+    name = os.path.basename(path)
+    version = f"{os.path.getsize(path)}:{os.stat(path).st_mtime_ns}"
+    try:
+        if name.endswith(".jsonl.gz"):
+            with gzip.open(path, "rb") as f:
+                return _journal_session(_source(name), version, list(read_records(f)))
+        if name.endswith(".jsonl"):
+            if not is_finished(path):
+                return None  # still being written; indexed when the session ends
+            return _journal_session(name, version, read_journal(path))
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, EOFError, ValueError) as e:
+        logger.warning(f"Skipping {path}: {str(e)}")
+        return None
+    try:
+        started = datetime.strptime(snapshot["timestamp"], "%Y%m%d_%H%M%S").timestamp()
+    except (KeyError, ValueError):
+        started = None
+    messages = [
+        (seq, started, msg.get("role", ""), _text(msg.get("content")))
+        for seq, msg in enumerate(snapshot.get("messages", []), 1)
+    ]
+    return ParsedSession(name, version, None, None, started, started, messages)
+
+
+def _journal_session(source: str, version: str, records: Iterable[dict]) -> ParsedSession:
+    session_id = agent = started = ended = None
+    messages = []
+    for record in records:
+        kind = record.get("type")
+        if kind == "session":
+            session_id, agent, started = record.get("session_id"), record.get("agent"), record.get("started")
+        elif kind == "message":
+            messages.append((record["seq"], record.get("ts"), record.get("role", ""), _text(record.get("content"))))
+        elif kind == "end":
+            ended = record.get("ts")
+    return ParsedSession(source, version, session_id, agent, started, ended, messages)
+
+
+def _merge_snapshots(sessions: Iterable[ParsedSession]) -> Iterator[ParsedSession]:
+    """Fold consecutive snapshots of one conversation into the latest one.
+
+    The old snapshot files rewrote the whole history every few seconds, so
+    a snapshot whose messages start with the previous snapshot's messages is
+    the same session, later. Journals pass through unchanged.
+    """
+    previous: ParsedSession | None = None
+    for s in sessions:
+        if s.source.endswith(".jsonl"):
+            yield s
+            continue
+        if previous is not None:
+            earlier = [(role, text) for _, _, role, text in previous.messages]
+            later = [(role, text) for _, _, role, text in s.messages[:len(earlier)]]
+            if earlier != later:
+                yield previous
+            else:
+                # keep the first snapshot's name as the session's key, and when each message first appeared;
+                # the version covers every folded file, so an unchanged session is not rewritten
+                s = s._replace(
+                    source=previous.source,
+                    version=hashlib.sha1(f"{previous.version}\0{s.version}".encode()).hexdigest(),
+                    started=previous.started,
+                    messages=previous.messages + s.messages[len(earlier):],
+                )
+        previous = s
+    if previous is not None:
+        yield previous
+
+
+def _parse_time(value: str) -> float:
+    return datetime.fromisoformat(value).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and search session transcripts.")
+    parser.add_argument("--db", default=TRANSCRIPT_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest")
+    ingest.add_argument("directory", nargs="?", default="conversations")
+    ingest.add_argument("--workers", type=int)
+    search = commands.add_parser("search")
+    search.add_argument("text")
+    search.add_argument("--role")
+    search.add_argument("--session")
+    search.add_argument("--since", type=_parse_time, help="ISO date or time")
+    search.add_argument("--until", type=_parse_time, help="ISO date or time")
+    search.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    store = TranscriptStore(args.db)
+    if args.command == "ingest":
+        print(f"Indexed {store.ingest_directory(args.directory, workers=args.workers)} sessions into {args.db}")
+    else:
+        try:
+            hits = store.search(
+                args.text, role=args.role, session_id=args.session, since=args.since, until=args.until, limit=args.limit
+            )
+        except sqlite3.OperationalError as e:
+            store.close()
+            parser.error(f"search failed: {str(e)}")
+        for hit in hits:
+            when = datetime.fromtimestamp(hit.ts).strftime("%Y-%m-%d %H:%M:%S") if hit.ts else "?"
+            print(f"{when}  {hit.source}#{hit.seq}  {hit.role}: {hit.snippet}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
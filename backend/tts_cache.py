@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import logging
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+from livekit import rtc
+from livekit.agents import tts, utils
+
+logger = logging.getLogger("tts-cache")
+
+_HEADER = struct.Struct("<II")  # sample_rate, num_channels
+_SUFFIX = ".pcm"
+
+
+class TTSCache:
+    """Content-addressed on-disk cache of synthesized audio for fixed phrases.
+
+    Entries are keyed by sha256(model, voice, text) and stored as raw 16-bit
+    PCM under `directory`, so they survive restarts and are shared by every
+    job process on the host. The directory is bounded to `max_bytes`; the
+    least recently used files are evicted first (file mtime is the recency
+    stamp, refreshed on every hit).
+
+    The cache may be filled from a background thread while sessions read
+    it, so the index is guarded by a lock.
+
+    Only registered phrases are ever cached. Conversation audio is patient
+    data and must not end up on disk, so replies are never written here even
+    when a sentence happens to repeat.
+    """
+
+    def __init__(self, directory: str, *, model: str, voice: str = "", max_bytes: int = 64 * 1024 * 1024):
+        self._directory = directory
+        self._model = model
+        self._voice = voice
+        self._max_bytes = max_bytes
+        self._registered: set[str] = set()
+        self._lock = threading.Lock()
+        self._memory: dict[str, list[rtc.AudioFrame]] = {}
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(_SUFFIX):
+                stat = os.stat(os.path.join(directory, name))
+                entries.append((stat.st_mtime, name[:-len(_SUFFIX)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._bytes += size
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self._model}\0{self._voice}\0{text}".encode()).hexdigest()
+
+    def register(self, texts: list[str]) -> None:
+        """Mark texts as cacheable."""
+        self._registered.update(texts)
+
+    def registered(self, text: str) -> bool:
+        return text in self._registered
+
+    def get(self, text: str) -> list[rtc.AudioFrame] | None:
+        if text not in self._registered:
+            return None
+        key = self.key(text)
+        with self._lock:
+            frames = self._memory.get(key)
+            if frames is None and key in self._index:
+                frames = self._load(key)
+            if frames is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._memory[key] = frames
+            self._index.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return frames
+
+    def put(self, text: str, frames: list[rtc.AudioFrame]) -> None:
+        if text not in self._registered or not frames:
+            return
+        key = self.key(text)
+        data = b"".join(bytes(f.data) for f in frames)
+        header = _HEADER.pack(frames[0].sample_rate, frames[0].num_channels)
+        # per thread, in case the background fill and a session write the same phrase
+        tmp = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(header + data)
+        with self._lock:
+            os.replace(tmp, self._path(key))
+            self._bytes += len(header) + len(data) - self._index.pop(key, 0)
+            self._index[key] = len(header) + len(data)
+            self._memory[key] = frames
+            self._evict()
+
+    async def fill(self, engine: tts.TTS, texts: list[str]) -> int:
+        """Register texts and synthesize the ones not on disk yet. Returns the number synthesized."""
+        self.register(texts)
+        missing = [text for text in dict.fromkeys(texts) if self.get(text) is None]
+
+        async def _synthesize(text: str) -> None:
+            frames = [audio.frame async for audio in engine.synthesize(text)]
+            self.put(text, frames)
+
+        await asyncio.gather(*(_synthesize(text) for text in missing))
+        if missing:
+            logger.info(f"Synthesized {len(missing)} phrase(s) into the TTS cache")
+        return len(missing)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key + _SUFFIX)
+
+    def _load(self, key: str) -> list[rtc.AudioFrame] | None:
+        try:
+            with open(self._path(key), "rb") as f:
+                sample_rate, num_channels = _HEADER.unpack(f.read(_HEADER.size))
+                data = f.read()
+        except (OSError, struct.error):
+            self._bytes -= self._index.pop(key, 0)
+            return None
+        bstream = utils.audio.AudioByteStream(sample_rate=sample_rate, num_channels=num_channels)
+        return bstream.write(data) + bstream.flush()
+
+    def _evict(self) -> None:
+        while self._bytes > self._max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self._memory.pop(key, None)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
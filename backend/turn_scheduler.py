@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, NamedTuple
+
+from livekit.agents import llm
+from livekit.agents.pipeline.speech_handle import SpeechHandle
+
+from agent_metrics import TURNS_QUEUED
+
+logger = logging.getLogger("turn-scheduler")
+
+
+class TurnOutput(NamedTuple):
+    stream: llm.LLMStream
+    speech: SpeechHandle | None = None
+
+
+@dataclass
+class _Turn:
+    text: str
+    use_image: bool
+    coalesce: bool
+    merged: int = 1
+
+
+def _generating(stream: llm.LLMStream) -> bool:
+    # LLMStream has no public "finished" flag; its main task ends with the last chunk
+    task = getattr(stream, "_task", None)
+    return task is not None and not task.done()
+
+
+class TurnScheduler:
+    """Runs a session's out-of-band turns (typed chat, tool follow-ups) one at a time.
+
+    Turns are handed to `answer(text, use_image)` by a single worker, so the
+    chat context is only ever mutated by one turn at a time. Typed messages
+    that arrive within `coalesce_window` seconds of each other, or while an
+    earlier turn is still being prepared, are merged into one LLM call. When
+    a new turn is submitted, the previous turn's LLM stream is closed and its
+    speech interrupted if the stream is still generating, since the reply to
+    the newer turn will supersede it.
+    """
+
+    def __init__(
+        self,
+        answer: Callable[[str, bool], Awaitable[TurnOutput | None]],
+        *,
+        coalesce_window: float = 0.35,
+    ):
+        self._answer = answer
+        self._window = coalesce_window
+        self._pending: list[_Turn] = []
+        self._wakeup = asyncio.Event()
+        self._last_submit = 0.0
+        self._current: TurnOutput | None = None
+        self._task: asyncio.Task | None = None
+        self.turns = 0
+        self.merged = 0
+        self.cancelled = 0
+
+    def submit(self, text: str, *, use_image: bool = False, coalesce: bool = True) -> None:
+        """Queue a user turn. Set coalesce=False for turns that must not be merged."""
+        last = self._pending[-1] if self._pending else None
+        if last is not None and coalesce and last.coalesce and last.use_image == use_image:
+            last.text = f"{last.text}\n{text}"
+            last.merged += 1
+            self.merged += 1
+        else:
+            self._pending.append(_Turn(text, use_image, coalesce))
+            TURNS_QUEUED.inc()
+
+        self._last_submit = asyncio.get_running_loop().time()
+        self._cancel_stale()
+        self._wakeup.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        TURNS_QUEUED.dec(len(self._pending))
+        self._pending.clear()
+        self._cancel_stale()
+
+    def _cancel_stale(self) -> None:
+        current, self._current = self._current, None
+        if current is None or not _generating(current.stream):
+            return
+        self.cancelled += 1
+        logger.info("Newer turn arrived, cancelling the reply still being generated")
+        if current.speech is not None and current.speech.allow_interruptions:
+            current.speech.interrupt()
+        asyncio.create_task(current.stream.aclose())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                if self._pending[0].coalesce:
+                    # let a burst of typed messages settle before answering it
+                    while (delay := self._last_submit + self._window - loop.time()) > 0:
+                        await asyncio.sleep(delay)
+
+                turn = self._pending.pop(0)
+                TURNS_QUEUED.dec()
+                if turn.merged > 1:
+                    logger.info(f"Answering {turn.merged} messages in one turn")
+                self.turns += 1
+                try:
+                    self._current = await self._answer(turn.text, turn.use_image)
+                except Exception as e:
+                    logger.error(f"Failed to answer turn: {str(e)}", exc_info=True)
+                    continue
+                if self._pending:
+                    self._cancel_stale()
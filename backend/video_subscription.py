@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterable, Callable, Literal
+
+from livekit import rtc
+
+from frame_sampler import FrameSampler, SampledVideoStream
+from track_manager import VideoTrackManager
+
+logger = logging.getLogger("video-subscription")
+
+EventTypes = Literal["attached", "released"]
+
+
+class LazyVideoSubscription(rtc.EventEmitter[EventTypes]):
+    """Subscribes to a participant's camera only while a vision turn needs it.
+
+    The room is expected to be joined with AutoSubscribe.AUDIO_ONLY. acquire()
+    subscribes to the first published video track, feeds it into the
+    FrameSampler and returns once a frame has been sampled. The subscription
+    stays warm for `warm_window` seconds after the last acquire() and is then
+    dropped again, so a session that never looks at the camera never decodes
+    video.
+
+    Events:
+        attached: the video track is subscribed and frames are flowing.
+        released: the warm window expired and the track was unsubscribed.
+    """
+
+    def __init__(
+        self,
+        room: rtc.Room,
+        sampler: FrameSampler,
+        *,
+        warm_window: float = 30.0,
+        track_manager: VideoTrackManager | None = None,
+        stream_factory: Callable[[rtc.Track], AsyncIterable[rtc.VideoFrameEvent]] | None = None,
+    ):
+        super().__init__()
+        self._room = room
+        self._sampler = sampler
+        self._warm_window = warm_window
+        self._track_manager = track_manager
+        self._stream_factory = stream_factory
+        self._publication: rtc.RemoteTrackPublication | None = None
+        self._stream_task: asyncio.Task | None = None
+        self._release_handle: asyncio.TimerHandle | None = None
+        self._has_frame = asyncio.Event()
+        self.last_acquire_seconds: float | None = None
+
+        room.on("track_subscribed", self._on_track_subscribed)
+        room.on("track_unsubscribed", self._on_track_unsubscribed)
+
+    @property
+    def active(self) -> bool:
+        return self._stream_task is not None
+
+    @property
+    def ready(self) -> bool:
+        """Whether a frame has been sampled since subscribing, so acquire() returns at once."""
+        return self._has_frame.is_set()
+
+    def prefetch(self) -> None:
+        """Start subscribing without waiting, e.g. as soon as a vision tool call is collected."""
+        asyncio.create_task(self.acquire())
+
+    async def acquire(self, timeout: float = 3.0) -> bool:
+        """Make sure video is flowing and wait for a sampled frame.
+
+        Returns False if the participant publishes no video or no frame
+        arrived within `timeout` seconds.
+        """
+        start = time.perf_counter()
+        self._schedule_release()
+
+        if self._publication is None:
+            self._publication = self._find_video_publication()
+            if self._publication is None:
+                logger.info("No video track published, answering without an image")
+                return False
+            if self._publication.track is not None:
+                self._start_stream(self._publication.track)
+            else:
+                logger.info(f"Subscribing to video track {self._publication.sid}")
+                self._publication.set_subscribed(True)
+
+        try:
+            await asyncio.wait_for(self._has_frame.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"No video frame within {timeout}s of subscribing")
+            return False
+
+        self.last_acquire_seconds = time.perf_counter() - start
+        logger.info(f"Video ready after {self.last_acquire_seconds * 1000:.0f} ms")
+        return True
+
+    def release(self) -> None:
+        """Stop decoding and unsubscribe from the video track."""
+        if self._release_handle is not None:
+            self._release_handle.cancel()
+            self._release_handle = None
+        self._stop_stream()
+        if self._publication is not None:
+            logger.info(f"Unsubscribing from idle video track {self._publication.sid}")
+            self._publication.set_subscribed(False)
+            self._publication = None
+        self._sampler.clear()
+        self.emit("released")
+
+    def _find_video_publication(self) -> rtc.RemoteTrackPublication | None:
+        if self._track_manager is not None:
+            return self._track_manager.preferred_publication()
+        for participant in self._room.remote_participants.values():
+            for publication in participant.track_publications.values():
+                if publication.kind == rtc.TrackKind.KIND_VIDEO:
+                    return publication
+        return None
+
+    def _schedule_release(self) -> None:
+        if self._release_handle is not None:
+            self._release_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._release_handle = loop.call_later(self._warm_window, self.release)
+
+    def _start_stream(self, track: rtc.Track) -> None:
+        if self._stream_task is None:
+            self._stream_task = asyncio.create_task(self._feed(track))
+            self.emit("attached")
+
+    def _stop_stream(self) -> None:
+        if self._stream_task is not None:
+            self._stream_task.cancel()
+            self._stream_task = None
+        self._has_frame.clear()
+
+    async def _feed(self, track: rtc.Track) -> None:
+        if self._stream_factory is not None:
+            stream = self._stream_factory(track)
+        else:
+            stream = SampledVideoStream(track, self._sampler, capacity=1)
+        try:
+            async for event in stream:
+                if self._sampler.push(event.frame):
+                    self._has_frame.set()
+        finally:
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
+
+    def _on_track_subscribed(
+        self,
+        track: rtc.Track,
+        publication: rtc.RemoteTrackPublication,
+        participant: rtc.RemoteParticipant,
+    ):
+        if self._publication is not None and publication.sid == self._publication.sid:
+            self._start_stream(track)
+
+    def _on_track_unsubscribed(
+        self,
+        track: rtc.Track,
+        publication: rtc.RemoteTrackPublication,
+        participant: rtc.RemoteParticipant,
+    ):
+        if self._publication is not None and publication.sid == self._publication.sid:
+            self._stop_stream()
+            self._publication = None
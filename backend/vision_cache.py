@@ -0,0 +1,128 @@
+import asyncio
+import base64
+import logging
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Literal
+
+from livekit import rtc
+from livekit.agents.llm import ChatImage
+from livekit.agents.utils import images
+
+from frame_ring import FrameRing
+from frame_sampler import FrameSampler
+
+logger = logging.getLogger("vision-cache")
+
+
+@dataclass(frozen=True)
+class VisionProfile:
+    """Resolution and quality a frame is encoded at before it is sent to the LLM."""
+
+    name: str
+    max_width: int
+    max_height: int
+    quality: int
+    detail: Literal["auto", "high", "low"] = "auto"
+
+
+DEFAULT_PROFILES = (
+    VisionProfile("low", max_width=512, max_height=512, quality=60, detail="low"),
+    VisionProfile("standard", max_width=1024, max_height=1024, quality=80),
+)
+
+
+def encode_frame(frame: rtc.VideoFrame, profile: VisionProfile) -> str:
+    """Encode a frame as a base64 JPEG data URL for the given profile."""
+    options = images.EncodeOptions(format="JPEG", quality=profile.quality)
+    if frame.width > profile.max_width or frame.height > profile.max_height:
+        options.resize_options = images.ResizeOptions(
+            width=profile.max_width,
+            height=profile.max_height,
+            strategy="scale_aspect_fit",
+        )
+    data = images.encode(frame, options)
+    return "data:image/jpeg;base64," + base64.b64encode(data).decode("ascii")
+
+
+class VisionFrameCache:
+    """Per-session cache holding a recent sampled frame as ready-to-send JPEGs.
+
+    Frames are pulled from a FrameSampler and encoded for every profile in a
+    worker thread, so a vision turn only has to pick up a prepared payload.
+    While an encode is running, the sampler's drop-oldest queue absorbs newer
+    frames, which keeps the encoder at most one frame behind the camera.
+
+    When a FrameRing is given, every sample is scored into it and the cache
+    holds the sharpest frame of the last `window` seconds instead of the
+    newest one; encoding is skipped while that choice does not change.
+    """
+
+    def __init__(
+        self,
+        profiles: tuple[VisionProfile, ...] = DEFAULT_PROFILES,
+        executor: Executor | None = None,
+    ):
+        self._profiles = profiles
+        self._executor = executor
+        self._payloads: dict[str, str] = {}
+        self._encoded_frame: rtc.VideoFrame | None = None
+        self._task: asyncio.Task | None = None
+        self.encode_ms: dict[str, float] = {}
+
+    def start(
+        self,
+        sampler: FrameSampler,
+        ring: FrameRing | None = None,
+        window: float = 2.0,
+    ) -> None:
+        """Start encoding frames produced by the sampler in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(sampler, ring, window))
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop prepared payloads so a stale frame is never sent."""
+        self._payloads = {}
+        self._encoded_frame = None
+
+    def get(self, profile: str = "standard") -> ChatImage | None:
+        """Return the newest prepared image for a profile, or None if none is ready."""
+        url = self._payloads.get(profile)
+        if url is None:
+            return None
+        detail = next(p.detail for p in self._profiles if p.name == profile)
+        return ChatImage(image=url, inference_detail=detail)
+
+    def _encode_all(self, frame: rtc.VideoFrame) -> dict[str, str]:
+        payloads = {}
+        for profile in self._profiles:
+            start = time.perf_counter()
+            payloads[profile.name] = encode_frame(frame, profile)
+            self.encode_ms[profile.name] = (time.perf_counter() - start) * 1000
+        return payloads
+
+    async def _run(self, sampler: FrameSampler, ring: FrameRing | None, window: float) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            frame = await sampler.get()
+            if ring is not None:
+                ring.push(frame)
+                frame = ring.best(window)
+            if frame is self._encoded_frame:
+                continue
+            try:
+                self._payloads = await loop.run_in_executor(self._executor, self._encode_all, frame)
+                self._encoded_frame = frame
+            except Exception as e:
+                logger.error(f"Failed to encode vision frame: {str(e)}", exc_info=True)
@@ -0,0 +1,47 @@
+import re
+
+from livekit.agents import llm
+
+# Explicit requests to be looked at. Words that merely mention images
+# ("pictures", "camera", "right here") are left out: in lazy-video mode a
+# false positive subscribes to the camera for nothing.
+DEFAULT_PHRASES = (
+    r"(can|could|would|will) you (take a |have a )?look",
+    r"take a look",
+    r"have a look",
+    r"look at (this|that|these|those|it|my|the)",
+    r"(can|could) you see",
+    r"do you see",
+    r"what do you see",
+    r"what does (this|it) look like",
+    r"how does (this|it) look",
+)
+
+
+class VisionIntentDetector:
+    """Cheap keyword matcher that tells whether a user turn needs the camera.
+
+    Runs on the final transcript before the first LLM call, so a matching
+    turn can go out with the frame already attached instead of waiting for
+    the model to call the image tool and then asking it a second time.
+    False negatives are harmless (the image tool still works), so the list
+    leans towards precision.
+    """
+
+    def __init__(self, phrases: tuple[str, ...] = DEFAULT_PHRASES):
+        self._pattern = re.compile(r"\b(" + "|".join(phrases) + r")\b", re.IGNORECASE)
+
+    def matches(self, text: str) -> bool:
+        return bool(text) and self._pattern.search(text) is not None
+
+
+def without_function(fnc_ctx: llm.FunctionContext | None, name: str) -> llm.FunctionContext | None:
+    """Shallow copy of fnc_ctx without the `name` tool, or None if nothing is left."""
+    if fnc_ctx is None:
+        return None
+    functions = {k: v for k, v in fnc_ctx.ai_functions.items() if k != name}
+    if not functions:
+        return None
+    reduced = llm.FunctionContext()
+    reduced._fncs = functions
+    return reduced